@@ -13,4 +13,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'AudioText.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after the app registry is ready
+from api.live import live_transcription  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """HTTP goes to Django; WebSockets to the live transcription endpoint"""
+    if scope['type'] == 'websocket':
+        await live_transcription(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -0,0 +1,170 @@
+import os
+import copy
+import json
+import queue
+import atexit
+import random
+import logging
+import datetime
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from opentelemetry import trace
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single process writes the files
+    fcntl = None
+
+# LogRecord attributes that are not `extra` fields
+RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'sample_rate'}
+
+
+def add_trace_ids(record):
+    """Stamp the ids of the span active where the record was logged"""
+    if hasattr(record, 'trace_id'):
+        return
+    span = trace.get_current_span().get_span_context()
+    if span.is_valid:
+        record.trace_id = format(span.trace_id, '032x')
+        record.span_id = format(span.span_id, '016x')
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message, process and
+    thread, fields passed with `extra`, the active trace/span ids and the
+    formatted exception.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+        }
+        add_trace_ids(record)
+        entry.update({key: value for key, value in vars(record).items() if key not in RESERVED_ATTRS})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SampleFilter(logging.Filter):
+    """
+    Keeps a record logged with extra={'sample_rate': r} with probability r,
+    for chatty debug paths; warnings and errors are always kept.
+    """
+
+    def filter(self, record):
+        rate = getattr(record, 'sample_rate', None)
+        if rate is None or record.levelno >= logging.WARNING:
+            return True
+        return random.random() < rate
+
+
+class ProcessSafeRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that several worker processes can share. Each write
+    and rollover happens under an exclusive lock on <file>.lock, and a
+    process reopens the file when another one has rotated it, so lines are
+    neither interleaved nor written to a renamed backup.
+    """
+
+    def __init__(self, filename, *args, **kwargs):
+        super().__init__(filename, *args, **kwargs)
+        self.lock_path = f'{self.baseFilename}.lock'
+
+    def emit(self, record):
+        if fcntl is None:
+            return super().emit(record)
+        try:
+            with open(self.lock_path, 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    self.reopen_if_rotated()
+                    super().emit(record)
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        except Exception:
+            self.handleError(record)
+
+    def reopen_if_rotated(self):
+        if self.stream is None:
+            return
+        try:
+            current = os.stat(self.baseFilename).st_ino
+        except FileNotFoundError:
+            current = None
+        if current != os.fstat(self.stream.fileno()).st_ino:
+            self.stream.close()
+            self.stream = self._open()
+
+
+class QueuedHandler(QueueHandler):
+    """
+    Puts records on a queue and returns at once; one listener thread per
+    process does the formatting and writing through the named handlers.
+    When the queue is full, records are dropped rather than blocking the
+    request (counted in `dropped`). The listener starts with the first
+    record, and again in a forked worker.
+    """
+
+    def __init__(self, handlers=(), queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        # dictConfig builds handlers in name order, so the targets exist
+        # already; the logging module only keeps weak references to them
+        get_handler = getattr(logging, 'getHandlerByName', None) or logging._handlers.get  # 3.12+
+        self.handlers = [get_handler(name) for name in handlers]
+        if None in self.handlers:
+            raise ValueError("QueuedHandler targets must be configured first (their names must sort before it)")
+        self.listener = None
+        self.dropped = 0
+        self._start_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._forget_listener)
+        atexit.register(self.stop)
+
+    def _forget_listener(self):
+        # The parent's listener thread does not exist in the child
+        self.queue = queue.Queue(self.queue.maxsize)
+        self.listener = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self.listener is None:
+                self.listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+                self.listener.start()
+
+    def stop(self):
+        """Write out what is queued and stop the listener"""
+        with self._start_lock:
+            if self.listener is not None:
+                self.listener.stop()
+                self.listener = None
+
+    def flush(self):
+        """Wait until every queued record has been written"""
+        self.stop()
+        self.start()
+
+    def prepare(self, record):
+        # Render the message now (its arguments may change before the
+        # listener runs) but leave formatting, `extra` fields and the
+        # exception to the handlers. Trace ids are only known here.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        add_trace_ids(record)
+        return record
+
+    def enqueue(self, record):
+        if self.listener is None:
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
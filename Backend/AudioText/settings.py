@@ -38,7 +38,6 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
-    'django_ratelimit',
     'allauth',
     'allauth.account',
     'allauth.socialaccount',
@@ -47,6 +46,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',  # First, so the latency covers every other middleware
+    'api.middleware.TracingMiddleware',
+    'api.middleware.ProfilerMiddleware',
+    'api.middleware.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.middleware.gzip.GZipMiddleware',  # Response compression
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -204,6 +207,13 @@ SOCIALACCOUNT_PROVIDERS = {
     }
 }
 
+# OAuth logins must prove the identity with the provider: an ID token (verified
+# locally against cached JWKS) or, for Facebook, an access token checked with
+# one Graph API call. Development only: VERIFY_IDENTITY_TOKENS=False with DEBUG=True
+# accepts client-sent email/provider_id, letting anyone log in as anyone.
+VERIFY_IDENTITY_TOKENS = os.getenv('VERIFY_IDENTITY_TOKENS', 'True') == 'True'
+IDENTITY_JWKS_CACHE_SECONDS = int(os.getenv('IDENTITY_JWKS_CACHE_SECONDS', '3600'))
+
 ACCOUNT_LOGIN_METHODS = {'email'}
 
 ACCOUNT_SIGNUP_FIELDS = [
@@ -219,15 +229,113 @@ SOCIALACCOUNT_AUTO_SIGNUP = True
 MEDIA_ROOT = os.path.join(BASE_DIR, os.getenv('MEDIA_ROOT', 'media'))
 MEDIA_URL = os.getenv('MEDIA_URL', '/media/')
 
+# File Storage
+# 'local' keeps audio under MEDIA_ROOT; 's3' uses any S3-compatible service
+# (AWS S3, MinIO, Cloudflare R2) and enables direct presigned uploads
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'local')
+
+if STORAGE_BACKEND == 's3':
+    DEFAULT_FILE_STORAGE_CONFIG = {
+        'BACKEND': 'storages.backends.s3.S3Storage',
+        'OPTIONS': {
+            'bucket_name': os.getenv('S3_BUCKET_NAME', ''),
+            'endpoint_url': os.getenv('S3_ENDPOINT_URL') or None,
+            'region_name': os.getenv('S3_REGION_NAME') or None,
+            'access_key': os.getenv('S3_ACCESS_KEY_ID', ''),
+            'secret_key': os.getenv('S3_SECRET_ACCESS_KEY', ''),
+            'default_acl': None,
+            'file_overwrite': False,
+            'querystring_expire': 60 * 60,  # presigned GET URLs, e.g. for the engine
+        },
+    }
+else:
+    DEFAULT_FILE_STORAGE_CONFIG = {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    }
+
+STORAGES = {
+    'default': DEFAULT_FILE_STORAGE_CONFIG,
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+PRESIGNED_UPLOAD_EXPIRY = 15 * 60  # seconds a presigned upload URL stays valid
+
+# Audio Streaming
+# Workers only authorize playback; the bytes (and Range requests) are served
+# by object storage through a presigned redirect, or by the web server:
+#   'nginx'    - X-Accel-Redirect to an internal location aliasing MEDIA_ROOT:
+#                location /protected-media/ { internal; alias <MEDIA_ROOT>/; }
+#   'sendfile' - X-Sendfile with the absolute path (Apache mod_xsendfile, lighttpd)
+#   ''         - Django streams the file itself (development only)
+AUDIO_STREAM_OFFLOAD = os.getenv('AUDIO_STREAM_OFFLOAD', '')
+AUDIO_STREAM_ACCEL_PREFIX = os.getenv('AUDIO_STREAM_ACCEL_PREFIX', '/protected-media/')
+AUDIO_STREAM_URL_EXPIRY = 10 * 60  # seconds a presigned playback URL stays valid
+
+# Storage Retention
+# Hot audio counts towards these quotas (bytes, None = unlimited). When one
+# would be exceeded, audio of completed transcriptions is evicted in LRU order
+# (transcripts are kept); with eviction disabled the upload is rejected.
+STORAGE_QUOTA_PER_USER = int(os.getenv('STORAGE_QUOTA_PER_USER_MB', '1024')) * 1024 * 1024
+STORAGE_QUOTA_GLOBAL = int(os.getenv('STORAGE_QUOTA_GLOBAL_MB')) * 1024 * 1024 if os.getenv('STORAGE_QUOTA_GLOBAL_MB') else None
+STORAGE_EVICT_ON_QUOTA = os.getenv('STORAGE_EVICT_ON_QUOTA', 'True') == 'True'
+AUDIO_RETENTION_DAYS = int(os.getenv('AUDIO_RETENTION_DAYS', '7'))  # idle days before enforce_retention evicts audio
+
 # OpenAI
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
 # AssemblyAI
 ASSEMBLYAI_API_KEY = os.getenv('ASSEMBLY_AI_KEYS')
+ASSEMBLYAI_POLL_INTERVAL = float(os.getenv('ASSEMBLYAI_POLL_INTERVAL', '3'))  # seconds between status checks (async path)
+ASSEMBLYAI_TIMEOUT = float(os.getenv('ASSEMBLYAI_TIMEOUT', '30'))  # per HTTP request (async path)
+# Overall wait for one transcript (async path): MAX_WAIT seconds plus
+# MAX_WAIT_PER_AUDIO_SECOND for each second of audio sent
+ASSEMBLYAI_MAX_WAIT = float(os.getenv('ASSEMBLYAI_MAX_WAIT', '300'))
+ASSEMBLYAI_MAX_WAIT_PER_AUDIO_SECOND = float(os.getenv('ASSEMBLYAI_MAX_WAIT_PER_AUDIO_SECOND', '1'))
+
+# Transcription status push (SSE under ASGI, long-polling as fallback)
+TRANSCRIPTION_EVENTS_POLL_INTERVAL = 2  # seconds between status reads shared by all waiters
+TRANSCRIPTION_EVENTS_HEARTBEAT = 15  # seconds between SSE keep-alive comments
+TRANSCRIPTION_LONG_POLL_TIMEOUT = 25  # seconds a long-poll request waits for a change
+# Longer audio is transcribed in windows of this many seconds, each saved as
+# a transcript segment as soon as it is ready
+TRANSCRIPTION_WINDOW_SECONDS = int(os.getenv('TRANSCRIPTION_WINDOW_SECONDS', '300'))
+# Each cut lands on the quietest moment of the window's last seconds
+TRANSCRIPTION_WINDOW_SEARCH_SECONDS = 10
+# Windows are sent as mono 16 kHz audio; 'flac' is smaller still (needs ffmpeg)
+TRANSCRIPTION_WINDOW_FORMAT = os.getenv('TRANSCRIPTION_WINDOW_FORMAT', 'wav')
+
+# Transcription jobs hold a lease renewed by a heartbeat while processed.
+# The process_transcriptions worker requeues jobs whose lease expired
+# (their worker died) until they run out of attempts.
+TRANSCRIPTION_LEASE_SECONDS = int(os.getenv('TRANSCRIPTION_LEASE_SECONDS', '120'))
+TRANSCRIPTION_HEARTBEAT_INTERVAL = int(os.getenv('TRANSCRIPTION_HEARTBEAT_INTERVAL', '30'))
+TRANSCRIPTION_MAX_ATTEMPTS = int(os.getenv('TRANSCRIPTION_MAX_ATTEMPTS', '3'))
+
+# Live transcription (WebSocket under ASGI at /ws/transcriptions/live/)
+LIVE_TRANSCRIPTION_ENGINE = os.getenv('LIVE_TRANSCRIPTION_ENGINE', 'assemblyai')  # 'assemblyai' or 'fake'
+LIVE_MAX_SESSIONS = int(os.getenv('LIVE_MAX_SESSIONS', '50'))  # concurrent sessions per server process
+LIVE_DEFAULT_SAMPLE_RATE = 16000
+LIVE_MAX_FRAME_BYTES = 64 * 1024  # larger audio frames close the socket
+LIVE_MAX_BUFFERED_FRAMES = 32  # frames queued for the engine before the socket stops being read
+LIVE_BILLING_INTERVAL = 10  # seconds of audio between wallet charges
 
 # Razorpay
 RAZORPAY_KEY_ID = os.getenv('RAZORPAY_KEY_ID')
 RAZORPAY_KEY_SECRET = os.getenv('RAZORPAY_KEY_SECRET')
+RAZORPAY_CONNECT_TIMEOUT = float(os.getenv('RAZORPAY_CONNECT_TIMEOUT', '3.05'))
+RAZORPAY_READ_TIMEOUT = float(os.getenv('RAZORPAY_READ_TIMEOUT', '10'))
+RAZORPAY_POOL_SIZE = int(os.getenv('RAZORPAY_POOL_SIZE', '10'))
+PAYMENT_WEBHOOK_BATCH_SIZE = 100
+PAYMENT_WEBHOOK_MAX_ATTEMPTS = 5
+PAYMENT_WEBHOOK_LEASE_SECONDS = 300  # a claimed batch is retried after this if its worker died
+
+# Bulk Deletion
+# Items are soft-deleted immediately; `manage.py purge_deletions --loop`
+# removes their storage and rows in batches
+BULK_DELETE_MAX_ITEMS = 1000
+DELETION_PURGE_BATCH_SIZE = 200
 
 # Demo Credits
 DEMO_MINUTES = 10  # Free minutes for new users
@@ -239,8 +347,6 @@ ALLOWED_AUDIO_FORMATS = ['mp3', 'wav', 'm4a', 'flac', 'ogg']
 MAX_UPLOAD_SIZE = 100 * 1024 * 1024  # 100MB
 
 # Celery Configuration removed - using synchronous processing
-# Cache for rate limiting (Optional - uses in-memory cache if Redis not available)
-# Note: In-memory cache works for development but rate limits won't be shared across processes
 CACHES = {
     'default': {
         'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
@@ -248,26 +354,82 @@ CACHES = {
     }
 }
 
+# Seconds an authenticated user is cached for read-only requests (0 disables).
+# Deactivation and logout clear the cached copy, which only reaches every
+# worker through a shared cache: with the per-process LocMemCache a
+# deactivated user would stay logged in on the other workers, so the cache
+# is off unless CACHE_BACKEND is shared. Measure with `manage.py benchmark_auth_cache`.
+SHARED_CACHE = 'locmem' not in CACHES['default']['BACKEND'] and 'dummy' not in CACHES['default']['BACKEND']
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', '60' if SHARED_CACHE else '0'))
+
+# Prometheus metrics at /metrics. Scrapers send "Authorization: Bearer <token>".
+# On by default only once METRICS_TOKEN is set; without a token the endpoint
+# is only served with DEBUG on. Under several worker processes also set
+# PROMETHEUS_MULTIPROC_DIR (see api/utils/metrics.py).
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True' if METRICS_TOKEN else 'False') == 'True'
+
+# Health checks. /api/health/ (and /health/ready/) answer from a snapshot
+# of dependency probes refreshed in the background at most every
+# HEALTH_SNAPSHOT_TTL seconds; /health/live/ checks nothing; /health/deep/
+# (staff only) probes everything on demand and reports latencies.
+HEALTH_SNAPSHOT_TTL = float(os.getenv('HEALTH_SNAPSHOT_TTL', '10'))  # seconds
+HEALTH_PROBE_TIMEOUT = float(os.getenv('HEALTH_PROBE_TIMEOUT', '3'))  # seconds, per external API call
+
+# OpenTelemetry tracing: '' (off), 'file' (JSON lines in TRACING_FILE),
+# 'console', or 'otlp' (a collector at TRACING_OTLP_ENDPOINT; needs
+# opentelemetry-exporter-otlp-proto-http)
+TRACING_EXPORTER = os.getenv('TRACING_EXPORTER', '')
+TRACING_FILE = os.getenv('TRACING_FILE', os.path.join(BASE_DIR, 'logs/traces.jsonl'))
+TRACING_OTLP_ENDPOINT = os.getenv('TRACING_OTLP_ENDPOINT', '')
+TRACING_SERVICE_NAME = os.getenv('TRACING_SERVICE_NAME', 'audiotext')
+
+# Request profiling (cProfile). Off unless PROFILER_SAMPLE_RATE > 0 or the
+# request carries an X-Profile-Token from `manage.py profile_token`.
+# Reports are browsed in the admin; only the newest PROFILER_MAX_REPORTS stay.
+PROFILER_SAMPLE_RATE = float(os.getenv('PROFILER_SAMPLE_RATE', '0'))
+PROFILER_TOKEN_MAX_AGE = int(os.getenv('PROFILER_TOKEN_MAX_AGE', '3600'))  # seconds
+PROFILER_MAX_REPORTS = int(os.getenv('PROFILER_MAX_REPORTS', '200'))
+PROFILER_TOP_FUNCTIONS = 50  # functions listed in a report
+
+# X-DB-Query-Count / X-DB-Query-Time-Ms response headers (always counted for /metrics)
+QUERY_COUNT_HEADERS = os.getenv('QUERY_COUNT_HEADERS', str(DEBUG)) == 'True'
+
 # Rate Limiting Configuration (Optional - works without Redis)
+# Counters are shared across worker processes: in Redis when RATELIMIT_REDIS_URL
+# is set, otherwise in the rate_limit_counters table
 RATELIMIT_ENABLE = os.getenv('RATELIMIT_ENABLE', 'True') == 'True'
-RATELIMIT_USE_CACHE = 'default'
+RATELIMIT_REDIS_URL = os.getenv('RATELIMIT_REDIS_URL', '')
 
-# Silence django-ratelimit warnings about in-memory cache (development only)
-SILENCED_SYSTEM_CHECKS = ['django_ratelimit.E003', 'django_ratelimit.W001']
+# Idempotency-Key support for upload, transcription and payment POSTs
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60  # seconds a stored response can be replayed
+IDEMPOTENCY_LOCK_TIMEOUT = 15 * 60  # seconds before an unfinished request's lock is abandoned
+IDEMPOTENCY_WAIT_SECONDS = 30  # how long a concurrent duplicate waits for the first result
 
 # Logging Configuration
+# Logging: loggers hand records to a queue and return; one listener thread
+# per process writes them. The log files are JSON lines, rotated under a
+# file lock so several worker processes can share them. Chatty debug calls
+# pass extra={'sample_rate': LOG_DEBUG_SAMPLE_RATE} to keep only a sample.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '0.01'))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
-        'verbose': {
-            'format': '[{levelname}] {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
-        },
         'simple': {
             'format': '[{levelname}] {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'AudioText.log_handlers.JsonFormatter',
+        },
+    },
+    'filters': {
+        'sampled': {
+            '()': 'AudioText.log_handlers.SampleFilter',
+        },
     },
     'handlers': {
         'console': {
@@ -276,30 +438,35 @@ LOGGING = {
         },
         'file': {
             'level': 'INFO',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'AudioText.log_handlers.ProcessSafeRotatingFileHandler',
             'filename': os.path.join(BASE_DIR, 'logs/app.log'),
             'maxBytes': 1024 * 1024 * 15,  # 15MB
             'backupCount': 10,
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
         'error_file': {
             'level': 'ERROR',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'AudioText.log_handlers.ProcessSafeRotatingFileHandler',
             'filename': os.path.join(BASE_DIR, 'logs/error.log'),
             'maxBytes': 1024 * 1024 * 15,  # 15MB
             'backupCount': 10,
-            'formatter': 'verbose',
+            'formatter': 'json',
+        },
+        'queue': {
+            '()': 'AudioText.log_handlers.QueuedHandler',
+            'handlers': ['console', 'file', 'error_file'],
+            'filters': ['sampled'],
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
         'api': {
-            'handlers': ['console', 'file', 'error_file'],
-            'level': 'INFO',
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
             'propagate': False,
         },
     },
@@ -320,3 +487,10 @@ EMAIL_USE_SSL = os.getenv('EMAIL_USE_SSL', 'False') == 'True'
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@audioscribe.com')
 SUPPORT_EMAIL = os.getenv('SUPPORT_EMAIL', 'support@audioscribe.com')
 ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@audioscribe.com')
+
+# Email Outbox
+# Emails are written to the outbox with the record they are about;
+# `manage.py send_emails --loop` delivers them over one SMTP connection per batch
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', '50'))
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_LEASE_SECONDS = 300  # a claimed batch is retried after this if its sender died
@@ -1,5 +1,11 @@
 from django.contrib import admin
-from .models import User, Wallet, Transaction, AudioFile, Transcription, ContactMessage
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+from .models import User, Wallet, Transaction, AudioBlob, AudioFile, Transcription, TranscriptionTiming, ProfileReport, DeletionRequest, LiveSession, ContactMessage, EmailOutbox, PaymentWebhookEvent
+from .services.telemetry_service import TelemetryService, PERCENTILES
 
 
 @admin.register(User)
@@ -25,6 +31,21 @@ class TransactionAdmin(admin.ModelAdmin):
     readonly_fields = ['id', 'created_at']
 
 
+@admin.register(PaymentWebhookEvent)
+class PaymentWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['event_id', 'event', 'payment_id', 'status', 'attempts', 'created_at', 'processed_at']
+    list_filter = ['event', 'status', 'created_at']
+    search_fields = ['event_id', 'payment_id', 'order_id']
+    readonly_fields = ['id', 'created_at', 'processed_at']
+
+
+@admin.register(AudioBlob)
+class AudioBlobAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'size', 'ref_count', 'created_at']
+    search_fields = ['sha256', 'file_path']
+    readonly_fields = ['id', 'created_at']
+
+
 @admin.register(AudioFile)
 class AudioFileAdmin(admin.ModelAdmin):
     list_display = ['filename', 'user', 'duration', 'format', 'uploaded_at']
@@ -35,12 +56,126 @@ class AudioFileAdmin(admin.ModelAdmin):
 
 @admin.register(Transcription)
 class TranscriptionAdmin(admin.ModelAdmin):
-    list_display = ['id', 'user', 'language', 'status', 'duration', 'cost', 'created_at']
+    list_display = ['id', 'user', 'language', 'status', 'duration', 'cost', 'attempts', 'created_at']
     list_filter = ['status', 'language', 'created_at']
-    search_fields = ['user__email', 'audio_file__filename']
+    search_fields = ['user__email', 'audio_file__filename', 'lease_owner']
+    readonly_fields = ['id', 'created_at', 'completed_at', 'lease_owner', 'lease_expires_at', 'charge']
+
+
+@admin.register(TranscriptionTiming)
+class TranscriptionTimingAdmin(admin.ModelAdmin):
+    list_display = ['transcription_id', 'status', 'language', 'format', 'audio_seconds', 'total_ms', 'engine_ms', 'realtime_factor', 'recorded_at']
+    list_filter = ['status', 'language', 'format', 'recorded_at']
+    search_fields = ['transcription_id']
+    readonly_fields = [field.name for field in TranscriptionTiming._meta.fields]
+    change_list_template = 'admin/api/transcriptiontiming/change_list.html'
+    
+    # Columns of the percentile report: (metric, heading)
+    REPORT_COLUMNS = [
+        ('total_ms', 'Total (ms)'),
+        ('queue_ms', 'Queue (ms)'),
+        ('upload_ms', 'Upload (ms)'),
+        ('engine_ms', 'Engine (ms)'),
+        ('realtime_factor', 'Realtime factor'),
+    ]
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def get_urls(self):
+        return [
+            path('report/', self.admin_site.admin_view(self.report_view), name='api_transcriptiontiming_report'),
+        ] + super().get_urls()
+    
+    def report_view(self, request):
+        """p50/p95/p99 of the recorded jobs by language, format and file size"""
+        try:
+            days = max(int(request.GET.get('days', 30)), 1)
+        except ValueError:
+            days = 30
+        status = request.GET.get('status', 'completed')
+        report = TelemetryService.report(days=days, status=status if status != 'all' else None)
+        
+        def row(label, summary):
+            cells = []
+            for metric, _ in self.REPORT_COLUMNS:
+                cells += [summary[metric][f'p{q}'] for q in PERCENTILES]
+            return {'label': label, 'count': summary['count'], 'cells': cells}
+        
+        sections = [
+            {'title': 'All jobs', 'rows': [row('All', report['overall'])]},
+            {'title': 'By language', 'rows': [row(key, summary) for key, summary in report['language'].items()]},
+            {'title': 'By format', 'rows': [row(key, summary) for key, summary in report['format'].items()]},
+            {'title': 'By file size', 'rows': [row(key, summary) for key, summary in report['size'].items()]},
+        ]
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Transcription timing percentiles',
+            'days': days,
+            'status': status,
+            'columns': [heading for _, heading in self.REPORT_COLUMNS],
+            'percentiles': [f'p{q}' for q in PERCENTILES],
+            'sections': sections,
+        }
+        return TemplateResponse(request, 'admin/api/transcriptiontiming/report.html', context)
+
+
+@admin.register(ProfileReport)
+class ProfileReportAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'method', 'path', 'view_name', 'status_code', 'wall_ms', 'cpu_ms', 'trigger']
+    list_filter = ['trigger', 'method', 'view_name', 'created_at']
+    search_fields = ['path', 'view_name']
+    fields = ['method', 'path', 'view_name', 'status_code', 'trigger', 'wall_ms', 'cpu_ms', 'created_at', 'download', 'listing']
+    readonly_fields = fields
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def get_urls(self):
+        return [
+            path(
+                '<uuid:pk>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='api_profilereport_download',
+            ),
+        ] + super().get_urls()
+    
+    def download_view(self, request, pk):
+        """The raw profile, for snakeviz or pstats"""
+        report = get_object_or_404(ProfileReport, pk=pk)
+        response = HttpResponse(bytes(report.profile), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="profile-{report.id}.prof"'
+        return response
+    
+    @admin.display(description='Profile')
+    def download(self, obj):
+        return format_html('<a href="{}">Download .prof</a>', reverse('admin:api_profilereport_download', args=[obj.pk]))
+    
+    @admin.display(description='Top functions')
+    def listing(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto;">{}</pre>', obj.stats)
+
+
+@admin.register(DeletionRequest)
+class DeletionRequestAdmin(admin.ModelAdmin):
+    list_display = ['user', 'kind', 'status', 'deleted_count', 'requested_count', 'created_at', 'completed_at']
+    list_filter = ['kind', 'status', 'created_at']
+    search_fields = ['user__email']
     readonly_fields = ['id', 'created_at', 'completed_at']
 
 
+@admin.register(LiveSession)
+class LiveSessionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'language', 'status', 'seconds_billed', 'cost', 'created_at']
+    list_filter = ['status', 'language', 'created_at']
+    search_fields = ['user__email']
+    readonly_fields = ['id', 'created_at', 'ended_at']
+
+
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'subject', 'status', 'created_at']
@@ -69,3 +204,11 @@ class ContactMessageAdmin(admin.ModelAdmin):
         if obj:  # editing an existing object
             return self.readonly_fields + ('name', 'email', 'subject', 'message')
         return self.readonly_fields
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'template', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['template', 'status', 'created_at']
+    search_fields = ['subject', 'to']
+    readonly_fields = ['id', 'created_at', 'sent_at']
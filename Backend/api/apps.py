@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+    
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+        from .utils.tracing import configure_tracing
+        configure_tracing()
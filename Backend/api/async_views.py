@@ -0,0 +1,210 @@
+"""
+Native async versions of the I/O-heavy endpoints, served under /api/async/.
+
+Under ASGI each request waiting on storage or the transcription engine
+costs an idle coroutine instead of a worker thread. Responses match the
+sync endpoints of the same name.
+"""
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from .models import Transcription
+from .serializers import (
+    AudioFileSerializer, TranscriptionSerializer, TranscriptionDetailSerializer, TranscriptionCreateSerializer
+)
+from .services import AudioService, TranscriptionService, WalletService
+from .utils.async_api import ApiResponse, async_api_view
+from .utils.status_hub import TERMINAL_STATUSES, get_hub, status_event
+
+
+def _store_upload(request):
+    # Parsing the multipart body and writing to storage are blocking I/O,
+    # run together in one thread
+    file = request.FILES.get('file')
+    if not file:
+        raise ValueError('No file provided')
+
+    audio_file = AudioService.store_audio_file(file, request.user)
+    has_balance, estimated_cost = WalletService.check_sufficient_balance(
+        request.user,
+        float(audio_file.duration)
+    )
+
+    return {
+        'audio_file': AudioFileSerializer(audio_file).data,
+        'estimated_cost': float(estimated_cost),
+        'has_sufficient_balance': has_balance
+    }
+
+
+@async_api_view(['POST'], rate='50/h', idempotent=True, group='audio-upload')
+async def upload_audio(request):
+    """Upload audio file - Rate limited to 50 per hour"""
+    try:
+        data = await sync_to_async(_store_upload)(request)
+        return ApiResponse(data, status=201)
+    except ValueError as e:
+        return ApiResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return ApiResponse({'error': str(e)}, status=500)
+
+
+@async_api_view(['POST'], rate='20/h', idempotent=True, group='transcription-create')
+async def create_transcription(request):
+    """Create transcription request and process it without holding a thread - Rate limited to 20 per hour"""
+    try:
+        payload = json.loads(request.body or b'{}')
+    except json.JSONDecodeError:
+        return ApiResponse({'error': 'Invalid JSON body'}, status=400)
+
+    serializer = TranscriptionCreateSerializer(data=payload)
+    if not serializer.is_valid():
+        return ApiResponse(serializer.errors, status=400)
+
+    try:
+        transcription = await sync_to_async(TranscriptionService.create_transcription)(
+            serializer.validated_data['audio_file_id'],
+            serializer.validated_data['language'],
+            request.user
+        )
+
+        try:
+            await TranscriptionService.aprocess_transcription(transcription)
+            if transcription.status == 'completed':
+                message = 'Transcription completed successfully.'
+            else:
+                # A queue worker claimed it first
+                message = 'Transcription is being processed.'
+        except Exception:
+            # Transcription failed, but record is created
+            message = 'Transcription failed. Check status for details.'
+
+        return ApiResponse({
+            **TranscriptionSerializer(transcription).data,
+            'message': message
+        }, status=201)
+    except ValueError as e:
+        return ApiResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return ApiResponse({'error': str(e)}, status=500)
+
+
+async def _get_transcription(request, pk):
+    return await Transcription.objects.select_related('audio_file').aget(
+        pk=pk, user=request.user, deleted_at__isnull=True
+    )
+
+
+@async_api_view(['GET'])
+async def transcription_detail(request, pk):
+    """Transcription status and result (the transcript so far while it runs)"""
+    try:
+        transcription = await _get_transcription(request, pk)
+    except Transcription.DoesNotExist:
+        return ApiResponse({'detail': 'Not found.'}, status=404)
+
+    data = await sync_to_async(lambda: TranscriptionDetailSerializer(transcription).data)()
+    return ApiResponse(data)
+
+
+@async_api_view(['GET'])
+async def download_transcription(request, pk):
+    """Download transcription as text file"""
+    try:
+        transcription = await _get_transcription(request, pk)
+        content = TranscriptionService.generate_download_file(transcription)
+    except Transcription.DoesNotExist:
+        return ApiResponse({'detail': 'Not found.'}, status=404)
+    except ValueError as e:
+        return ApiResponse({'error': str(e)}, status=400)
+
+    response = HttpResponse(content, content_type='text/plain; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="transcription_{transcription.id}.txt"'
+    return response
+
+
+def _format_event(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+@async_api_view(['GET'])
+async def transcription_events(request, pk):
+    """
+    Server-Sent Events stream of status and progress changes.
+    Sends the current status first and closes once the transcription
+    completes or fails.
+    """
+    try:
+        transcription = await _get_transcription(request, pk)
+    except Transcription.DoesNotExist:
+        return ApiResponse({'detail': 'Not found.'}, status=404)
+
+    current = status_event(transcription.id, transcription.status, transcription.error_message)
+
+    async def stream():
+        if current['status'] in TERMINAL_STATUSES:
+            yield _format_event(current)
+            return
+
+        # Subscribe before sending the snapshot so no change slips between them
+        hub = get_hub()
+        queue = hub.subscribe(transcription.id, current)
+        try:
+            yield _format_event(current)
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), settings.TRANSCRIPTION_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ': keep-alive\n\n'
+                    continue
+                yield _format_event(event)
+                if event['type'] == 'status' and event['status'] in TERMINAL_STATUSES:
+                    return
+        finally:
+            hub.unsubscribe(transcription.id, queue)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Events must reach the client as they happen: no proxy buffering and
+    # no GZipMiddleware (which skips responses that declare an encoding)
+    response['X-Accel-Buffering'] = 'no'
+    response['Content-Encoding'] = 'identity'
+    return response
+
+
+@async_api_view(['GET'])
+async def wait_transcription(request, pk):
+    """
+    Long-poll fallback for clients without EventSource. Pass the last status
+    seen as ?status=; answers as soon as it changes, or with the unchanged
+    status after TRANSCRIPTION_LONG_POLL_TIMEOUT seconds.
+    """
+    try:
+        transcription = await _get_transcription(request, pk)
+    except Transcription.DoesNotExist:
+        return ApiResponse({'detail': 'Not found.'}, status=404)
+
+    current = status_event(transcription.id, transcription.status, transcription.error_message)
+    known = request.GET.get('status')
+    if known != current['status'] or current['status'] in TERMINAL_STATUSES:
+        return ApiResponse(current)
+
+    hub = get_hub()
+    queue = hub.subscribe(transcription.id, current)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.TRANSCRIPTION_LONG_POLL_TIMEOUT
+    try:
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if event['type'] == 'status' and event['status'] != known:
+                return ApiResponse(event)
+    finally:
+        hub.unsubscribe(transcription.id, queue)
+
+    return ApiResponse(current)
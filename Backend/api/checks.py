@@ -0,0 +1,23 @@
+import shutil
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register()
+def check_ffmpeg(app_configs, **kwargs):
+    """
+    Audio longer than one transcription window is cut by pydub, which needs
+    ffmpeg to decode anything but WAV (and to encode windows as FLAC).
+    """
+    from pydub import AudioSegment
+
+    if shutil.which(AudioSegment.converter):
+        return []
+    return [Warning(
+        "ffmpeg was not found on PATH",
+        hint=(
+            f"Audio longer than TRANSCRIPTION_WINDOW_SECONDS ({settings.TRANSCRIPTION_WINDOW_SECONDS}s) "
+            "in formats other than WAV cannot be cut into windows. Install ffmpeg on every worker."
+        ),
+        id='api.W001',
+    )]
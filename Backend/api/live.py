@@ -0,0 +1,232 @@
+"""
+WebSocket endpoint for live transcription, mounted by AudioText/asgi.py at
+/ws/transcriptions/live/ (Django's URLconf only routes HTTP).
+
+Connect with the auth cookie and ?language=<auto|english|hindi>&sample_rate=,
+then send binary frames of 16-bit little-endian mono PCM. Send the text frame
+{"type": "stop"} to finish. The server answers with JSON text frames:
+
+    {"type": "session", "id"}                       once the stream is open
+    {"type": "partial", "text"}                     current unsettled segment
+    {"type": "final", "text", "start", "end"}       settled segment
+    {"type": "completed", "id", "text", "seconds", "cost"}
+    {"type": "error", "error"}                      followed by a close
+"""
+import json
+import asyncio
+import logging
+import threading
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import parse_cookie
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from .services import LiveTranscriptionService, TranscriptionService
+from .services.streaming_engines import get_streaming_engine
+from .utils.cookie_auth import CookieJWTAuthentication
+
+logger = logging.getLogger('api')
+
+LIVE_PATH = '/ws/transcriptions/live/'
+
+CLOSE_NORMAL = 1000
+CLOSE_TOO_BIG = 1009
+CLOSE_INTERNAL_ERROR = 1011
+CLOSE_TRY_AGAIN_LATER = 1013
+CLOSE_BAD_REQUEST = 4400
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_PAYMENT_REQUIRED = 4402
+
+
+class SessionClosed(Exception):
+    def __init__(self, code, error):
+        super().__init__(error)
+        self.code = code
+        self.error = error
+
+
+class SessionLimiter:
+    """Counts live sessions in this process against LIVE_MAX_SESSIONS"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+
+    def acquire(self):
+        with self._lock:
+            if self.active >= settings.LIVE_MAX_SESSIONS:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+
+sessions = SessionLimiter()
+
+
+def authenticate_scope(scope):
+    """Resolve the user from the JWT cookie of the WebSocket handshake, None if absent or invalid"""
+    headers = dict(scope.get('headers') or [])
+    cookies = parse_cookie(headers.get(b'cookie', b'').decode('latin-1'))
+    raw_token = cookies.get(getattr(settings, 'JWT_AUTH_COOKIE', 'access_token'))
+    if not raw_token:
+        return None
+
+    auth = CookieJWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+class LiveTranscriptionSocket:
+    """
+    One connection. Three tasks run side by side: reading audio frames from
+    the client, feeding them to the engine (billing as it goes), and
+    forwarding engine results. Frames wait in a bounded queue, so when the
+    engine falls behind the reader stops receiving and the client is slowed
+    by the transport instead of audio piling up in memory.
+    """
+
+    def __init__(self, scope, receive, send):
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        self.connected = True
+        self.session = None
+        self.segments = []
+        self.streamed_bytes = 0
+
+    async def send_json(self, data):
+        if self.connected:
+            await self.send({'type': 'websocket.send', 'text': json.dumps(data)})
+
+    async def close(self, code, error=None):
+        if error:
+            await self.send_json({'type': 'error', 'error': error})
+        if self.connected:
+            await self.send({'type': 'websocket.close', 'code': code})
+            self.connected = False
+
+    async def run(self):
+        message = await self.receive()
+        if message['type'] != 'websocket.connect':
+            return
+        await self.send({'type': 'websocket.accept'})
+
+        user = await sync_to_async(authenticate_scope)(self.scope)
+        if user is None:
+            return await self.close(CLOSE_UNAUTHORIZED, 'Authentication credentials were not provided.')
+
+        if not sessions.acquire():
+            return await self.close(CLOSE_TRY_AGAIN_LATER, 'Too many live sessions. Please try again shortly.')
+        try:
+            await self.transcribe(user)
+        finally:
+            sessions.release()
+
+    async def transcribe(self, user):
+        params = parse_qs(self.scope.get('query_string', b'').decode())
+        language = params.get('language', ['auto'])[0]
+        sample_rate = params.get('sample_rate', [settings.LIVE_DEFAULT_SAMPLE_RATE])[0]
+        try:
+            self.session = await sync_to_async(LiveTranscriptionService.start_session)(user, language, sample_rate)
+        except ValueError as e:
+            return await self.close(CLOSE_BAD_REQUEST, str(e))
+
+        stream = await get_streaming_engine().open(
+            self.session.sample_rate, TranscriptionService.get_language_code(language)
+        )
+        await self.send_json({'type': 'session', 'id': str(self.session.id)})
+
+        frames = asyncio.Queue(maxsize=settings.LIVE_MAX_BUFFERED_FRAMES)
+        error = None
+        try:
+            async with asyncio.TaskGroup() as tasks:
+                tasks.create_task(self.read_frames(frames))
+                tasks.create_task(self.feed_engine(frames, stream))
+                tasks.create_task(self.forward_results(stream))
+        except* SessionClosed as group:
+            error = group.exceptions[0]
+        except* Exception as group:
+            logger.error(f"Live session {self.session.id} failed", exc_info=group.exceptions[0])
+            error = SessionClosed(CLOSE_INTERNAL_ERROR, 'Live transcription failed.')
+        finally:
+            await stream.aclose()
+
+        text = ' '.join(self.segments)
+        self.session = await sync_to_async(LiveTranscriptionService.finish_session)(
+            self.session.id, text, error.error if error else None
+        )
+        if error:
+            return await self.close(error.code, error.error)
+
+        await self.send_json({
+            'type': 'completed',
+            'id': str(self.session.id),
+            'text': text,
+            'seconds': self.session.seconds_billed,
+            'cost': float(self.session.cost),
+        })
+        await self.close(CLOSE_NORMAL)
+
+    async def read_frames(self, frames):
+        """Queue audio until the client stops or disconnects; None marks the end"""
+        while True:
+            message = await self.receive()
+            if message['type'] == 'websocket.disconnect':
+                self.connected = False
+                break
+            if message.get('bytes') is not None:
+                if len(message['bytes']) > settings.LIVE_MAX_FRAME_BYTES:
+                    raise SessionClosed(CLOSE_TOO_BIG, 'Audio frame too large.')
+                await frames.put(message['bytes'])
+                continue
+            try:
+                control = json.loads(message.get('text') or '{}')
+            except json.JSONDecodeError:
+                control = {}
+            if control.get('type') == 'stop':
+                break
+        await frames.put(None)
+
+    async def feed_engine(self, frames, stream):
+        """Send queued audio to the engine, charging the wallet every LIVE_BILLING_INTERVAL seconds"""
+        sample_rate = self.session.sample_rate
+        billed_seconds = 0
+        while (chunk := await frames.get()) is not None:
+            await stream.send(chunk)
+            self.streamed_bytes += len(chunk)
+            seconds = LiveTranscriptionService.audio_seconds(self.streamed_bytes, sample_rate)
+            if seconds - billed_seconds >= settings.LIVE_BILLING_INTERVAL:
+                billed_seconds = int(seconds)
+                await self.bill(billed_seconds)
+
+        await self.bill(LiveTranscriptionService.audio_seconds(self.streamed_bytes, sample_rate))
+        await stream.finish()
+
+    async def bill(self, seconds):
+        try:
+            await sync_to_async(LiveTranscriptionService.bill)(self.session.id, seconds)
+        except ValueError as e:
+            raise SessionClosed(CLOSE_PAYMENT_REQUIRED, str(e))
+
+    async def forward_results(self, stream):
+        async for result in stream.results():
+            if result['type'] == 'final':
+                self.segments.append(result['text'])
+            await self.send_json(result)
+
+
+async def live_transcription(scope, receive, send):
+    """ASGI application for WebSocket connections"""
+    if scope['path'] != LIVE_PATH:
+        # Closing before accepting rejects the handshake with 403
+        await receive()
+        await send({'type': 'websocket.close', 'code': CLOSE_NORMAL})
+        return
+    await LiveTranscriptionSocket(scope, receive, send).run()
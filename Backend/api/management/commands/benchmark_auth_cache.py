@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from api.models import User
+from api.services import AuthService
+from api.utils.cookie_auth import invalidate_cached_user
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare database queries and time per SPA session (the reads a page '
+        'load makes after login) with the authenticated-user cache off and on. '
+        'Runs in-process against the configured database and cache as an '
+        'existing user; nothing is written except a fresh access token.'
+    )
+
+    # Requests a typical SPA page load makes after login
+    SESSION = ['current-user', 'wallet-details', 'transaction-list', 'transcription-list']
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help='Email of the user to replay sessions as')
+        parser.add_argument(
+            '--sessions',
+            type=int,
+            default=50,
+            help='Sessions replayed per run (default: 50)',
+        )
+        parser.add_argument(
+            '--cache-timeout',
+            type=int,
+            default=60,
+            help='AUTH_USER_CACHE_TIMEOUT for the cached run (default: 60)',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(email=options['email']).first()
+        if user is None:
+            raise CommandError(f"No user with email {options['email']}")
+
+        client = Client()
+        client.cookies['access_token'] = AuthService.generate_tokens(user)['access']
+
+        self.stdout.write(f"{'user cache':<11} {'queries/session':>16} {'ms/session':>11}")
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for label, timeout in (('off', 0), ('on', options['cache_timeout'])):
+                queries, ms = self.run(client, user, timeout, options['sessions'])
+                results[label] = queries
+                self.stdout.write(f"{label:<11} {queries:>16.1f} {ms:>11.1f}")
+
+        saved = results['off'] - results['on']
+        self.stdout.write(self.style.SUCCESS(f"✓ The user cache saves {saved:.1f} queries per session"))
+
+    def run(self, client, user, timeout, sessions):
+        """Average (queries, milliseconds) per session, after one warm-up session"""
+        with override_settings(AUTH_USER_CACHE_TIMEOUT=timeout):
+            invalidate_cached_user(user.id)
+            self.replay(client)
+
+            queries = 0
+            started = time.perf_counter()
+            for _ in range(sessions):
+                with CaptureQueriesContext(connection) as ctx:
+                    self.replay(client)
+                queries += len(ctx.captured_queries)
+            elapsed = time.perf_counter() - started
+
+        return queries / sessions, elapsed * 1000 / sessions
+
+    def replay(self, client):
+        for name in self.SESSION:
+            response = client.get(reverse(name))
+            if response.status_code != 200:
+                raise CommandError(f"{name} answered {response.status_code}")
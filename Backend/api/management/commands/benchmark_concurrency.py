@@ -0,0 +1,95 @@
+from django.core.management.base import BaseCommand, CommandError
+import time
+import asyncio
+import statistics
+import httpx
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare how many concurrent connections one worker serves on the sync '
+        'and async request paths. Start one single-worker server per path, e.g.\n'
+        '  gunicorn AudioText.wsgi -w 1 --threads 8 -b :8001\n'
+        '  uvicorn AudioText.asgi:application --workers 1 --port 8002\n'
+        'then point --sync-url and --async-url at the same endpoint on each '
+        '(/api/transcriptions/<id>/ and /api/async/transcriptions/<id>/).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sync-url', required=True, help='Endpoint URL on the WSGI (sync) server')
+        parser.add_argument('--async-url', required=True, help='Same endpoint on the ASGI (async) server')
+        parser.add_argument(
+            '--access-token',
+            default='',
+            help='JWT access token sent as the access_token cookie',
+        )
+        parser.add_argument(
+            '--concurrency',
+            default='10,50,100,200',
+            help='Comma-separated numbers of simultaneous connections to test (default: 10,50,100,200)',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Requests sent at each concurrency level (default: 500)',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=30.0,
+            help='Seconds before a request counts as failed (default: 30)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError('--concurrency must be a comma-separated list of integers')
+
+        cookies = {'access_token': options['access_token']} if options['access_token'] else {}
+
+        self.stdout.write(f"{'path':<6} {'conns':>6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for level in levels:
+            for label, url in (('sync', options['sync_url']), ('async', options['async_url'])):
+                result = asyncio.run(
+                    self.run_level(url, level, options['requests'], options['timeout'], cookies)
+                )
+                self.stdout.write(
+                    f"{label:<6} {level:>6} {result['throughput']:>9.1f} {result['p50']:>9.1f} "
+                    f"{result['p99']:>9.1f} {result['errors']:>7}"
+                )
+
+    async def run_level(self, url, concurrency, total, timeout, cookies):
+        """Keep `concurrency` requests in flight until `total` have completed"""
+        latencies = []
+        errors = 0
+        remaining = iter(range(total))
+
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(timeout=timeout, limits=limits, cookies=cookies) as client:
+            async def connection():
+                nonlocal errors
+                for _ in remaining:
+                    started = time.perf_counter()
+                    try:
+                        response = await client.get(url)
+                        if response.status_code >= 400:
+                            errors += 1
+                            continue
+                    except httpx.HTTPError:
+                        errors += 1
+                        continue
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            await asyncio.gather(*[connection() for _ in range(concurrency)])
+            elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'throughput': len(latencies) / elapsed,
+            'p50': statistics.median(latencies) if latencies else 0,
+            'p99': latencies[int(len(latencies) * 0.99) - 1] if latencies else 0,
+            'errors': errors,
+        }
@@ -1,8 +1,17 @@
 from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from datetime import timedelta
-from api.models import AudioFile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from api.models import AudioFile, AudioBlob
+from api.services import StorageService, RetentionService, BlobService
 import os
+import json
+import time
 import logging
 
 logger = logging.getLogger('api')
@@ -10,7 +19,7 @@ logger = logging.getLogger('api')
 
 class Command(BaseCommand):
     help = 'Clean up old audio files and transcriptions'
-    
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--days',
@@ -23,54 +32,218 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be deleted without actually deleting',
         )
-    
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows to process per batch (default: 500)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Threads deleting storage objects concurrently (default: 8)',
+        )
+        parser.add_argument(
+            '--time-budget',
+            type=float,
+            default=None,
+            help='Stop after this many seconds; the next run resumes from the checkpoint',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Seconds to pause between batches to limit load (default: 0)',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=os.path.join(settings.LOGS_DIR, 'cleanup_old_files.checkpoint.json'),
+            help='File recording progress so an interrupted run can resume',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore any saved checkpoint and start a new run',
+        )
+
     def handle(self, *args, **options):
-        days = options['days']
         dry_run = options['dry_run']
-        
-        cutoff_date = timezone.now() - timedelta(days=days)
-        
-        # Find old audio files
-        old_audio_files = AudioFile.objects.filter(uploaded_at__lt=cutoff_date)
-        
-        self.stdout.write(f"\nFound {old_audio_files.count()} audio files older than {days} days")
-        
+        batch_size = options['batch_size']
+        checkpoint_path = options['checkpoint']
+        time_budget = options['time_budget']
+
+        checkpoint = None if options['restart'] or dry_run else self.load_checkpoint(checkpoint_path)
+        if checkpoint:
+            cutoff_date = parse_datetime(checkpoint['cutoff'])
+            position = (parse_datetime(checkpoint['uploaded_at']), checkpoint['id']) if checkpoint['id'] else None
+            self.stdout.write(f"\nResuming cleanup from checkpoint (cutoff {cutoff_date.isoformat()})")
+        else:
+            cutoff_date = timezone.now() - timedelta(days=options['days'])
+            position = None
+            self.stdout.write(f"\nCleaning up audio files older than {options['days']} days")
+
+        started = time.monotonic()
         deleted_count = 0
         failed_count = 0
         freed_space = 0
-        
-        for audio_file in old_audio_files:
-            file_path = audio_file.file_path
-            file_size = audio_file.size
-            
-            if dry_run:
-                self.stdout.write(f"[DRY RUN] Would delete: {audio_file.filename} ({file_size} bytes)")
-                continue
-            
-            try:
-                # Delete physical file
-                from django.conf import settings
-                full_path = os.path.join(settings.MEDIA_ROOT, file_path)
-                if os.path.exists(full_path):
-                    os.remove(full_path)
-                    freed_space += file_size
-                
-                # Delete database record (cascades to transcriptions)
-                audio_file.delete()
-                deleted_count += 1
-                
-                logger.info(f"Deleted old file: {audio_file.filename}")
-                
-            except Exception as e:
-                failed_count += 1
-                logger.error(f"Failed to delete {audio_file.filename}: {e}")
-                self.stdout.write(self.style.ERROR(f"Failed to delete {audio_file.filename}: {e}"))
-        
+        scanned = 0
+        budget_exhausted = False
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                batch = self.next_batch(cutoff_date, position, batch_size)
+                if not batch:
+                    break
+
+                scanned += len(batch)
+                position = (batch[-1]['uploaded_at'], str(batch[-1]['id']))
+
+                if dry_run:
+                    for row in batch:
+                        self.stdout.write(f"[DRY RUN] Would delete: {row['filename']} ({row['size']} bytes)")
+                    continue
+
+                deleted, failed, freed = self.delete_batch(pool, batch)
+                deleted_count += deleted
+                failed_count += failed
+                freed_space += freed
+
+                self.save_checkpoint(checkpoint_path, cutoff_date, position)
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"Batch done: {deleted_count} deleted, {failed_count} failed, "
+                    f"{deleted_count / elapsed:.1f} files/s, {freed_space / (1024*1024) / elapsed:.2f} MB/s"
+                )
+
+                if time_budget is not None and elapsed >= time_budget:
+                    budget_exhausted = True
+                    break
+
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+
+        elapsed = time.monotonic() - started
+
         if dry_run:
-            self.stdout.write(self.style.WARNING(f"\n[DRY RUN] No files were actually deleted"))
+            self.stdout.write(self.style.WARNING(f"\n[DRY RUN] {scanned} files would be deleted. No files were actually deleted"))
+            return
+
+        if budget_exhausted:
+            self.stdout.write(self.style.WARNING(f"\n⚠ Time budget of {time_budget}s reached - run again to resume"))
         else:
-            self.stdout.write(self.style.SUCCESS(f"\n✓ Successfully deleted {deleted_count} files"))
-            self.stdout.write(self.style.SUCCESS(f"✓ Freed {freed_space / (1024*1024):.2f} MB of storage"))
-            
-            if failed_count > 0:
-                self.stdout.write(self.style.WARNING(f"⚠ Failed to delete {failed_count} files"))
+            self.clear_checkpoint(checkpoint_path)
+
+        self.stdout.write(self.style.SUCCESS(f"\n✓ Successfully deleted {deleted_count} files in {elapsed:.1f}s"))
+        self.stdout.write(self.style.SUCCESS(f"✓ Freed {freed_space / (1024*1024):.2f} MB of storage"))
+        if elapsed > 0:
+            self.stdout.write(f"Throughput: {deleted_count / elapsed:.1f} files/s, {freed_space / (1024*1024) / elapsed:.2f} MB/s")
+
+        if failed_count > 0:
+            self.stdout.write(self.style.WARNING(f"⚠ Failed to delete {failed_count} files"))
+
+    def next_batch(self, cutoff_date, position, batch_size):
+        """Next rows in (uploaded_at, id) order after position - keyset pagination, no OFFSET"""
+        queryset = AudioFile.objects.filter(uploaded_at__lt=cutoff_date)
+        if position:
+            uploaded_at, last_id = position
+            queryset = queryset.filter(
+                Q(uploaded_at__gt=uploaded_at) | Q(uploaded_at=uploaded_at, id__gt=last_id)
+            )
+        return list(
+            queryset.order_by('uploaded_at', 'id')
+            .values('id', 'user_id', 'filename', 'file_path', 'blob_id', 'size', 'storage_state', 'uploaded_at')[:batch_size]
+        )
+
+    def delete_batch(self, pool, batch):
+        """
+        Delete storage objects concurrently, then remove the rows whose files
+        are gone with one bulk delete (cascading to transcriptions). Rows that
+        share a blob only drop their reference; blobs left without references
+        are collected concurrently afterwards. Quota is returned only for rows
+        still hot when locked for the delete.
+        Returns (deleted, failed, freed_bytes).
+        """
+        def delete_object(row):
+            try:
+                if row['storage_state'] == 'hot' and not row['blob_id']:
+                    StorageService.delete(row['file_path'])
+                return row, None
+            except Exception as e:
+                return row, e
+
+        removed = []
+        failed = 0
+        for row, error in pool.map(delete_object, batch):
+            if error is None:
+                removed.append(row)
+            else:
+                failed += 1
+                logger.error(f"Failed to delete {row['filename']}: {error}")
+                self.stdout.write(self.style.ERROR(f"Failed to delete {row['filename']}: {error}"))
+
+        freed_by_user = defaultdict(int)
+        if removed:
+            ids = [row['id'] for row in removed]
+            with transaction.atomic():
+                # Blob references and storage state as the locked rows hold
+                # them: an eviction since the batch was read may already have
+                # dropped the reference and returned the quota
+                locked = list(
+                    AudioFile.objects.select_for_update().filter(id__in=ids)
+                    .values('user_id', 'blob_id', 'size', 'storage_state')
+                )
+                AudioFile.objects.filter(id__in=ids).delete()
+                BlobService.release_all(row['blob_id'] for row in locked)
+                for row in locked:
+                    if row['storage_state'] == 'hot':
+                        freed_by_user[row['user_id']] += row['size']
+                for user_id, freed in freed_by_user.items():
+                    RetentionService.release(user_id, freed)
+            self.collect_blobs(pool, {row['blob_id'] for row in locked if row['blob_id']})
+            logger.info(f"Deleted {len(removed)} old audio files")
+
+        return len(removed), failed, sum(freed_by_user.values())
+
+    def collect_blobs(self, pool, blob_ids):
+        """Delete the objects of blobs that lost their last reference, then their rows"""
+        def delete_blob(blob):
+            try:
+                StorageService.delete(blob.file_path)
+                return blob, None
+            except Exception as e:
+                return blob, e
+
+        collected = []
+        for blob, error in pool.map(delete_blob, BlobService.claim_unreferenced(blob_ids)):
+            if error is None:
+                collected.append(blob.id)
+            else:
+                # Left COLLECTING so BlobService.collect_garbage retries it
+                logger.error(f"Failed to delete audio blob {blob.sha256}: {error}")
+
+        if collected:
+            AudioBlob.objects.filter(id__in=collected).delete()
+
+    def load_checkpoint(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save_checkpoint(self, path, cutoff_date, position):
+        # Write then rename so a crash never leaves a truncated checkpoint
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'cutoff': cutoff_date.isoformat(),
+                'uploaded_at': position[0].isoformat(),
+                'id': position[1],
+            }, f)
+        os.replace(tmp_path, path)
+
+    def clear_checkpoint(self, path):
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from api.models import StorageUsage
+from api.services import RetentionService, BlobService
+import logging
+
+logger = logging.getLogger('api')
+
+
+class Command(BaseCommand):
+    help = 'Apply the storage retention policy: evict idle audio and enforce the global quota'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.AUDIO_RETENTION_DAYS,
+            help='Evict audio of completed transcriptions idle for this many days '
+                 f'(default: AUDIO_RETENTION_DAYS={settings.AUDIO_RETENTION_DAYS})',
+        )
+        parser.add_argument(
+            '--recount',
+            action='store_true',
+            help='Rebuild storage usage counters from the audio table first',
+        )
+    
+    def handle(self, *args, **options):
+        if options['recount']:
+            usage = RetentionService.recount()
+            self.stdout.write(f"Recounted storage usage for {len(usage) - 1} users")
+        
+        freed = RetentionService.evict_idle(options['days'])
+        self.stdout.write(f"Evicted {freed / (1024*1024):.2f} MB of audio idle for {options['days']}+ days")
+        
+        quota = settings.STORAGE_QUOTA_GLOBAL
+        if quota is not None:
+            used, _ = StorageUsage.objects.get_or_create(key=StorageUsage.GLOBAL_KEY)
+            if used.bytes_used > quota:
+                over_quota = RetentionService.evict_lru(used.bytes_used - quota)
+                freed += over_quota
+                self.stdout.write(f"Evicted {over_quota / (1024*1024):.2f} MB to get under the global quota")
+        
+        collected = BlobService.collect_garbage()
+        if collected:
+            self.stdout.write(f"Collected {collected / (1024*1024):.2f} MB of unreferenced audio blobs")
+        
+        logger.info(f"Retention run evicted {freed} bytes")
+        self.stdout.write(self.style.SUCCESS(f"\n✓ Freed {freed / (1024*1024):.2f} MB of storage"))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from api.services import PaymentService
+import time
+import logging
+
+logger = logging.getLogger('api')
+
+
+class Command(BaseCommand):
+    help = 'Credit wallets for Razorpay webhook events waiting in the inbox'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Events to claim per batch (default: PAYMENT_WEBHOOK_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the inbox instead of exiting once it is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to sleep between polls when the inbox is empty (default: 2)',
+        )
+    
+    def handle(self, *args, **options):
+        payment_service = PaymentService()
+        total = 0
+        
+        while True:
+            processed = payment_service.process_webhook_events(options['batch_size'])
+            total += processed
+            
+            if processed:
+                logger.info(f"Processed {processed} payment webhook events")
+                continue
+            
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        
+        self.stdout.write(self.style.SUCCESS(f"✓ Processed {total} payment webhook events"))
@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from api.services import LeaseService, TranscriptionService
+import time
+import signal
+import logging
+
+logger = logging.getLogger('api')
+
+
+class HandBack(BaseException):
+    """Raised by a second shutdown signal to abandon the job in progress"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Process queued transcriptions and requeue the ones whose worker died '
+        '(expired lease). SIGTERM/SIGINT drains: the job in progress finishes, '
+        'then the worker exits. A second signal hands the job back to the queue.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling for new jobs',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to sleep between polls when the queue is empty (default: 5)',
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        self.busy = False
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+
+        processed = 0
+        while not self.stopping:
+            LeaseService.reap()
+
+            transcription = LeaseService.next_pending()
+            if transcription is None:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            owner = LeaseService.new_owner()
+            self.busy = True
+            try:
+                TranscriptionService.process_transcription(transcription, owner)
+            except HandBack:
+                LeaseService.release(transcription.id, owner)
+                break
+            except Exception:
+                # Recorded on the transcription by the service
+                pass
+            finally:
+                self.busy = False
+            processed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"✓ Processed {processed} transcriptions"))
+
+    def request_stop(self, signum, frame):
+        if self.stopping and self.busy:
+            raise HandBack()
+
+        self.stopping = True
+        if self.busy:
+            logger.info("Shutdown requested: finishing the current transcription (signal again to hand it back)")
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.services.profiler_service import ProfilerService, PROFILE_HEADER
+
+
+class Command(BaseCommand):
+    help = 'Print a signed header that makes requests carrying it get profiled (see the Profile reports admin)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age',
+            type=int,
+            default=None,
+            help='Seconds the token stays valid (default: PROFILER_TOKEN_MAX_AGE)',
+        )
+
+    def handle(self, *args, **options):
+        max_age = options['max_age'] or settings.PROFILER_TOKEN_MAX_AGE
+        token = ProfilerService.issue_token(max_age)
+        self.stdout.write(f"{PROFILE_HEADER}: {token}")
+        self.stdout.write(self.style.SUCCESS(f"✓ Valid for {max_age} seconds"))
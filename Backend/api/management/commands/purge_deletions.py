@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from api.services import DeletionService
+import time
+import logging
+
+logger = logging.getLogger('api')
+
+
+class Command(BaseCommand):
+    help = 'Remove storage and rows of soft-deleted audio files and transcriptions'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Rows to purge per batch (default: DELETION_PURGE_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new deletions instead of exiting once none are left',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to sleep between polls when nothing is left (default: 5)',
+        )
+    
+    def handle(self, *args, **options):
+        total = 0
+        
+        while True:
+            removed = DeletionService.purge(options['batch_size'])
+            total += removed
+            
+            if removed:
+                logger.info(f"Purged {removed} deleted items")
+                continue
+            
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        
+        self.stdout.write(self.style.SUCCESS(f"✓ Purged {total} deleted items"))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from api.services import EmailService
+import time
+import logging
+
+logger = logging.getLogger('api')
+
+
+class Command(BaseCommand):
+    help = 'Send emails waiting in the outbox, one SMTP connection per batch'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Emails to claim per batch (default: EMAIL_OUTBOX_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the outbox instead of exiting once it is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to sleep between polls when the outbox is empty (default: 5)',
+        )
+    
+    def handle(self, *args, **options):
+        total = 0
+        
+        while True:
+            handled = EmailService.send_pending(options['batch_size'])
+            total += handled
+            
+            if handled:
+                logger.info(f"Handled {handled} outbox emails")
+                continue
+            
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        
+        self.stdout.write(self.style.SUCCESS(f"✓ Handled {total} outbox emails"))
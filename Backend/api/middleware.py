@@ -0,0 +1,163 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from opentelemetry import propagate
+from opentelemetry.trace import SpanKind
+from django.conf import settings
+from .utils.metrics import REQUEST_LATENCY, DB_QUERIES
+from .utils.query_count import QueryStats
+from .utils.tracing import tracer
+from .services.profiler_service import ProfilerService
+
+
+def view_name(request):
+    """Route the request resolved to; keeps metric and span names bounded"""
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unmatched'
+
+
+class HybridMiddleware:
+    """Base for middleware that runs natively under both WSGI and ASGI"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """
+    Records the latency of every request by view name, so the histogram has
+    one series per route rather than per URL.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, start)
+        return response
+
+    @staticmethod
+    def observe(request, response, start):
+        REQUEST_LATENCY.labels(view_name(request), request.method, response.status_code).observe(
+            time.perf_counter() - start
+        )
+
+
+class TracingMiddleware(HybridMiddleware):
+    """
+    Opens the server span of each request, continuing the caller's trace
+    when it sends a traceparent header. Spans opened by the services while
+    the request runs become its children.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with self.start_span(request) as span:
+            response = self.get_response(request)
+            self.finish_span(span, request, response)
+        return response
+
+    async def __acall__(self, request):
+        with self.start_span(request) as span:
+            response = await self.get_response(request)
+            self.finish_span(span, request, response)
+        return response
+
+    @staticmethod
+    def start_span(request):
+        return tracer.start_as_current_span(
+            request.method,
+            context=propagate.extract(request.headers),
+            kind=SpanKind.SERVER,
+            attributes={'http.request.method': request.method, 'url.path': request.path},
+        )
+
+    @staticmethod
+    def finish_span(span, request, response):
+        route = view_name(request)
+        span.update_name(f"{request.method} {route}")
+        span.set_attribute('http.route', route)
+        span.set_attribute('http.response.status_code', response.status_code)
+
+
+class ProfilerMiddleware(HybridMiddleware):
+    """
+    Profiles requests chosen by ProfilerService (signed header or sample)
+    with cProfile and stores the report; its id is returned in the
+    X-Profile-Id header. Under ASGI the event loop and the executor thread
+    running the request's sync views are both profiled, so the report also
+    covers whatever else the loop ran during the request.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        profile = ProfilerService.begin(request)
+        if profile is None:
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.stop()
+        return self.attach(response, ProfilerService.save(profile, request, response, view_name(request)))
+
+    async def __acall__(self, request):
+        profile = ProfilerService.begin(request)
+        if profile is None:
+            return await self.get_response(request)
+        try:
+            # Sync views run on this request's thread-sensitive executor thread
+            await sync_to_async(profile.start_thread)()
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(profile.stop_thread)()
+            profile.stop()
+        report = await sync_to_async(ProfilerService.save)(profile, request, response, view_name(request))
+        return self.attach(response, report)
+
+    @staticmethod
+    def attach(response, report):
+        if report is not None:
+            response['X-Profile-Id'] = str(report.id)
+        return response
+
+
+class QueryCountMiddleware(HybridMiddleware):
+    """
+    Counts the SQL queries (and their time) each request runs, feeds the
+    per-view histogram and, with QUERY_COUNT_HEADERS on, reports them in
+    X-DB-Query-Count and X-DB-Query-Time-Ms. Queries run while a streaming
+    response is consumed are not included.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with QueryStats() as stats:
+            response = self.get_response(request)
+        return self.report(request, response, stats)
+
+    async def __acall__(self, request):
+        with QueryStats() as stats:
+            response = await self.get_response(request)
+        return self.report(request, response, stats)
+
+    @staticmethod
+    def report(request, response, stats):
+        DB_QUERIES.labels(view_name(request)).observe(stats.count)
+        if settings.QUERY_COUNT_HEADERS:
+            response['X-DB-Query-Count'] = str(stats.count)
+            response['X-DB-Query-Time-Ms'] = str(stats.ms)
+        return response
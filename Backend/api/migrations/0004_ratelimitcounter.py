@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-19 09:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_contactmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitCounter',
+            fields=[
+                ('key', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('window', models.BigIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('previous_count', models.PositiveIntegerField(default=0)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'rate_limit_counters',
+                'indexes': [models.Index(fields=['expires_at'], name='rate_limit__expires_3e89ae_idx')],
+            },
+        ),
+    ]
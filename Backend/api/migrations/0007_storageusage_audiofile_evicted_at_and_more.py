@@ -0,0 +1,60 @@
+# Generated by Django 5.2.9 on 2026-10-19 09:59
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def seed_storage_usage(apps, schema_editor):
+    """Count existing audio towards quotas and start LRU order at upload time"""
+    AudioFile = apps.get_model('api', 'AudioFile')
+    StorageUsage = apps.get_model('api', 'StorageUsage')
+    
+    AudioFile.objects.update(last_accessed_at=F('uploaded_at'))
+    
+    total = 0
+    for row in AudioFile.objects.values('user_id').annotate(bytes_used=Sum('size')):
+        StorageUsage.objects.create(key=str(row['user_id']), bytes_used=row['bytes_used'])
+        total += row['bytes_used']
+    StorageUsage.objects.create(key='global', bytes_used=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageUsage',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('bytes_used', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'storage_usage',
+            },
+        ),
+        migrations.AddField(
+            model_name='audiofile',
+            name='evicted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='audiofile',
+            name='last_accessed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='audiofile',
+            name='storage_state',
+            field=models.CharField(choices=[('hot', 'Hot'), ('evicted', 'Evicted'), ('deleted', 'Deleted')], default='hot', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='audiofile',
+            index=models.Index(fields=['storage_state', 'last_accessed_at'], name='audio_files_storage_319a4a_idx'),
+        ),
+        migrations.RunPython(seed_storage_usage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:02
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_storageusage_audiofile_evicted_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioBlob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('sha256', models.CharField(max_length=64)),
+                ('file_path', models.CharField(max_length=500)),
+                ('size', models.BigIntegerField()),
+                ('ref_count', models.IntegerField(default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'audio_blobs',
+                'indexes': [models.Index(fields=['ref_count'], name='audio_blobs_ref_cou_2251cc_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('ref_count__gte', 0)), fields=('sha256',), name='unique_live_audio_blob')],
+            },
+        ),
+        migrations.AddField(
+            model_name='audiofile',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='audio_files', to='api.audioblob'),
+        ),
+    ]
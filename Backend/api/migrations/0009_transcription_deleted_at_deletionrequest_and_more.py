@@ -0,0 +1,60 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:06
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_audioblob_audiofile_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcription',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='DeletionRequest',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('audio', 'Audio Files'), ('transcription', 'Transcriptions')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed')], default='pending', max_length=20)),
+                ('requested_count', models.IntegerField(default=0)),
+                ('deleted_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deletion_requests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'deletion_requests',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='audiofile',
+            name='deletion_request',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='audio_files', to='api.deletionrequest'),
+        ),
+        migrations.AddField(
+            model_name='transcription',
+            name='deletion_request',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transcriptions', to='api.deletionrequest'),
+        ),
+        migrations.AddIndex(
+            model_name='transcription',
+            index=models.Index(fields=['deleted_at'], name='transcripti_deleted_cec5c6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deletionrequest',
+            index=models.Index(fields=['user', '-created_at'], name='deletion_re_user_id_b84c1f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deletionrequest',
+            index=models.Index(fields=['status'], name='deletion_re_status_799845_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:19
+
+import django.db.models.deletion
+import uuid
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_transcription_deleted_at_deletionrequest_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LiveSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('language', models.CharField(choices=[('auto', 'Auto Detect'), ('english', 'English'), ('hindi', 'Hindi')], max_length=20)),
+                ('sample_rate', models.IntegerField()),
+                ('status', models.CharField(choices=[('active', 'Active'), ('completed', 'Completed'), ('failed', 'Failed')], default='active', max_length=20)),
+                ('text', models.TextField(blank=True)),
+                ('seconds_billed', models.IntegerField(default=0)),
+                ('cost', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('ended_at', models.DateTimeField(blank=True, null=True)),
+                ('transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='live_sessions', to='api.transaction')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='live_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'live_sessions',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at'], name='live_sessio_user_id_4a38eb_idx'), models.Index(fields=['status'], name='live_sessio_status_8737bd_idx')],
+            },
+        ),
+    ]
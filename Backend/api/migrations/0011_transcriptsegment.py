@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:23
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_livesession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptSegment',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('position', models.IntegerField()),
+                ('start', models.FloatField()),
+                ('end', models.FloatField()),
+                ('text', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('transcription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='api.transcription')),
+            ],
+            options={
+                'db_table': 'transcript_segments',
+                'ordering': ['position'],
+                'constraints': [models.UniqueConstraint(fields=('transcription', 'position'), name='unique_segment_position')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_transcriptsegment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcription',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='transcription',
+            name='charge',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transcription', to='api.transaction'),
+        ),
+        migrations.AddField(
+            model_name='transcription',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transcription',
+            name='lease_owner',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='transcription',
+            index=models.Index(fields=['status', 'lease_expires_at'], name='transcripti_status_ce0162_idx'),
+        ),
+    ]
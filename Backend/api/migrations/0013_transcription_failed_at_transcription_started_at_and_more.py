@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_transcription_attempts_transcription_charge_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcription',
+            name='failed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transcription',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transcription',
+            name='status_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
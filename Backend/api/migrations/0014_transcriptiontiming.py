@@ -0,0 +1,38 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_transcription_failed_at_transcription_started_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptionTiming',
+            fields=[
+                ('transcription_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('status', models.CharField(max_length=20)),
+                ('language', models.CharField(max_length=20)),
+                ('format', models.CharField(max_length=10)),
+                ('file_size', models.BigIntegerField()),
+                ('audio_seconds', models.FloatField()),
+                ('bytes_sent', models.BigIntegerField(default=0)),
+                ('queue_ms', models.PositiveIntegerField(default=0)),
+                ('upload_ms', models.PositiveIntegerField(default=0)),
+                ('engine_ms', models.PositiveIntegerField(default=0)),
+                ('billing_ms', models.PositiveIntegerField(default=0)),
+                ('total_ms', models.PositiveIntegerField(default=0)),
+                ('realtime_factor', models.FloatField(blank=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=1)),
+                ('recorded_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'transcription_timings',
+                'ordering': ['-recorded_at'],
+                'indexes': [models.Index(fields=['recorded_at'], name='transcripti_recorde_f7ee44_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_transcriptiontiming'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcription',
+            name='trace_context',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
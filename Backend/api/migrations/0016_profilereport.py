@@ -0,0 +1,35 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:37
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_transcription_trace_context'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileReport',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=500)),
+                ('view_name', models.CharField(max_length=200)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('trigger', models.CharField(choices=[('sampled', 'Sampled'), ('header', 'Signed header')], max_length=10)),
+                ('wall_ms', models.PositiveIntegerField()),
+                ('cpu_ms', models.PositiveIntegerField()),
+                ('stats', models.TextField()),
+                ('profile', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'profile_reports',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at'], name='profile_rep_created_e4f205_idx')],
+            },
+        ),
+    ]
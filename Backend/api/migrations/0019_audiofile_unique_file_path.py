@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-19 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_idempotencykey_request_hash'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='audiofile',
+            constraint=models.UniqueConstraint(condition=models.Q(('file_path', ''), _negated=True), fields=('file_path',), name='unique_audio_file_path'),
+        ),
+    ]
@@ -1,7 +1,9 @@
 import uuid
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.core.validators import MinValueValidator
+from django.core.serializers.json import DjangoJSONEncoder
 from decimal import Decimal
 
 
@@ -132,23 +134,85 @@ class Transaction(models.Model):
         return f"{self.type} - {self.amount} - {self.created_at}"
 
 
+class AudioBlob(models.Model):
+    """
+    Audio content stored once per distinct SHA-256 digest and shared by every
+    AudioFile with identical bytes. ref_count is the number of hot AudioFiles
+    pointing at the blob; a negative count marks a blob being collected.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    sha256 = models.CharField(max_length=64)
+    file_path = models.CharField(max_length=500)
+    size = models.BigIntegerField()  # in bytes
+    ref_count = models.IntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'audio_blobs'
+        constraints = [
+            # Only one live blob per digest; blobs being collected may linger
+            models.UniqueConstraint(
+                fields=['sha256'],
+                condition=models.Q(ref_count__gte=0),
+                name='unique_live_audio_blob',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['ref_count']),
+        ]
+    
+    def __str__(self):
+        return f"{self.sha256} ({self.ref_count} refs)"
+
+
 class AudioFile(models.Model):
+    STORAGE_STATE_CHOICES = [
+        ('hot', 'Hot'),  # audio is in storage and counts towards quotas
+        ('evicted', 'Evicted'),  # audio removed by retention policy, transcripts kept
+        ('deleted', 'Deleted'),  # soft-deleted, waiting for the purger
+    ]
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='audio_files')
     filename = models.CharField(max_length=255)
+    # Own file of audio stored before blobs, or a direct upload's name; empty
+    # for server uploads. Read the bytes through storage_path.
     file_path = models.CharField(max_length=500)
+    blob = models.ForeignKey(
+        AudioBlob, on_delete=models.PROTECT, related_name='audio_files', null=True, blank=True
+    )
     duration = models.DecimalField(max_digits=6, decimal_places=2)  # in minutes
     size = models.BigIntegerField()  # in bytes
     format = models.CharField(max_length=10)
+    storage_state = models.CharField(max_length=10, choices=STORAGE_STATE_CHOICES, default='hot')
+    last_accessed_at = models.DateTimeField(default=timezone.now)
+    evicted_at = models.DateTimeField(null=True, blank=True)
+    deletion_request = models.ForeignKey(
+        'DeletionRequest', on_delete=models.SET_NULL, related_name='audio_files', null=True, blank=True
+    )
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         db_table = 'audio_files'
         ordering = ['-uploaded_at']
+        constraints = [
+            # One row per direct upload, however often it is finalized
+            models.UniqueConstraint(
+                fields=['file_path'],
+                condition=~models.Q(file_path=''),
+                name='unique_audio_file_path',
+            ),
+        ]
         indexes = [
             models.Index(fields=['user', '-uploaded_at']),
+            models.Index(fields=['storage_state', 'last_accessed_at']),
         ]
     
+    @property
+    def storage_path(self):
+        """Where the audio bytes live: the shared blob, or file_path for files stored before blobs"""
+        return self.blob.file_path if self.blob_id else self.file_path
+    
     def __str__(self):
         return f"{self.filename} - {self.user.email}"
 
@@ -176,6 +240,27 @@ class Transcription(models.Model):
     cost = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     error_message = models.TextField(blank=True, null=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)  # soft-deleted, waiting for the purger
+    deletion_request = models.ForeignKey(
+        'DeletionRequest', on_delete=models.SET_NULL, related_name='transcriptions', null=True, blank=True
+    )
+    # Lease held by the worker processing the job; renewed by its heartbeat,
+    # an expired lease means the worker died and the reaper requeues the job
+    lease_owner = models.CharField(max_length=100, null=True, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    # Debit for the job; set in the same transaction as 'completed' so a
+    # retried job is never charged twice
+    charge = models.OneToOneField(
+        Transaction, on_delete=models.SET_NULL, related_name='transcription', null=True, blank=True
+    )
+    # Stamped by the status transitions (see TranscriptionStateMachine)
+    status_changed_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    failed_at = models.DateTimeField(null=True, blank=True)
+    # W3C trace context of the request that queued the job, so the worker's
+    # spans join the same trace
+    trace_context = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     
@@ -185,12 +270,148 @@ class Transcription(models.Model):
         indexes = [
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['status']),
+            models.Index(fields=['deleted_at']),
+            models.Index(fields=['status', 'lease_expires_at']),
         ]
     
     def __str__(self):
         return f"Transcription {self.id} - {self.status}"
 
 
+class TranscriptSegment(models.Model):
+    """
+    A piece of a transcript persisted as soon as the engine returns it, so
+    readers see a long job's text before it completes. Append-only: later
+    segments get the next position, earlier ones are never rewritten.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    transcription = models.ForeignKey(Transcription, on_delete=models.CASCADE, related_name='segments')
+    position = models.IntegerField()
+    start = models.FloatField()  # seconds into the audio
+    end = models.FloatField()
+    text = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'transcript_segments'
+        ordering = ['position']
+        constraints = [
+            models.UniqueConstraint(fields=['transcription', 'position'], name='unique_segment_position'),
+        ]
+    
+    def __str__(self):
+        return f"Segment {self.position} of {self.transcription_id}"
+
+
+class TranscriptionTiming(models.Model):
+    """
+    Where the time went for one transcription job (its last attempt).
+    Keyed by the transcription id without a foreign key so the numbers
+    outlive purged transcripts; language, format and size are copied in
+    so reports need no joins.
+    """
+    transcription_id = models.UUIDField(primary_key=True)
+    status = models.CharField(max_length=20)
+    language = models.CharField(max_length=20)
+    format = models.CharField(max_length=10)
+    file_size = models.BigIntegerField()  # in bytes
+    audio_seconds = models.FloatField()
+    bytes_sent = models.BigIntegerField(default=0)  # uploaded to the engine
+    queue_ms = models.PositiveIntegerField(default=0)  # created -> picked up by a worker
+    upload_ms = models.PositiveIntegerField(default=0)
+    engine_ms = models.PositiveIntegerField(default=0)
+    billing_ms = models.PositiveIntegerField(default=0)
+    total_ms = models.PositiveIntegerField(default=0)  # picked up -> finished
+    realtime_factor = models.FloatField(null=True, blank=True)  # engine time / audio time
+    attempts = models.PositiveSmallIntegerField(default=1)
+    recorded_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'transcription_timings'
+        ordering = ['-recorded_at']
+        indexes = [
+            models.Index(fields=['recorded_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.transcription_id} - {self.total_ms} ms"
+
+
+class DeletionRequest(models.Model):
+    """
+    A bulk delete: the items are soft-deleted at once and the purger removes
+    their storage and rows in the background. Completed once no item is left.
+    """
+    KIND_CHOICES = [
+        ('audio', 'Audio Files'),
+        ('transcription', 'Transcriptions'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('completed', 'Completed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='deletion_requests')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    requested_count = models.IntegerField(default=0)
+    deleted_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'deletion_requests'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['status']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} deletion - {self.deleted_count}/{self.requested_count}"
+
+
+class LiveSession(models.Model):
+    """
+    A live transcription streamed over the WebSocket endpoint. Billed per
+    streamed second as audio arrives; all charges of a session are folded
+    into one debit transaction.
+    """
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='live_sessions')
+    language = models.CharField(max_length=20, choices=Transcription.LANGUAGE_CHOICES)
+    sample_rate = models.IntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    text = models.TextField(blank=True)
+    seconds_billed = models.IntegerField(default=0)
+    cost = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    transaction = models.ForeignKey(
+        Transaction, on_delete=models.SET_NULL, related_name='live_sessions', null=True, blank=True
+    )
+    error_message = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    ended_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'live_sessions'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['status']),
+        ]
+    
+    def __str__(self):
+        return f"Live session {self.id} - {self.status}"
+
+
 class ContactMessage(models.Model):
     SUBJECT_CHOICES = [
         ('general', 'General Inquiry'),
@@ -229,3 +450,180 @@ class ContactMessage(models.Model):
     
     def __str__(self):
         return f"Contact from {self.name} - {self.subject}"
+
+
+class RateLimitCounter(models.Model):
+    """Sliding-window request counter shared by every worker process"""
+    key = models.CharField(primary_key=True, max_length=255)
+    window = models.BigIntegerField()  # index of the current fixed window
+    count = models.PositiveIntegerField(default=0)
+    previous_count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'rate_limit_counters'
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.key} - {self.count}"
+
+
+class PaymentWebhookEvent(models.Model):
+    """Razorpay webhook inbox - acknowledged on receipt, credited in batches later"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    event_id = models.CharField(max_length=255, unique=True)
+    event = models.CharField(max_length=100)
+    payment_id = models.CharField(max_length=255, null=True, blank=True)
+    order_id = models.CharField(max_length=255, null=True, blank=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    error_message = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'payment_webhook_events'
+        ordering = ['created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['event', 'payment_id'],
+                condition=models.Q(payment_id__isnull=False),
+                name='unique_webhook_event_payment',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.event} - {self.payment_id} - {self.status}"
+
+
+
+class EmailOutbox(models.Model):
+    """
+    Rendered email waiting to be sent. Written in the same transaction as
+    the record it is about; `manage.py send_emails` delivers it.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    template = models.CharField(max_length=100)
+    subject = models.CharField(max_length=255)
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField()  # list of addresses
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    error_message = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'email_outbox'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} - {self.status}"
+
+class IdempotencyKey(models.Model):
+    """First response to a POST sent with an Idempotency-Key header, replayed on retries"""
+    STATUS_CHOICES = [
+        ('in_progress', 'In Progress'),
+        ('completed', 'Completed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    scope = models.CharField(max_length=255)  # "<METHOD> <path>" the key was first used on
+    request_hash = models.CharField(max_length=64, blank=True, default='')  # SHA-256 of that request's body
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    locked_until = models.DateTimeField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'idempotency_keys'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.key} - {self.scope} - {self.status}"
+
+
+class StorageUsage(models.Model):
+    """
+    Bytes of hot audio per user (keyed by user id) plus one 'global' row.
+    Maintained on every upload, eviction and delete so quota checks are O(1).
+    """
+    GLOBAL_KEY = 'global'
+    
+    key = models.CharField(primary_key=True, max_length=64)
+    bytes_used = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'storage_usage'
+    
+    def __str__(self):
+        return f"{self.key} - {self.bytes_used} bytes"
+
+
+class ProfileReport(models.Model):
+    """
+    cProfile of one sampled (or explicitly requested) request. Only the
+    newest PROFILER_MAX_REPORTS are kept.
+    """
+    TRIGGER_CHOICES = [
+        ('sampled', 'Sampled'),
+        ('header', 'Signed header'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200)
+    status_code = models.PositiveSmallIntegerField()
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    wall_ms = models.PositiveIntegerField()
+    cpu_ms = models.PositiveIntegerField()
+    stats = models.TextField()  # pstats listing, by cumulative time
+    profile = models.BinaryField()  # marshalled pstats data, loadable by pstats/snakeviz
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'profile_reports'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.method} {self.path} - {self.wall_ms} ms"
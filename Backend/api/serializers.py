@@ -1,5 +1,7 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import User, Wallet, Transaction, AudioFile, Transcription, ContactMessage
+from .models import User, Wallet, Transaction, AudioFile, Transcription, ContactMessage, DeletionRequest
+from .services.transcription_service import TranscriptionService
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -50,8 +52,8 @@ class AudioFileSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = AudioFile
-        fields = ['id', 'filename', 'duration', 'size', 'format', 'uploaded_at']
-        read_only_fields = ['id', 'uploaded_at']
+        fields = ['id', 'filename', 'duration', 'size', 'format', 'storage_state', 'uploaded_at']
+        read_only_fields = ['id', 'storage_state', 'uploaded_at']
 
 
 class TranscriptionSerializer(serializers.ModelSerializer):
@@ -65,6 +67,19 @@ class TranscriptionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'text', 'cost', 'status', 'error_message', 'created_at', 'completed_at']
 
 
+class TranscriptionDetailSerializer(TranscriptionSerializer):
+    """
+    Single transcription with its progress. While the job runs, `text` is
+    the transcript saved so far and `progress` the percentage of the audio
+    it covers.
+    """
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['text'], data['progress'] = TranscriptionService.get_partial_result(instance)
+        return data
+
+
 class TranscriptionCreateSerializer(serializers.Serializer):
     audio_file_id = serializers.UUIDField()
     language = serializers.ChoiceField(choices=['auto', 'english', 'hindi'])
@@ -100,3 +115,18 @@ class ContactMessageSerializer(serializers.ModelSerializer):
         if value not in valid_subjects:
             raise serializers.ValidationError(f"Invalid subject. Must be one of: {', '.join(valid_subjects)}")
         return value
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=settings.BULK_DELETE_MAX_ITEMS,
+    )
+
+
+class DeletionRequestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DeletionRequest
+        fields = ['id', 'kind', 'status', 'requested_count', 'deleted_count', 'created_at', 'completed_at']
+        read_only_fields = fields
@@ -1,13 +1,40 @@
 from .auth_service import AuthService
 from .wallet_service import WalletService
+from .storage_service import StorageService
+from .blob_service import BlobService
+from .retention_service import RetentionService
 from .audio_service import AudioService
+from .transcription_state import TranscriptionStateMachine, InvalidTransition, TransitionLost
+from .lease_service import LeaseService
+from .telemetry_service import TelemetryService
 from .transcription_service import TranscriptionService
+from .deletion_service import DeletionService
+from .live_transcription_service import LiveTranscriptionService
 from .payment_service import PaymentService
+from .identity_service import IdentityService, IdentityTokenError
+from .profiler_service import ProfilerService
+from .email_service import EmailService
+from .health_service import HealthService
 
 __all__ = [
     'AuthService',
     'WalletService',
     'AudioService',
+    'StorageService',
+    'BlobService',
+    'RetentionService',
+    'TranscriptionStateMachine',
+    'InvalidTransition',
+    'TransitionLost',
+    'LeaseService',
+    'TelemetryService',
     'TranscriptionService',
+    'DeletionService',
+    'LiveTranscriptionService',
     'PaymentService',
+    'IdentityService',
+    'IdentityTokenError',
+    'ProfilerService',
+    'EmailService',
+    'HealthService',
 ]
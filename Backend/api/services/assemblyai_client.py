@@ -0,0 +1,91 @@
+import os
+import time
+import asyncio
+import anyio
+import httpx
+from django.conf import settings
+from ..utils.telemetry import PipelineTimer
+from ..utils.metrics import observe_engine
+
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+
+
+class AsyncAssemblyAIClient:
+    """
+    Minimal non-blocking client for the AssemblyAI REST API, used by the
+    async request path so a worker waits on many transcriptions at once
+    instead of parking a thread on each. Mirrors the request the sync SDK
+    path makes (punctuate, format_text, optional language_code).
+    """
+    BASE_URL = 'https://api.assemblyai.com/v2'
+
+    def __init__(self, api_key=None, poll_interval=None, timeout=None, transport=None, max_wait=None):
+        self.api_key = api_key if api_key is not None else settings.ASSEMBLYAI_API_KEY
+        self.poll_interval = poll_interval if poll_interval is not None else settings.ASSEMBLYAI_POLL_INTERVAL
+        self.timeout = timeout if timeout is not None else settings.ASSEMBLYAI_TIMEOUT
+        self.max_wait = max_wait if max_wait is not None else settings.ASSEMBLYAI_MAX_WAIT
+        self.transport = transport
+
+    async def transcribe(self, source, language_code=None, on_progress=None, timer=None, duration=0):
+        """
+        Transcribe a local path, audio bytes or a URL the engine can fetch.
+        Returns the transcript text; raises on an engine error, or
+        TimeoutError when the transcript is not done within max_wait plus
+        ASSEMBLYAI_MAX_WAIT_PER_AUDIO_SECOND per second of `duration`.
+        on_progress, if given, is called with each new stage
+        (uploading, queued, processing). Time spent uploading and waiting on
+        the engine is added to `timer` (a PipelineTimer).
+        """
+        on_progress = on_progress or (lambda stage: None)
+        timer = timer or PipelineTimer()
+        async with httpx.AsyncClient(
+            base_url=self.BASE_URL,
+            headers={'authorization': self.api_key},
+            timeout=self.timeout,
+            transport=self.transport,
+        ) as client:
+            if isinstance(source, str) and source.startswith(('http://', 'https://')):
+                audio_url = source
+            else:
+                on_progress('uploading')
+                with timer.phase('upload'):
+                    audio_url = await self.upload(client, source)
+                timer.bytes_sent += len(source) if isinstance(source, bytes) else os.path.getsize(source)
+
+            with timer.phase('engine'), observe_engine('assemblyai'):
+                body = {'audio_url': audio_url, 'punctuate': True, 'format_text': True}
+                if language_code:
+                    body['language_code'] = language_code
+
+                response = await client.post('/transcript', json=body)
+                response.raise_for_status()
+                transcript_id = response.json()['id']
+
+                max_wait = self.max_wait + duration * settings.ASSEMBLYAI_MAX_WAIT_PER_AUDIO_SECOND
+                deadline = time.monotonic() + max_wait
+                stage = None
+                while True:
+                    response = await client.get(f'/transcript/{transcript_id}')
+                    response.raise_for_status()
+                    transcript = response.json()
+                    if transcript['status'] == 'completed':
+                        return transcript['text']
+                    if transcript['status'] == 'error':
+                        raise Exception(f"Transcription failed: {transcript.get('error')}")
+                    if transcript['status'] != stage:
+                        stage = transcript['status']
+                        on_progress(stage)
+                    if time.monotonic() >= deadline:
+                        raise TimeoutError(f"Transcript {transcript_id} not finished after {max_wait:.0f}s")
+                    await asyncio.sleep(self.poll_interval)
+
+    async def upload(self, client, source):
+        """Stream a local file (or send audio bytes) to the engine without blocking the event loop"""
+        async def chunks():
+            async with await anyio.open_file(source, 'rb') as f:
+                while chunk := await f.read(UPLOAD_CHUNK_SIZE):
+                    yield chunk
+
+        response = await client.post('/upload', content=source if isinstance(source, bytes) else chunks())
+        response.raise_for_status()
+        return response.json()['upload_url']
@@ -1,12 +1,64 @@
-import os
+import io
+import time
+import shutil
+import tempfile
 import uuid
+import mimetypes
 from django.conf import settings
+from django.core import signing
 from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
 from mutagen import File as MutagenFile
 from pydub import AudioSegment
 from ..models import AudioFile
+from .storage_service import StorageService
+from .retention_service import RetentionService
+from .blob_service import BlobService
+from ..utils.metrics import UPLOAD_BYTES, UPLOAD_THROUGHPUT
+from ..utils.tracing import tracer, traced
 from decimal import Decimal
 
+UPLOAD_TOKEN_SALT = 'api.audio.upload'
+ENGINE_SAMPLE_RATE = 16000  # speech engines work at 16 kHz; more only adds bytes
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class AudioWindows:
+    """
+    Cuts one stored audio file into windows for the engine. The file is
+    fetched once per job, on the first window that needs cutting: used in
+    place on disk storage, downloaded to a temporary file from object
+    storage. Use as a context manager so the copy is removed afterwards.
+    """
+    
+    def __init__(self, audio_file):
+        self.audio_file = audio_file
+        self.path = None
+        self._copy = None
+    
+    def read(self, start, end, search=0):
+        if self.path is None:
+            self.path = self._fetch()
+        return AudioService.read_window(self.path, self.audio_file.format, start, end, search)
+    
+    def _fetch(self):
+        name = self.audio_file.storage_path
+        if StorageService.is_local():
+            return default_storage.path(name)
+        
+        self._copy = tempfile.NamedTemporaryFile(suffix=f'.{self.audio_file.format}')
+        with default_storage.open(name, 'rb') as f:
+            shutil.copyfileobj(f, self._copy, COPY_CHUNK_SIZE)
+        self._copy.flush()
+        return self._copy.name
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self._copy is not None:
+            self._copy.close()
+
 
 class AudioService:
     ALLOWED_FORMATS = settings.ALLOWED_AUDIO_FORMATS
@@ -18,27 +70,41 @@ class AudioService:
         Validate audio file format and size.
         Property 5: Audio File Format Validation
         """
+        return AudioService.validate_upload(file.name, file.size)
+    
+    @staticmethod
+    def validate_upload(filename, size):
+        """
+        Validate the name and size of an upload, before or after it arrives.
+        """
         # Check file extension
-        file_ext = file.name.split('.')[-1].lower()
+        file_ext = filename.split('.')[-1].lower()
         if file_ext not in AudioService.ALLOWED_FORMATS:
             return False, f"Unsupported format. Allowed formats: {', '.join(AudioService.ALLOWED_FORMATS)}"
         
         # Check file size
-        if file.size > settings.MAX_UPLOAD_SIZE:
+        if size > settings.MAX_UPLOAD_SIZE:
             return False, f"File too large. Maximum size: {settings.MAX_UPLOAD_SIZE / (1024*1024)}MB"
         
         return True, None
     
     @staticmethod
-    def extract_audio_duration(file_path):
+    def build_storage_path(user, file_ext):
+        """Storage name for a new upload"""
+        return f"audio_files/{user.id}/{uuid.uuid4()}.{file_ext}"
+    
+    @staticmethod
+    @traced('audio.extract_duration')
+    def extract_audio_duration(source):
         """
         Extract duration from audio file in minutes.
+        Accepts a local path or a seekable file object (upload or storage file).
         Property 7: Audio Duration Calculation Accuracy
         """
         try:
             # Try mutagen first (more accurate)
-            audio = MutagenFile(file_path)
-            if audio and audio.info:
+            audio = MutagenFile(source)
+            if audio is not None and audio.info:
                 duration_seconds = audio.info.length
                 return Decimal(str(duration_seconds / 60))
         except Exception:
@@ -46,13 +112,16 @@ class AudioService:
         
         try:
             # Fallback to pydub
-            audio = AudioSegment.from_file(file_path)
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            audio = AudioSegment.from_file(source)
             duration_seconds = len(audio) / 1000.0
             return Decimal(str(duration_seconds / 60))
         except Exception as e:
             raise ValueError(f"Could not extract audio duration: {str(e)}")
     
     @staticmethod
+    @traced('audio.store')
     def store_audio_file(file, user):
         """
         Store audio file and create database record.
@@ -63,48 +132,211 @@ class AudioService:
         if not is_valid:
             raise ValueError(error_message)
         
-        # Generate unique filename
         file_ext = file.name.split('.')[-1].lower()
-        unique_filename = f"{uuid.uuid4()}.{file_ext}"
-        file_path = os.path.join('audio_files', str(user.id), unique_filename)
         
-        # Save file
-        saved_path = default_storage.save(file_path, file)
-        full_path = os.path.join(settings.MEDIA_ROOT, saved_path)
+        # Extract duration from the upload itself so nothing is written
+        # (and later deleted) when the file is rejected
+        duration_minutes = AudioService.extract_audio_duration(file)
+        AudioService.check_duration(duration_minutes)
+        file.seek(0)
         
-        # Extract duration
+        # Identical content is stored once and shared through a blob reference.
+        # It is written before the quota transaction so the usage counters
+        # are not locked while the bytes upload.
+        start = time.perf_counter()
+        with tracer.start_as_current_span('audio.write_blob', attributes={'audio.size': file.size}):
+            digest = BlobService.hash_file(file)
+            blob = BlobService.store(file, digest, file_ext)
+        write_seconds = time.perf_counter() - start
+        
+        # Reserve quota (may evict older audio) and create the record in one
+        # transaction, so a failed insert rolls the reservation back; the
+        # bytes live in the blob (see storage_path)
         try:
-            duration_minutes = AudioService.extract_audio_duration(full_path)
-        except ValueError as e:
-            # Clean up file if duration extraction fails
-            default_storage.delete(saved_path)
-            raise e
+            with transaction.atomic():
+                with tracer.start_as_current_span('audio.reserve_quota'):
+                    RetentionService.reserve(user, file.size)
+                audio_file = AudioFile.objects.create(
+                    user=user,
+                    filename=file.name,
+                    file_path='',
+                    blob=blob,
+                    duration=duration_minutes,
+                    size=file.size,
+                    format=file_ext
+                )
+        except Exception:
+            BlobService.release(blob.id)
+            BlobService.collect(blob.id)
+            raise
+        UPLOAD_BYTES.labels('server').inc(file.size)
+        UPLOAD_THROUGHPUT.observe(file.size / max(write_seconds, 1e-6))
         
-        # Check duration limit
+        return audio_file
+    
+    @staticmethod
+    def check_duration(duration_minutes):
         if duration_minutes > Decimal(str(AudioService.MAX_DURATION_MINUTES)):
-            default_storage.delete(saved_path)
             raise ValueError(f"Audio duration exceeds maximum of {AudioService.MAX_DURATION_MINUTES} minutes")
+    
+    @staticmethod
+    def create_upload_session(filename, size, user):
+        """
+        Start a direct-to-storage upload.
+        Returns a presigned PUT request plus a signed token that identifies the
+        upload when the client calls finalize_upload.
+        """
+        is_valid, error_message = AudioService.validate_upload(filename, size)
+        if not is_valid:
+            raise ValueError(error_message)
         
-        # Create database record
-        audio_file = AudioFile.objects.create(
-            user=user,
-            filename=file.name,
-            file_path=saved_path,
-            duration=duration_minutes,
-            size=file.size,
-            format=file_ext
+        file_ext = filename.split('.')[-1].lower()
+        file_path = AudioService.build_storage_path(user, file_ext)
+        content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        expires_in = settings.PRESIGNED_UPLOAD_EXPIRY
+        
+        upload = StorageService.create_presigned_upload(file_path, content_type, expires_in)
+        upload_token = signing.dumps(
+            {'user_id': str(user.id), 'file_path': file_path, 'filename': filename},
+            salt=UPLOAD_TOKEN_SALT,
         )
         
+        return {
+            'upload': upload,
+            'upload_token': upload_token,
+            'expires_in': expires_in,
+        }
+    
+    @staticmethod
+    @traced('audio.finalize_upload')
+    def finalize_upload(upload_token, user):
+        """
+        Record metadata for a file the client uploaded straight to storage.
+        Safe to call again for the same token.
+        """
+        try:
+            data = signing.loads(
+                upload_token,
+                salt=UPLOAD_TOKEN_SALT,
+                max_age=settings.PRESIGNED_UPLOAD_EXPIRY * 2,
+            )
+        except signing.BadSignature:
+            raise ValueError("Invalid or expired upload token")
+        
+        if data['user_id'] != str(user.id):
+            raise ValueError("Invalid or expired upload token")
+        
+        file_path = data['file_path']
+        existing = AudioFile.objects.filter(user=user, file_path=file_path).first()
+        if existing:
+            return existing
+        
+        if not default_storage.exists(file_path):
+            raise ValueError("Upload not found. Please upload the file before finalizing.")
+        
+        size = default_storage.size(file_path)
+        is_valid, error_message = AudioService.validate_upload(data['filename'], size)
+        if not is_valid:
+            StorageService.delete(file_path)
+            raise ValueError(error_message)
+        
+        try:
+            with default_storage.open(file_path, 'rb') as stored_file:
+                duration_minutes = AudioService.extract_audio_duration(stored_file)
+                digest = BlobService.hash_file(stored_file)
+            AudioService.check_duration(duration_minutes)
+        except ValueError:
+            StorageService.delete(file_path)
+            raise
+        
+        # file_path keeps the upload's name so finalizing again finds this
+        # row. It is unique: a concurrent finalize of the same upload fails
+        # the insert and rolls back its quota reservation. The row is inserted
+        # before the blob is adopted so only one finalize ever adopts.
+        try:
+            with transaction.atomic():
+                RetentionService.reserve(user, size)
+                audio_file = AudioFile.objects.create(
+                    user=user,
+                    filename=data['filename'],
+                    file_path=file_path,
+                    duration=duration_minutes,
+                    size=size,
+                    format=data['filename'].split('.')[-1].lower()
+                )
+                audio_file.blob = BlobService.adopt(file_path, digest, size)
+                audio_file.save(update_fields=['blob'])
+        except IntegrityError:
+            return AudioFile.objects.get(user=user, file_path=file_path)
+        except ValueError:
+            StorageService.delete(file_path)
+            raise
+        UPLOAD_BYTES.labels('direct').inc(size)
+        
         return audio_file
     
+    @staticmethod
+    @traced('audio.read_window')
+    def read_window(path, format, start, end, search=0):
+        """
+        Decode the stretch between start and end (seconds) of a local audio
+        file and return (audio bytes, end) ready for the engine: mono 16 kHz
+        in TRANSCRIPTION_WINDOW_FORMAT. Only that stretch is decoded, so
+        long files can be sent to the engine piece by piece. With `search`,
+        the window ends at the quietest moment of its last `search` seconds
+        instead of exactly at `end`, so no word is cut in two.
+        """
+        window = AudioSegment.from_file(path, format=format, start_second=start, duration=end - start)
+        window = window.set_channels(1).set_frame_rate(ENGINE_SAMPLE_RATE)
+        
+        if search and len(window) > search * 1000:
+            cut = AudioService.quietest_point(window, search)
+            window = window[:cut]
+            end = start + cut / 1000
+        
+        buffer = io.BytesIO()
+        window.export(buffer, format=settings.TRANSCRIPTION_WINDOW_FORMAT)
+        return buffer.getvalue(), end
+    
+    @staticmethod
+    def quietest_point(segment, search, step_ms=50):
+        """Millisecond offset of the quietest moment in the last `search` seconds of segment"""
+        length = len(segment)
+        first = max(length - int(search * 1000), 0)
+        best, best_rms = length, None
+        # Scanning backwards keeps the latest of equally quiet moments
+        for offset in range(length - step_ms, first - 1, -step_ms):
+            rms = segment[offset:offset + step_ms].rms
+            if best_rms is None or rms < best_rms:
+                best, best_rms = offset + step_ms // 2, rms
+        return best
+    
     @staticmethod
     def delete_audio_file(audio_file):
         """
         Delete audio file from storage and database.
+        The row is locked and re-read first: an eviction may have dropped its
+        blob reference and returned its quota since `audio_file` was loaded.
         """
-        # Delete physical file
-        if default_storage.exists(audio_file.file_path):
-            default_storage.delete(audio_file.file_path)
+        with transaction.atomic():
+            row = AudioFile.objects.select_for_update().filter(pk=audio_file.pk).values(
+                'blob_id', 'storage_state'
+            ).first()
+            if row is None:
+                return
+            audio_file.blob_id = row['blob_id']
+            audio_file.storage_state = row['storage_state']
+            
+            audio_file.delete()
+            if audio_file.blob_id:
+                BlobService.release(audio_file.blob_id)
+        
+        blob_id = audio_file.blob_id
+        if audio_file.storage_state == 'hot':
+            RetentionService.release(audio_file.user_id, audio_file.size)
         
-        # Delete database record
-        audio_file.delete()
+        # Files stored before blobs own their physical file
+        if blob_id:
+            BlobService.collect(blob_id)
+        elif audio_file.storage_state == 'hot':
+            StorageService.delete(audio_file.file_path)
@@ -0,0 +1,146 @@
+import uuid
+import hashlib
+from collections import Counter
+import logging
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from ..models import AudioBlob
+from .storage_service import StorageService
+
+logger = logging.getLogger('api')
+
+COLLECTING = -1
+
+
+class BlobService:
+    """
+    Content-addressed audio storage with reference counting.
+
+    Every reference change is a single conditional UPDATE, so uploads and
+    deletes can race without locks:
+    - acquiring only increments blobs whose ref_count is >= 0
+    - collection first claims a zero-ref blob by flipping it to COLLECTING,
+      so an upload either revives the blob before the claim or no longer
+      sees it and stores a fresh copy under a new path
+    """
+
+    @staticmethod
+    def hash_file(file):
+        """SHA-256 hex digest of a Django File, read in chunks"""
+        digest = hashlib.sha256()
+        for chunk in file.chunks():
+            digest.update(chunk)
+        file.seek(0)
+        return digest.hexdigest()
+
+    @staticmethod
+    def build_blob_path(digest, file_ext):
+        # The random suffix keeps a re-uploaded blob from reusing the path of
+        # a copy that is still being collected
+        return f"audio_blobs/{digest[:2]}/{digest}-{uuid.uuid4().hex[:8]}.{file_ext}"
+
+    @staticmethod
+    def acquire(digest):
+        """Take a reference on the live blob for digest. Returns the blob or None."""
+        if not AudioBlob.objects.filter(sha256=digest, ref_count__gte=0).update(ref_count=F('ref_count') + 1):
+            return None
+        return AudioBlob.objects.filter(sha256=digest, ref_count__gt=0).first()
+
+    @staticmethod
+    def store(file, digest, file_ext):
+        """
+        Return a referenced blob holding the file's content, writing the file
+        to storage only when no live blob has the same digest.
+        """
+        while True:
+            blob = BlobService.acquire(digest)
+            if blob:
+                return blob
+
+            file.seek(0)
+            path = default_storage.save(BlobService.build_blob_path(digest, file_ext), file)
+            blob = BlobService.register(digest, path, file.size)
+            if blob:
+                return blob
+
+    @staticmethod
+    def adopt(path, digest, size):
+        """
+        Turn an object already in storage (a direct upload) into a referenced
+        blob, or delete it if identical content is already stored.
+        """
+        while True:
+            blob = BlobService.acquire(digest)
+            if blob:
+                # The caller's transaction may still roll back the reference
+                transaction.on_commit(lambda: StorageService.delete(path))
+                return blob
+
+            blob = BlobService.register(digest, path, size, delete_on_conflict=False)
+            if blob:
+                return blob
+
+    @staticmethod
+    def register(digest, path, size, delete_on_conflict=True):
+        """
+        Record a stored object as the live blob for digest with one reference.
+        Returns None when a concurrent upload registered the digest first.
+        """
+        try:
+            with transaction.atomic():
+                return AudioBlob.objects.create(sha256=digest, file_path=path, size=size, ref_count=1)
+        except IntegrityError:
+            if delete_on_conflict:
+                StorageService.delete(path)
+            return None
+
+    @staticmethod
+    def release(blob_id, count=1):
+        """Drop references; the blob is removed by collect once none remain"""
+        AudioBlob.objects.filter(pk=blob_id, ref_count__gte=count).update(ref_count=F('ref_count') - count)
+
+    @staticmethod
+    def release_all(blob_ids):
+        """
+        Drop one reference per entry of blob_ids (None for audio without a
+        blob), with one update per distinct blob. Bulk deletes of audio files
+        call this with the blob ids of the locked rows they remove.
+        """
+        for blob_id, count in Counter(blob_id for blob_id in blob_ids if blob_id).items():
+            BlobService.release(blob_id, count)
+
+    @staticmethod
+    def claim_unreferenced(blob_ids):
+        """
+        Mark the blobs among blob_ids that have no references as COLLECTING
+        and return them; from then on no upload can take a reference.
+        """
+        AudioBlob.objects.filter(pk__in=blob_ids, ref_count=0).update(ref_count=COLLECTING)
+        return list(AudioBlob.objects.filter(pk__in=blob_ids, ref_count=COLLECTING))
+
+    @staticmethod
+    def collect(blob_id):
+        """
+        Delete a blob with no references from storage and the database.
+        Returns the bytes freed, 0 if the blob is still referenced.
+        """
+        freed = 0
+        for blob in BlobService.claim_unreferenced([blob_id]):
+            # A failed delete leaves the row COLLECTING for collect_garbage to retry
+            StorageService.delete(blob.file_path)
+            blob.delete()
+            logger.info(f"Collected audio blob {blob.sha256} ({blob.size} bytes)")
+            freed += blob.size
+        return freed
+
+    @staticmethod
+    def collect_garbage():
+        """Collect every unreferenced blob, including ones a failed run left behind"""
+        freed = 0
+        for blob_id in AudioBlob.objects.filter(ref_count__lte=0).values_list('id', flat=True).iterator():
+            try:
+                freed += BlobService.collect(blob_id)
+            except Exception as e:
+                logger.error(f"Failed to collect audio blob {blob_id}: {e}")
+        return freed
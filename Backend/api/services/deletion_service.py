@@ -0,0 +1,144 @@
+import logging
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+from ..models import AudioFile, Transcription, DeletionRequest
+from .storage_service import StorageService
+from .retention_service import RetentionService
+from .blob_service import BlobService
+
+logger = logging.getLogger('api')
+
+
+class DeletionService:
+    """
+    Bulk deletion in two phases: a request soft-deletes every item with one
+    UPDATE and returns, then purge() removes storage objects and rows in
+    batches in the background, recording progress on the DeletionRequest.
+    """
+
+    @staticmethod
+    def request_audio_deletion(user, ids):
+        """Soft-delete the user's audio files (and their transcripts) among ids"""
+        with transaction.atomic():
+            request = DeletionRequest.objects.create(user=user, kind='audio')
+            count = AudioFile.objects.filter(user=user, id__in=ids).exclude(
+                storage_state='deleted'
+            ).update(storage_state='deleted', deletion_request=request)
+
+            # Transcripts go with their audio, as they do on a single delete
+            Transcription.objects.filter(
+                audio_file__deletion_request=request,
+                deleted_at__isnull=True,
+            ).update(deleted_at=timezone.now())
+
+            return DeletionService._start(request, count)
+
+    @staticmethod
+    def request_transcription_deletion(user, ids):
+        """Soft-delete the user's transcriptions among ids"""
+        with transaction.atomic():
+            request = DeletionRequest.objects.create(user=user, kind='transcription')
+            count = Transcription.objects.filter(
+                user=user, id__in=ids, deleted_at__isnull=True
+            ).update(deleted_at=timezone.now(), deletion_request=request)
+
+            return DeletionService._start(request, count)
+
+    @staticmethod
+    def _start(request, count):
+        request.requested_count = count
+        if not count:
+            request.status = 'completed'
+            request.completed_at = timezone.now()
+        request.save(update_fields=['requested_count', 'status', 'completed_at'])
+        logger.info(f"Queued deletion of {count} {request.kind} items for user {request.user_id}")
+        return request
+
+    @staticmethod
+    def purge(batch_size=None):
+        """
+        Remove one batch of soft-deleted transcriptions and audio files.
+        Rows are claimed with SKIP LOCKED so several purgers can run at once.
+        Returns the number of rows removed.
+        """
+        batch_size = batch_size or settings.DELETION_PURGE_BATCH_SIZE
+
+        removed = DeletionService._purge_transcriptions(batch_size)
+        removed += DeletionService._purge_audio(batch_size)
+        DeletionService._finish_requests()
+        return removed
+
+    @staticmethod
+    def _purge_transcriptions(batch_size):
+        with transaction.atomic():
+            rows = list(
+                Transcription.objects.select_for_update(skip_locked=True)
+                .filter(deleted_at__isnull=False)
+                .values('id', 'deletion_request_id')[:batch_size]
+            )
+            if rows:
+                Transcription.objects.filter(id__in=[row['id'] for row in rows]).delete()
+                DeletionService._record_progress(rows)
+        return len(rows)
+
+    @staticmethod
+    def _purge_audio(batch_size):
+        with transaction.atomic():
+            rows = list(
+                AudioFile.objects.select_for_update(skip_locked=True)
+                .filter(storage_state='deleted')
+                .values('id', 'user_id', 'file_path', 'blob_id', 'size', 'evicted_at', 'deletion_request_id')[:batch_size]
+            )
+            if not rows:
+                return 0
+
+            # Cascades to transcriptions
+            AudioFile.objects.filter(id__in=[row['id'] for row in rows]).delete()
+            BlobService.release_all(row['blob_id'] for row in rows)
+            DeletionService._record_progress(rows)
+
+            # Bytes of audio that was still stored (not evicted) leave the quotas
+            freed_by_user = defaultdict(int)
+            for row in rows:
+                if row['evicted_at'] is None:
+                    freed_by_user[row['user_id']] += row['size']
+            for user_id, freed in freed_by_user.items():
+                RetentionService.release(user_id, freed)
+
+        # Storage is only touched once the rows are gone for good
+        for blob_id in {row['blob_id'] for row in rows if row['blob_id']}:
+            try:
+                BlobService.collect(blob_id)
+            except Exception as e:
+                logger.error(f"Failed to collect audio blob {blob_id}: {e}")
+        for row in rows:
+            try:
+                if not row['blob_id'] and row['evicted_at'] is None:
+                    StorageService.delete(row['file_path'])
+            except Exception as e:
+                logger.error(f"Failed to delete storage for audio {row['id']}: {e}")
+
+        return len(rows)
+
+    @staticmethod
+    def _record_progress(rows):
+        counts = Counter(row['deletion_request_id'] for row in rows if row['deletion_request_id'])
+        for request_id, count in counts.items():
+            DeletionRequest.objects.filter(pk=request_id).update(deleted_count=F('deleted_count') + count)
+
+    @staticmethod
+    def _finish_requests():
+        """Complete requests with no soft-deleted item left"""
+        DeletionRequest.objects.filter(status='pending').exclude(
+            Exists(AudioFile.objects.filter(deletion_request=OuterRef('pk')))
+        ).exclude(
+            Exists(Transcription.objects.filter(deletion_request=OuterRef('pk')))
+        ).update(
+            status='completed',
+            # Items removed by a cascade or another cleanup count as deleted too
+            deleted_count=F('requested_count'),
+            completed_at=timezone.now(),
+        )
@@ -0,0 +1,120 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.utils import timezone
+from ..models import EmailOutbox
+from ..utils.tracing import traced
+
+logger = logging.getLogger('api')
+
+
+class EmailService:
+    """
+    Email through an outbox: queue() renders the message and stores it,
+    normally inside the caller's transaction, and send_pending() delivers
+    batches over one SMTP connection, retrying failures with backoff.
+    """
+
+    @staticmethod
+    def queue(template, context, subject, to, from_email=None):
+        """
+        Render `template`.txt and `template`.html (if it exists) and put the
+        email in the outbox. Returns the outbox row.
+        """
+        body = get_template(f'emails/{template}.txt').render(context)
+        try:
+            html_body = get_template(f'emails/{template}.html').render(context)
+        except TemplateDoesNotExist:
+            html_body = ''
+        return EmailOutbox.objects.create(
+            template=template,
+            subject=subject,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            to=list(to),
+            body=body,
+            html_body=html_body,
+        )
+
+    @staticmethod
+    @traced('email.send_pending')
+    def send_pending(batch_size=None):
+        """
+        Send a batch of due emails over one connection. Rows are claimed with
+        SKIP LOCKED in a short transaction that leases them for
+        EMAIL_OUTBOX_LEASE_SECONDS, so several senders can drain the outbox
+        and no row stays locked during the SMTP session. Returns the number
+        of emails handled (sent or rescheduled).
+        """
+        batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+
+        with transaction.atomic():
+            emails = list(
+                EmailOutbox.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', next_attempt_at__lte=timezone.now())
+                .order_by('next_attempt_at')[:batch_size]
+            )
+            if not emails:
+                return 0
+            # Not due again until the lease runs out, which also retries the
+            # batch of a sender that died
+            EmailOutbox.objects.filter(pk__in=[email.pk for email in emails]).update(
+                next_attempt_at=timezone.now() + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+            )
+
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            # Nothing can be sent this round; each email keeps its place
+            logger.error(f"Could not connect to the mail server: {e}")
+            for email in emails:
+                EmailService._failed(email, e)
+            return len(emails)
+
+        try:
+            for email in emails:
+                EmailService._send(email, connection)
+        finally:
+            connection.close()
+
+        return len(emails)
+
+    @staticmethod
+    def _send(email, connection):
+        message = EmailMultiAlternatives(
+            subject=email.subject,
+            body=email.body,
+            from_email=email.from_email,
+            to=email.to,
+            connection=connection,
+        )
+        if email.html_body:
+            message.attach_alternative(email.html_body, 'text/html')
+
+        try:
+            message.send()
+        except Exception as e:
+            logger.error(f"Failed to send email {email.id} ({email.template}): {e}")
+            EmailService._failed(email, e)
+            return
+
+        email.attempts += 1
+        email.status = 'sent'
+        email.sent_at = timezone.now()
+        email.error_message = None
+        email.save(update_fields=['status', 'attempts', 'sent_at', 'error_message'])
+
+    @staticmethod
+    def _failed(email, error):
+        email.attempts += 1
+        email.error_message = str(error)
+        if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            email.status = 'failed'
+        else:
+            # Exponential backoff: 30s, 60s, 120s, ...
+            email.next_attempt_at = timezone.now() + timedelta(seconds=30 * 2 ** (email.attempts - 1))
+        email.save(update_fields=['status', 'attempts', 'next_attempt_at', 'error_message'])
@@ -0,0 +1,184 @@
+import time
+import uuid
+import logging
+import threading
+import httpx
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.utils import timezone
+from .assemblyai_client import AsyncAssemblyAIClient
+
+logger = logging.getLogger('api')
+
+
+class HealthService:
+    """
+    Dependency checks behind the health endpoints. Probes run at most once
+    per HEALTH_SNAPSHOT_TTL seconds per process: liveness and readiness are
+    answered from the last snapshot, which is refreshed in a background
+    thread once it goes stale, so frequent probes never queue on the
+    database or an external API. Until a worker's first probe finishes it
+    reports 'starting'. deep() runs every probe on demand and reports their
+    latency.
+
+    A failing database makes the service unhealthy; any other failure, or a
+    dependency that is not configured, only degrades it.
+    """
+
+    CRITICAL = ('database',)
+    RAZORPAY_API_URL = 'https://api.razorpay.com/v1'
+
+    _snapshot = None
+    _refreshing = False
+    _lock = threading.Lock()
+
+    @staticmethod
+    def probe_database():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        return 'connected'
+
+    @staticmethod
+    def probe_cache():
+        key = f'health_check:{uuid.uuid4().hex}'
+        cache.set(key, 'ok', 10)
+        if cache.get(key) != 'ok':
+            raise RuntimeError("Value written to the cache could not be read back")
+        cache.delete(key)
+        return 'connected'
+
+    @staticmethod
+    def probe_storage():
+        # A metadata lookup: a stat on disk, a HEAD request on object storage
+        default_storage.exists('health-check')
+        return 'available'
+
+    @staticmethod
+    def probe_assemblyai():
+        if not settings.ASSEMBLYAI_API_KEY:
+            return 'missing'
+        response = httpx.get(
+            f'{AsyncAssemblyAIClient.BASE_URL}/transcript',
+            params={'limit': 1},
+            headers={'authorization': settings.ASSEMBLYAI_API_KEY},
+            timeout=settings.HEALTH_PROBE_TIMEOUT,
+        )
+        response.raise_for_status()
+        return 'reachable'
+
+    @staticmethod
+    def probe_razorpay():
+        if not (settings.RAZORPAY_KEY_ID and settings.RAZORPAY_KEY_SECRET):
+            return 'missing'
+        # Not the shared payment client: its read timeout is sized for payments
+        response = httpx.get(
+            f'{HealthService.RAZORPAY_API_URL}/payments',
+            params={'count': 1},
+            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+            timeout=settings.HEALTH_PROBE_TIMEOUT,
+        )
+        response.raise_for_status()
+        return 'reachable'
+
+    @staticmethod
+    def probes():
+        return {
+            'database': HealthService.probe_database,
+            'cache': HealthService.probe_cache,
+            'storage': HealthService.probe_storage,
+            'assemblyai': HealthService.probe_assemblyai,
+            'razorpay': HealthService.probe_razorpay,
+        }
+
+    @staticmethod
+    def run_probes():
+        """
+        Run every probe. Returns {'status', 'timestamp', 'services'} where
+        each service has a status and its latency in milliseconds (plus the
+        error, for a failed probe).
+        """
+        overall = 'healthy'
+        services = {}
+        for name, probe in HealthService.probes().items():
+            started = time.perf_counter()
+            try:
+                result = {'status': probe()}
+            except Exception as e:
+                logger.warning(f"Health probe {name} failed: {e}")
+                result = {'status': 'error', 'error': str(e)}
+            result['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            services[name] = result
+
+            if result['status'] == 'error' and name in HealthService.CRITICAL:
+                overall = 'unhealthy'
+            elif result['status'] in ('error', 'missing') and overall == 'healthy':
+                overall = 'degraded'
+
+        return {
+            'status': overall,
+            'timestamp': timezone.now().isoformat(),
+            'services': services,
+            'checked_at': time.monotonic(),
+        }
+
+    @staticmethod
+    def refresh():
+        snapshot = HealthService.run_probes()
+        with HealthService._lock:
+            HealthService._snapshot = snapshot
+        return snapshot
+
+    @staticmethod
+    def snapshot():
+        """
+        Last probe results. A missing or stale snapshot is refreshed by one
+        background thread; meanwhile the stale one is served, or a 'starting'
+        status before the first probe, so no request waits on a dependency.
+        """
+        with HealthService._lock:
+            snapshot = HealthService._snapshot
+            stale = snapshot is None or time.monotonic() - snapshot['checked_at'] >= settings.HEALTH_SNAPSHOT_TTL
+            start_refresh = stale and not HealthService._refreshing
+            if start_refresh:
+                HealthService._refreshing = True
+
+        if start_refresh:
+            threading.Thread(target=HealthService._refresh_in_background, daemon=True).start()
+        if snapshot is None:
+            return {'status': 'starting', 'timestamp': timezone.now().isoformat(), 'services': {}}
+        return snapshot
+
+    @staticmethod
+    def _refresh_in_background():
+        try:
+            HealthService.refresh()
+        except Exception as e:
+            logger.error(f"Health snapshot refresh failed: {e}")
+        finally:
+            HealthService._refreshing = False
+            # The thread's own connection
+            connection.close()
+
+    @staticmethod
+    def readiness():
+        """Snapshot without latencies or error details, for unauthenticated probes"""
+        snapshot = HealthService.snapshot()
+        return {
+            'status': snapshot['status'],
+            'timestamp': snapshot['timestamp'],
+            'services': {name: result['status'] for name, result in snapshot['services'].items()},
+        }
+
+    @staticmethod
+    def deep():
+        """Fresh probe of every dependency, with latencies; also renews the snapshot"""
+        snapshot = HealthService.refresh()
+        return {key: value for key, value in snapshot.items() if key != 'checked_at'}
+
+    @staticmethod
+    def reset():
+        with HealthService._lock:
+            HealthService._snapshot = None
+            HealthService._refreshing = False
@@ -0,0 +1,196 @@
+import re
+import hmac
+import time
+import hashlib
+import logging
+import threading
+import jwt
+import requests
+from django.conf import settings
+
+logger = logging.getLogger('api')
+
+
+class IdentityTokenError(ValueError):
+    """Raised when a provider ID token cannot be verified"""
+
+
+class JWKSCache:
+    """
+    Signing keys published by an identity provider's JWKS endpoint.
+
+    Keys are served from memory. Once the set is older than its max-age it is
+    refreshed in a background thread while the old keys keep serving, so no
+    login waits on the provider. A token signed with an unknown key id means
+    the provider rotated its keys, which forces a synchronous refresh (at most
+    once per min_refresh_interval so forged kids cannot hammer the endpoint).
+    """
+
+    def __init__(self, url, ttl=3600, min_refresh_interval=60, fetch=None):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.fetch = fetch or self._fetch_jwks
+        self._keys = {}
+        self._fetched_at = None
+        self._expires_at = 0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def _fetch_jwks(self):
+        """Download the key set, returning (jwks, max_age or None)"""
+        response = requests.get(self.url, timeout=5)
+        response.raise_for_status()
+        match = re.search(r'max-age=(\d+)', response.headers.get('Cache-Control', ''))
+        return response.json(), int(match.group(1)) if match else None
+
+    def refresh(self):
+        jwks, max_age = self.fetch()
+        keys = {}
+        for data in jwks.get('keys', []):
+            try:
+                key = jwt.PyJWK(data)
+            except jwt.PyJWTError:
+                continue
+            if key.key_id:
+                keys[key.key_id] = key
+
+        with self._lock:
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+            self._expires_at = self._fetched_at + (max_age or self.ttl)
+        logger.info(f"Loaded {len(keys)} signing keys from {self.url}")
+        return keys
+
+    def refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Background JWKS refresh failed for {self.url}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name='jwks-refresh', daemon=True).start()
+
+    def get_signing_key(self, kid):
+        if self._fetched_at is None:
+            self.refresh()
+        elif time.monotonic() >= self._expires_at:
+            self.refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - self._fetched_at >= self.min_refresh_interval:
+            key = self.refresh().get(kid)
+
+        if key is None:
+            raise IdentityTokenError("Identity token signed with an unknown key")
+        return key
+
+
+class IdentityService:
+    FACEBOOK_GRAPH_URL = 'https://graph.facebook.com/v18.0'
+
+    PROVIDERS = {
+        'google': {
+            'jwks_url': 'https://www.googleapis.com/oauth2/v3/certs',
+            'issuers': ['https://accounts.google.com', 'accounts.google.com'],
+        },
+        'facebook': {
+            'jwks_url': 'https://limited.facebook.com/.well-known/oauth/openid/jwks/',
+            'issuers': ['https://www.facebook.com'],
+        },
+    }
+
+    _key_sets = {}
+    _key_sets_lock = threading.Lock()
+
+    @staticmethod
+    def get_key_set(provider):
+        """Process-wide JWKS cache for a provider"""
+        with IdentityService._key_sets_lock:
+            key_set = IdentityService._key_sets.get(provider)
+            if key_set is None:
+                key_set = JWKSCache(
+                    IdentityService.PROVIDERS[provider]['jwks_url'],
+                    ttl=settings.IDENTITY_JWKS_CACHE_SECONDS,
+                )
+                IdentityService._key_sets[provider] = key_set
+            return key_set
+
+    @staticmethod
+    def verify_id_token(provider, id_token):
+        """
+        Verify a provider-issued ID token locally against cached signing keys.
+        Returns the token claims.
+        """
+        config = IdentityService.PROVIDERS[provider]
+        audience = settings.SOCIALACCOUNT_PROVIDERS[provider]['APP']['client_id']
+
+        try:
+            header = jwt.get_unverified_header(id_token)
+            key = IdentityService.get_key_set(provider).get_signing_key(header.get('kid'))
+            claims = jwt.decode(
+                id_token,
+                key.key,
+                algorithms=['RS256'],
+                audience=audience,
+                issuer=config['issuers'],
+                options={'require': ['exp', 'iat', 'sub']},
+                leeway=30,
+            )
+        except jwt.PyJWTError as e:
+            raise IdentityTokenError(f"Invalid identity token: {e}")
+
+        if provider == 'google' and claims.get('email_verified') is False:
+            raise IdentityTokenError("Google account email is not verified")
+
+        return claims
+
+    @staticmethod
+    def verify_facebook_access_token(access_token):
+        """
+        Facebook's web SDK issues no ID token, so its access token is checked
+        with one Graph API call: /me with appsecret_proof, which Facebook only
+        accepts for a valid token issued to this app, returns the identity.
+        Returns claims shaped like an ID token's (sub, email, name).
+        """
+        app = settings.SOCIALACCOUNT_PROVIDERS['facebook']['APP']
+        proof = hmac.new(app['secret'].encode(), access_token.encode(), hashlib.sha256).hexdigest()
+        response = requests.get(f'{IdentityService.FACEBOOK_GRAPH_URL}/me', params={
+            'fields': 'id,name,email',
+            'access_token': access_token,
+            'appsecret_proof': proof,
+        }, timeout=10)
+        profile = response.json() if response.ok else {}
+        if not profile.get('id'):
+            raise IdentityTokenError("Invalid Facebook access token")
+
+        return {'sub': profile['id'], 'email': profile.get('email'), 'name': profile.get('name')}
+
+    @staticmethod
+    def get_login_identity(provider, data):
+        """
+        Resolve (email, name, provider_id) for an OAuth login request from
+        proof issued by the provider: an id_token (Google's sign-in button
+        credential), verified locally, or a Facebook access token. Client-sent email and provider_id
+        are only trusted in development, with DEBUG on and
+        VERIFY_IDENTITY_TOKENS turned off.
+        """
+        if data.get('id_token'):
+            claims = IdentityService.verify_id_token(provider, data['id_token'])
+        elif provider == 'facebook' and data.get('access_token'):
+            claims = IdentityService.verify_facebook_access_token(data['access_token'])
+        elif settings.VERIFY_IDENTITY_TOKENS or not settings.DEBUG:
+            raise IdentityTokenError("Identity token required")
+        else:
+            logger.warning(f"Accepted unverified {provider} login (VERIFY_IDENTITY_TOKENS is off)")
+            return data.get('email'), data.get('name'), data.get('provider_id')
+
+        return claims.get('email'), claims.get('name') or data.get('name'), claims['sub']
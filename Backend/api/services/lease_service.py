@@ -0,0 +1,174 @@
+import os
+import uuid
+import socket
+import asyncio
+import logging
+import threading
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+from ..models import Transcription
+from ..utils.status_hub import get_hub, status_event
+from .transcription_state import TranscriptionStateMachine, TransitionLost
+
+logger = logging.getLogger('api')
+
+
+class LeaseLost(TransitionLost):
+    """The job's lease expired or was taken over; its holder must stop without writing results"""
+
+
+class LeaseService:
+    """
+    Leases on transcription jobs. A worker claims a pending job with a
+    conditional UPDATE, keeps the lease alive with a heartbeat and gives it
+    up on completion, failure or shutdown. Jobs whose lease expired belong
+    to a dead worker; reap() puts them back in the queue.
+    """
+
+    @staticmethod
+    def new_owner():
+        """Identity of one processing run, readable in the admin"""
+        return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    @staticmethod
+    def lease_deadline():
+        return timezone.now() + timedelta(seconds=settings.TRANSCRIPTION_LEASE_SECONDS)
+
+    @staticmethod
+    def claim(transcription, owner):
+        """Take a pending job (pending -> processing). False if another worker got it first"""
+        try:
+            TranscriptionStateMachine.transition(
+                transcription, 'pending', 'processing',
+                lease_owner=owner,
+                lease_expires_at=LeaseService.lease_deadline(),
+                attempts=F('attempts') + 1,
+            )
+        except TransitionLost:
+            return False
+        return True
+
+    @staticmethod
+    def heartbeat(transcription_id, owner):
+        """Extend the lease; False once it is no longer ours"""
+        return bool(Transcription.objects.filter(
+            id=transcription_id, status='processing', lease_owner=owner
+        ).update(lease_expires_at=LeaseService.lease_deadline()))
+
+    @staticmethod
+    def release(transcription_id, owner):
+        """Hand a job back to the queue on shutdown; the attempt does not count against it"""
+        released = TranscriptionStateMachine.transition_many(
+            Transcription.objects.filter(id=transcription_id, lease_owner=owner),
+            'processing', 'pending',
+            lease_owner=None, lease_expires_at=None, attempts=F('attempts') - 1,
+        )
+        if released:
+            logger.info(f"Handed transcription {transcription_id} back to the queue")
+        return bool(released)
+
+    @staticmethod
+    def next_pending():
+        """Oldest job waiting for a worker"""
+        return Transcription.objects.filter(
+            status='pending', deleted_at__isnull=True
+        ).select_related('user', 'audio_file').order_by('created_at').first()
+
+    @staticmethod
+    def reap():
+        """
+        Requeue processing jobs whose lease expired, or fail them once they
+        used TRANSCRIPTION_MAX_ATTEMPTS. Rows from before leases existed
+        (processing without a lease) count as expired.
+        Returns (requeued, failed).
+        """
+        expired = Q(status='processing') & (
+            Q(lease_expires_at__lt=timezone.now()) | Q(lease_expires_at__isnull=True)
+        )
+        out_of_attempts = Q(attempts__gte=settings.TRANSCRIPTION_MAX_ATTEMPTS)
+
+        failed_ids = list(Transcription.objects.filter(expired & out_of_attempts).values_list('id', flat=True))
+        failed = TranscriptionStateMachine.transition_many(
+            Transcription.objects.filter(expired & out_of_attempts, id__in=failed_ids),
+            'processing', 'failed',
+            error_message='Transcription could not be completed. Please try again.',
+            lease_owner=None,
+            lease_expires_at=None,
+        )
+
+        requeued_ids = list(Transcription.objects.filter(expired & ~out_of_attempts).values_list('id', flat=True))
+        requeued = TranscriptionStateMachine.transition_many(
+            Transcription.objects.filter(expired & ~out_of_attempts, id__in=requeued_ids),
+            'processing', 'pending',
+            lease_owner=None, lease_expires_at=None,
+        )
+
+        hub = get_hub()
+        for transcription_id in failed_ids:
+            hub.publish(transcription_id, status_event(transcription_id, 'failed'))
+        for transcription_id in requeued_ids:
+            hub.publish(transcription_id, status_event(transcription_id, 'pending'))
+
+        if failed or requeued:
+            logger.warning(f"Reaped expired transcription leases: {requeued} requeued, {failed} failed")
+        return requeued, failed
+
+
+class LeaseHeartbeat:
+    """
+    Keeps a job's lease alive while it is processed: a background thread
+    (`with`) or task (`async with`) renews it every
+    TRANSCRIPTION_HEARTBEAT_INTERVAL seconds. Call check() between steps;
+    it raises LeaseLost once a renewal finds the lease gone.
+    """
+
+    def __init__(self, transcription_id, owner):
+        self.transcription_id = transcription_id
+        self.owner = owner
+        self.lost = False
+
+    def check(self):
+        if self.lost:
+            raise LeaseLost(f"Lease on transcription {self.transcription_id} lost")
+
+    def __enter__(self):
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(settings.TRANSCRIPTION_HEARTBEAT_INTERVAL):
+                if not LeaseService.heartbeat(self.transcription_id, self.owner):
+                    self.lost = True
+                    return
+        finally:
+            # The thread's own connection
+            connection.close()
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._arun())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _arun(self):
+        while True:
+            await asyncio.sleep(settings.TRANSCRIPTION_HEARTBEAT_INTERVAL)
+            if not await sync_to_async(LeaseService.heartbeat)(self.transcription_id, self.owner):
+                self.lost = True
+                return
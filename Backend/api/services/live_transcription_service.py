@@ -0,0 +1,86 @@
+import math
+import logging
+from decimal import Decimal, ROUND_UP
+from django.db import transaction
+from django.utils import timezone
+from ..models import Transcription, LiveSession, Wallet
+from .wallet_service import WalletService
+
+logger = logging.getLogger('api')
+
+MIN_SAMPLE_RATE = 8000
+MAX_SAMPLE_RATE = 48000
+
+
+def billed_minutes(seconds):
+    """Minutes charged for a running total of streamed seconds (2 decimal places)"""
+    return (Decimal(seconds) / 60).quantize(Decimal('0.01'), rounding=ROUND_UP)
+
+
+class LiveTranscriptionService:
+    """
+    Sessions of the live WebSocket endpoint: opening, per-second billing
+    and the final transcript. The socket handler lives in api/live.py.
+    """
+
+    @staticmethod
+    def start_session(user, language, sample_rate):
+        """Validate the stream parameters and open a session"""
+        if language not in dict(Transcription.LANGUAGE_CHOICES):
+            raise ValueError(f"Unsupported language: {language}")
+        try:
+            sample_rate = int(sample_rate)
+        except (TypeError, ValueError):
+            raise ValueError("sample_rate must be an integer")
+        if not MIN_SAMPLE_RATE <= sample_rate <= MAX_SAMPLE_RATE:
+            raise ValueError(f"sample_rate must be between {MIN_SAMPLE_RATE} and {MAX_SAMPLE_RATE}")
+
+        wallet = Wallet.objects.get(user=user)
+        if wallet.demo_minutes_remaining <= 0 and wallet.balance <= 0:
+            raise ValueError("Insufficient balance. Please recharge your wallet.")
+
+        return LiveSession.objects.create(user=user, language=language, sample_rate=sample_rate)
+
+    @staticmethod
+    def audio_seconds(byte_count, sample_rate):
+        """Duration of 16-bit mono PCM"""
+        return byte_count / (2 * sample_rate)
+
+    @staticmethod
+    @transaction.atomic
+    def bill(session_id, seconds):
+        """
+        Charge streamed seconds not billed yet, up to a running total of
+        `seconds` (fractions round up to the next second).
+        Raises ValueError once the wallet runs dry.
+        """
+        session = LiveSession.objects.select_for_update().select_related('user', 'transaction').get(id=session_id)
+        seconds = math.ceil(seconds)
+        if seconds <= session.seconds_billed:
+            return session
+
+        increment = billed_minutes(seconds) - billed_minutes(session.seconds_billed)
+        transaction_obj, cost = WalletService.deduct_streaming_cost(
+            session.user,
+            increment,
+            session.transaction,
+            description=f'Live transcription: {seconds} seconds streamed'
+        )
+
+        session.seconds_billed = seconds
+        session.cost += cost
+        session.transaction = transaction_obj
+        session.save(update_fields=['seconds_billed', 'cost', 'transaction'])
+        return session
+
+    @staticmethod
+    def finish_session(session_id, text, error_message=None):
+        """Record the transcript and close the session"""
+        LiveSession.objects.filter(id=session_id).update(
+            text=text,
+            status='failed' if error_message else 'completed',
+            error_message=error_message,
+            ended_at=timezone.now(),
+        )
+        logger.info(f"Live session {session_id} {'failed' if error_message else 'completed'}")
+        return LiveSession.objects.get(id=session_id)
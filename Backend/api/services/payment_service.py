@@ -1,22 +1,68 @@
 import razorpay
 import hmac
 import hashlib
+import threading
+import requests
+from decimal import Decimal
+from datetime import timedelta
+from requests.adapters import HTTPAdapter
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from ..models import User, PaymentWebhookEvent
+from .wallet_service import WalletService
+from ..utils.tracing import traced
 import logging
 
 logger = logging.getLogger('api')
 
 
+class TimeoutSession(requests.Session):
+    """requests session that applies a default timeout to every call"""
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+    
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
 class PaymentService:
+    _client = None
+    _client_lock = threading.Lock()
+    
     def __init__(self):
-        try:
-            self.client = razorpay.Client(
-                auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-            )
-        except Exception as e:
-            logger.error(f"Failed to initialize Razorpay client: {e}")
-            raise
+        self.client = PaymentService.get_client()
     
+    @staticmethod
+    def get_client():
+        """
+        Process-wide Razorpay client whose session keeps a pool of
+        keep-alive connections, instead of a new client per request.
+        """
+        with PaymentService._client_lock:
+            if PaymentService._client is None:
+                try:
+                    session = TimeoutSession(timeout=(
+                        settings.RAZORPAY_CONNECT_TIMEOUT,
+                        settings.RAZORPAY_READ_TIMEOUT,
+                    ))
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=settings.RAZORPAY_POOL_SIZE,
+                    )
+                    session.mount('https://', adapter)
+                    PaymentService._client = razorpay.Client(
+                        session=session,
+                        auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to initialize Razorpay client: {e}")
+                    raise
+            return PaymentService._client
+    
+    @traced('payment.create_order')
     def create_order(self, amount, user):
         """
         Create Razorpay order for wallet recharge.
@@ -104,6 +150,7 @@ class PaymentService:
         except Exception:
             return False
     
+    @traced('payment.fetch_payment')
     def fetch_payment(self, payment_id):
         """
         Fetch payment details from Razorpay.
@@ -113,3 +160,92 @@ class PaymentService:
             return payment
         except Exception as e:
             raise ValueError(f"Failed to fetch payment: {str(e)}")
+
+    
+    @staticmethod
+    def record_webhook_event(event_id, data):
+        """
+        Store a verified webhook event in the inbox without processing it.
+        Redeliveries (same event id, or same event for the same payment) are
+        dropped by the unique constraints. Returns True if the event is new.
+        """
+        payment = data.get('payload', {}).get('payment', {}).get('entity', {})
+        event = PaymentWebhookEvent(
+            event_id=event_id,
+            event=data.get('event', ''),
+            payment_id=payment.get('id'),
+            order_id=payment.get('order_id'),
+            payload=data,
+        )
+        PaymentWebhookEvent.objects.bulk_create([event], ignore_conflicts=True)
+        return PaymentWebhookEvent.objects.filter(pk=event.pk).exists()
+    
+    @traced('payment.process_webhook_events')
+    def process_webhook_events(self, batch_size=None):
+        """
+        Credit wallets for a batch of pending webhook events.
+        Rows are claimed with SKIP LOCKED in a short transaction that leases
+        them for PAYMENT_WEBHOOK_LEASE_SECONDS, so several workers can drain
+        the inbox concurrently; each event is then credited in its own
+        transaction. Returns the number of events handled.
+        """
+        batch_size = batch_size or settings.PAYMENT_WEBHOOK_BATCH_SIZE
+        
+        with transaction.atomic():
+            events = list(
+                PaymentWebhookEvent.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', next_attempt_at__lte=timezone.now())
+                .order_by('next_attempt_at')[:batch_size]
+            )
+            # Not due again until the lease runs out, which also retries the
+            # batch of a worker that died; crediting is idempotent per payment
+            PaymentWebhookEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+                next_attempt_at=timezone.now() + timedelta(seconds=settings.PAYMENT_WEBHOOK_LEASE_SECONDS)
+            )
+        
+        for event in events:
+            self._process_webhook_event(event)
+        
+        return len(events)
+    
+    @traced('payment.process_webhook_event')
+    def _process_webhook_event(self, event):
+        event.attempts += 1
+        
+        if event.event != 'payment.captured':
+            event.status = 'ignored'
+        else:
+            try:
+                payment = event.payload['payload']['payment']['entity']
+                # Resolved before the wallet is locked: may call the Razorpay API
+                user = User.objects.get(id=self._get_payment_user_id(payment))
+                with transaction.atomic():
+                    WalletService.process_recharge(
+                        user,
+                        Decimal(payment['amount']) / 100,
+                        payment['id'],
+                        payment.get('order_id'),
+                    )
+                event.status = 'processed'
+            except Exception as e:
+                logger.exception(f"Failed to process webhook event {event.event_id}")
+                event.error_message = str(e)
+                if event.attempts >= settings.PAYMENT_WEBHOOK_MAX_ATTEMPTS:
+                    event.status = 'failed'
+                else:
+                    # Exponential backoff: 30s, 60s, 120s, ...
+                    event.next_attempt_at = timezone.now() + timedelta(seconds=30 * 2 ** (event.attempts - 1))
+        
+        if event.status != 'pending':
+            event.processed_at = timezone.now()
+        event.save(update_fields=['status', 'attempts', 'next_attempt_at', 'error_message', 'processed_at'])
+    
+    def _get_payment_user_id(self, payment):
+        """User id from the payment notes, or from the order they were copied from"""
+        user_id = (payment.get('notes') or {}).get('user_id')
+        if not user_id and payment.get('order_id'):
+            order = self.client.order.fetch(payment['order_id'])
+            user_id = (order.get('notes') or {}).get('user_id')
+        if not user_id:
+            raise ValueError(f"Payment {payment.get('id')} has no user_id note")
+        return user_id
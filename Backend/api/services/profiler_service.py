@@ -0,0 +1,136 @@
+import io
+import time
+import pstats
+import random
+import marshal
+import cProfile
+import logging
+import threading
+from django.conf import settings
+from django.core import signing
+from ..models import ProfileReport
+
+logger = logging.getLogger('api')
+
+PROFILE_HEADER = 'X-Profile-Token'
+PROFILE_TOKEN_SALT = 'api.profiler'
+
+# cProfile hooks the interpreter, and only one profiler can be active at a
+# time: a request that arrives while another is profiled runs unprofiled
+_active = threading.Lock()
+
+
+class RequestProfile:
+    """
+    cProfile plus wall and CPU clocks for one request; use start() / stop().
+    cProfile only sees the thread that enabled it, so under ASGI
+    start_thread() / stop_thread() also profile the executor thread that
+    runs the request's sync code.
+    """
+
+    def __init__(self, trigger):
+        self.trigger = trigger
+        self.profiler = cProfile.Profile()
+        self.thread_profiler = None
+
+    def start(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        self.wall_ms = round((time.perf_counter() - self.wall) * 1000)
+        self.cpu_ms = round((time.process_time() - self.cpu) * 1000)
+        _active.release()
+
+    def start_thread(self):
+        self.thread_profiler = cProfile.Profile()
+        self.thread_profiler.enable()
+
+    def stop_thread(self):
+        if self.thread_profiler is not None:
+            self.thread_profiler.disable()
+
+    def stats(self, stream):
+        """pstats.Stats of every profiled thread"""
+        stats = pstats.Stats(self.profiler, stream=stream)
+        if self.thread_profiler is not None:
+            stats.add(self.thread_profiler)
+        return stats
+
+
+class ProfilerService:
+    """
+    Opt-in request profiling. A request is profiled when it carries a valid
+    signed X-Profile-Token header (see issue_token) or is picked by the
+    PROFILER_SAMPLE_RATE sample. Reports are kept in the database with
+    rotation and browsed in the admin.
+    """
+
+    @staticmethod
+    def issue_token(max_age=None):
+        """Header value that makes requests get profiled until it expires"""
+        max_age = max_age or settings.PROFILER_TOKEN_MAX_AGE
+        return signing.dumps({'expires': int(time.time()) + max_age}, salt=PROFILE_TOKEN_SALT)
+
+    @staticmethod
+    def verify_token(token):
+        try:
+            data = signing.loads(token, salt=PROFILE_TOKEN_SALT)
+        except signing.BadSignature:
+            return False
+        return data.get('expires', 0) > time.time()
+
+    @staticmethod
+    def begin(request):
+        """A started RequestProfile when this request should be profiled, else None"""
+        token = request.headers.get(PROFILE_HEADER)
+        if token and ProfilerService.verify_token(token):
+            trigger = 'header'
+        elif settings.PROFILER_SAMPLE_RATE and random.random() < settings.PROFILER_SAMPLE_RATE:
+            trigger = 'sampled'
+        else:
+            return None
+
+        if not _active.acquire(blocking=False):
+            return None
+        try:
+            profile = RequestProfile(trigger)
+            profile.start()
+        except Exception as e:
+            _active.release()
+            logger.error(f"Failed to start profiling {request.method} {request.path}: {e}")
+            return None
+        return profile
+
+    @staticmethod
+    def save(profile, request, response, view_name):
+        """Store the report and drop the ones beyond PROFILER_MAX_REPORTS"""
+        stream = io.StringIO()
+        stats = profile.stats(stream)
+        stats.sort_stats('cumulative').print_stats(settings.PROFILER_TOP_FUNCTIONS)
+
+        try:
+            report = ProfileReport.objects.create(
+                method=request.method,
+                path=request.path[:500],
+                view_name=view_name[:200],
+                status_code=response.status_code,
+                trigger=profile.trigger,
+                wall_ms=profile.wall_ms,
+                cpu_ms=profile.cpu_ms,
+                stats=stream.getvalue(),
+                profile=marshal.dumps(stats.stats),
+            )
+            ProfilerService.rotate()
+        except Exception as e:
+            # Profiling must never break the request it measured
+            logger.error(f"Failed to save profile of {request.method} {request.path}: {e}")
+            return None
+        return report
+
+    @staticmethod
+    def rotate():
+        keep = ProfileReport.objects.values_list('id', flat=True)[:settings.PROFILER_MAX_REPORTS]
+        return ProfileReport.objects.exclude(id__in=list(keep)).delete()[0]
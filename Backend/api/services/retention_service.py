@@ -0,0 +1,171 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Sum
+from django.utils import timezone
+from ..models import AudioFile, Transcription, StorageUsage
+from .storage_service import StorageService
+from .blob_service import BlobService
+
+logger = logging.getLogger('api')
+
+
+class RetentionService:
+    """
+    Storage quotas and audio eviction.
+
+    Hot audio counts towards a per-user and a global quota, tracked in
+    StorageUsage counters so a check is a single conditional UPDATE. Audio
+    whose transcripts are complete can be evicted in least-recently-used
+    order; the transcript rows are kept.
+    """
+
+    @staticmethod
+    def get_quotas(user):
+        return [
+            (str(user.id), settings.STORAGE_QUOTA_PER_USER, user),
+            (StorageUsage.GLOBAL_KEY, settings.STORAGE_QUOTA_GLOBAL, None),
+        ]
+
+    @staticmethod
+    def try_reserve(key, size, quota):
+        """Atomically add size to a counter unless it would pass the quota"""
+        StorageUsage.objects.get_or_create(key=key)
+        usage = StorageUsage.objects.filter(key=key)
+        if quota is not None:
+            usage = usage.filter(bytes_used__lte=quota - size)
+        return usage.update(bytes_used=F('bytes_used') + size) == 1
+
+    @staticmethod
+    def reserve(user, size):
+        """
+        Reserve quota for a new upload of `size` bytes.
+        When a quota would be exceeded, older evictable audio is evicted first
+        (if STORAGE_EVICT_ON_QUOTA); otherwise the upload is rejected.
+        """
+        reserved = []
+        for key, quota, scope_user in RetentionService.get_quotas(user):
+            if quota is not None and size > quota:
+                RetentionService.release_keys(reserved, size)
+                raise ValueError("File exceeds your storage quota")
+
+            ok = RetentionService.try_reserve(key, size, quota)
+            if not ok and settings.STORAGE_EVICT_ON_QUOTA:
+                used = StorageUsage.objects.get(key=key).bytes_used
+                RetentionService.evict_lru(used + size - quota, user=scope_user)
+                ok = RetentionService.try_reserve(key, size, quota)
+
+            if not ok:
+                RetentionService.release_keys(reserved, size)
+                raise ValueError("Storage quota exceeded. Delete old files to upload more.")
+            reserved.append(key)
+
+    @staticmethod
+    def release(user_id, size):
+        """Return bytes of a hot file that left storage to the user and global counters"""
+        RetentionService.release_keys([str(user_id), StorageUsage.GLOBAL_KEY], size)
+
+    @staticmethod
+    def release_keys(keys, size):
+        if keys and size:
+            StorageUsage.objects.filter(key__in=keys).update(bytes_used=F('bytes_used') - size)
+
+    @staticmethod
+    def touch(audio_file):
+        """Mark audio as used so it moves to the back of the eviction queue"""
+        audio_file.last_accessed_at = timezone.now()
+        AudioFile.objects.filter(pk=audio_file.pk).update(last_accessed_at=audio_file.last_accessed_at)
+
+    @staticmethod
+    def in_flight():
+        """Transcriptions of the outer audio file that still need its bytes"""
+        return Exists(Transcription.objects.filter(audio_file=OuterRef('pk'), status__in=['pending', 'processing']))
+
+    @staticmethod
+    def evictable_audio():
+        """Hot audio with a completed transcript and no transcription in flight, LRU first"""
+        completed = Transcription.objects.filter(audio_file=OuterRef('pk'), status='completed')
+        return AudioFile.objects.filter(
+            storage_state='hot'
+        ).filter(
+            Exists(completed)
+        ).exclude(
+            RetentionService.in_flight()
+        ).order_by('last_accessed_at')
+
+    @staticmethod
+    def evict(audio_file):
+        """
+        Remove an audio file's bytes from storage but keep its row and transcripts.
+        Returns False if another worker already evicted or deleted it, or a
+        transcription was queued for it since it was selected.
+        """
+        with transaction.atomic():
+            claimed = AudioFile.objects.filter(
+                ~RetentionService.in_flight(), pk=audio_file.pk, storage_state='hot'
+            ).update(
+                storage_state='evicted',
+                evicted_at=timezone.now(),
+                blob=None,
+            )
+            if not claimed:
+                return False
+            if audio_file.blob_id:
+                BlobService.release(audio_file.blob_id)
+            RetentionService.release(audio_file.user_id, audio_file.size)
+
+            # Bytes are removed only once the eviction commits, so an upload
+            # that evicts while reserving and then rolls back loses nothing
+            transaction.on_commit(lambda: RetentionService.remove_evicted(audio_file))
+        return True
+
+    @staticmethod
+    def remove_evicted(audio_file):
+        # Shared blobs are only removed once no other audio file uses them
+        if audio_file.blob_id:
+            BlobService.collect(audio_file.blob_id)
+        else:
+            StorageService.delete(audio_file.file_path)
+        logger.info(f"Evicted audio {audio_file.id} ({audio_file.size} bytes)")
+
+    @staticmethod
+    def evict_lru(bytes_needed, user=None):
+        """Evict least-recently-used audio until bytes_needed are freed. Returns bytes freed."""
+        queryset = RetentionService.evictable_audio().only('id', 'user_id', 'file_path', 'blob_id', 'size')
+        if user is not None:
+            queryset = queryset.filter(user=user)
+
+        freed = 0
+        for audio_file in queryset.iterator(chunk_size=100):
+            if freed >= bytes_needed:
+                break
+            if RetentionService.evict(audio_file):
+                freed += audio_file.size
+        return freed
+
+    @staticmethod
+    def evict_idle(days):
+        """Evict audio of completed transcriptions not accessed for `days` days"""
+        cutoff = timezone.now() - timedelta(days=days)
+        queryset = RetentionService.evictable_audio().filter(
+            last_accessed_at__lt=cutoff
+        ).only('id', 'user_id', 'file_path', 'blob_id', 'size')
+
+        return sum(
+            audio_file.size
+            for audio_file in queryset.iterator(chunk_size=100)
+            if RetentionService.evict(audio_file)
+        )
+
+    @staticmethod
+    def recount():
+        """Rebuild all counters from hot audio rows, correcting any drift"""
+        totals = AudioFile.objects.filter(storage_state='hot').values('user_id').annotate(total=Sum('size'))
+        usage = {str(row['user_id']): row['total'] for row in totals}
+        usage[StorageUsage.GLOBAL_KEY] = sum(usage.values())
+
+        StorageUsage.objects.exclude(key__in=usage.keys()).update(bytes_used=0)
+        for key, bytes_used in usage.items():
+            StorageUsage.objects.update_or_create(key=key, defaults={'bytes_used': bytes_used})
+        return usage
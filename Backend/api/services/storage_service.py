@@ -0,0 +1,69 @@
+import posixpath
+from django.core.files.storage import default_storage
+
+
+class StorageService:
+    """
+    Thin layer over default_storage so callers never assume files live on
+    local disk. Works with FileSystemStorage and S3-compatible backends.
+    """
+
+    @staticmethod
+    def is_local():
+        """True when the configured storage exposes filesystem paths"""
+        try:
+            default_storage.path('')
+            return True
+        except NotImplementedError:
+            return False
+
+    @staticmethod
+    def get_engine_source(name):
+        """
+        Location a transcription engine can read the file from: the local
+        path on disk storage, or a presigned GET URL on object storage so the
+        engine downloads it directly instead of through a worker.
+        """
+        if not default_storage.exists(name):
+            raise FileNotFoundError(f"{name} not found in storage")
+
+        if StorageService.is_local():
+            return default_storage.path(name)
+        return default_storage.url(name)
+
+    @staticmethod
+    def get_download_url(name, expires_in):
+        """Presigned GET URL on object storage; Range requests go straight to storage"""
+        return default_storage.url(name, expire=expires_in)
+    
+    @staticmethod
+    def create_presigned_upload(name, content_type, expires_in):
+        """
+        Presigned PUT request a client can use to upload straight to storage.
+        """
+        if StorageService.is_local():
+            raise ValueError("Direct uploads require object storage")
+
+        key = posixpath.join(default_storage.location, name) if default_storage.location else name
+        url = default_storage.connection.meta.client.generate_presigned_url(
+            'put_object',
+            Params={
+                'Bucket': default_storage.bucket_name,
+                'Key': key,
+                'ContentType': content_type,
+            },
+            ExpiresIn=expires_in,
+            HttpMethod='PUT',
+        )
+
+        return {
+            'url': url,
+            'method': 'PUT',
+            'headers': {'Content-Type': content_type},
+        }
+
+    @staticmethod
+    def delete(name):
+        # An empty name would resolve to the storage root
+        if name and default_storage.exists(name):
+            default_storage.delete(name)
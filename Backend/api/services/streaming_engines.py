@@ -0,0 +1,126 @@
+import json
+import asyncio
+from urllib.parse import urlencode
+from django.conf import settings
+
+_END = object()
+
+
+class FakeStreamingStream:
+    """
+    One stream of the fake engine: recognises one word per second of audio
+    and settles a final segment every `segment_seconds` words.
+    """
+
+    def __init__(self, sample_rate, segment_seconds, latency):
+        self.bytes_per_word = 2 * sample_rate
+        self.segment_seconds = segment_seconds
+        self.latency = latency
+        self.received = 0
+        self.words = 0
+        self.segment = []
+        self.results_queue = asyncio.Queue()
+
+    async def send(self, chunk):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.received += len(chunk)
+        while self.words < self.received // self.bytes_per_word:
+            self.words += 1
+            self.segment.append(f'word{self.words}')
+            if len(self.segment) == self.segment_seconds:
+                self._settle()
+            else:
+                self.results_queue.put_nowait({'type': 'partial', 'text': ' '.join(self.segment)})
+
+    async def finish(self):
+        if self.segment:
+            self._settle()
+        self.results_queue.put_nowait(_END)
+
+    async def results(self):
+        while (result := await self.results_queue.get()) is not _END:
+            yield result
+
+    async def aclose(self):
+        pass
+
+    def _settle(self):
+        self.results_queue.put_nowait({
+            'type': 'final',
+            'text': ' '.join(self.segment),
+            'start': float(self.words - len(self.segment)),
+            'end': float(self.words),
+        })
+        self.segment = []
+
+
+class FakeStreamingEngine:
+    """Local engine for tests and development, selected with LIVE_TRANSCRIPTION_ENGINE=fake"""
+
+    def __init__(self, segment_seconds=3, latency=0):
+        self.segment_seconds = segment_seconds
+        self.latency = latency
+
+    async def open(self, sample_rate, language_code=None):
+        return FakeStreamingStream(sample_rate, self.segment_seconds, self.latency)
+
+
+class AssemblyAIStream:
+    """One AssemblyAI streaming (v3) connection"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def send(self, chunk):
+        await self.connection.send(chunk)
+
+    async def finish(self):
+        await self.connection.send(json.dumps({'type': 'Terminate'}))
+
+    async def results(self):
+        async for message in self.connection:
+            data = json.loads(message)
+            if data.get('type') == 'Termination':
+                return
+            if data.get('type') != 'Turn':
+                continue
+
+            words = data.get('words') or []
+            if not data.get('end_of_turn'):
+                yield {'type': 'partial', 'text': data.get('transcript', '')}
+            elif data.get('turn_is_formatted'):
+                # With format_turns a turn ends twice: raw, then formatted
+                yield {
+                    'type': 'final',
+                    'text': data.get('transcript', ''),
+                    'start': words[0]['start'] / 1000 if words else None,
+                    'end': words[-1]['end'] / 1000 if words else None,
+                }
+
+    async def aclose(self):
+        await self.connection.close()
+
+
+class AssemblyAIStreamingEngine:
+    """AssemblyAI real-time transcription over its streaming WebSocket API"""
+    URL = 'wss://streaming.assemblyai.com/v3/ws'
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key if api_key is not None else settings.ASSEMBLYAI_API_KEY
+
+    async def open(self, sample_rate, language_code=None):
+        # The streaming API picks its model per connection and takes no
+        # language code; language_code is accepted for interface parity
+        from websockets.asyncio.client import connect
+
+        query = urlencode({'sample_rate': sample_rate, 'encoding': 'pcm_s16le', 'format_turns': 'true'})
+        connection = await connect(f'{self.URL}?{query}', additional_headers={'Authorization': self.api_key})
+        return AssemblyAIStream(connection)
+
+
+def get_streaming_engine():
+    """Engine configured by LIVE_TRANSCRIPTION_ENGINE ('assemblyai' or 'fake')"""
+    if settings.LIVE_TRANSCRIPTION_ENGINE == 'fake':
+        return FakeStreamingEngine()
+    return AssemblyAIStreamingEngine()
@@ -0,0 +1,118 @@
+import math
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from django.utils import timezone
+from ..models import TranscriptionTiming
+
+logger = logging.getLogger('api')
+
+MB = 1024 * 1024
+
+# (upper bound in bytes, label); the last bucket is open-ended
+SIZE_BUCKETS = [
+    (1 * MB, '< 1 MB'),
+    (10 * MB, '1-10 MB'),
+    (50 * MB, '10-50 MB'),
+    (None, '50 MB+'),
+]
+
+PERCENTILES = (50, 95, 99)
+
+
+class TelemetryService:
+    """
+    Per-job pipeline timings (see TranscriptionTiming) and the percentile
+    report the admin shows for them.
+    """
+
+    # Columns summarised by the report
+    METRICS = ['total_ms', 'queue_ms', 'upload_ms', 'engine_ms', 'billing_ms', 'realtime_factor']
+
+    @staticmethod
+    def record(transcription, timer):
+        """Save the timings of a finished (completed or failed) job; replaces an earlier attempt's"""
+        if transcription.status not in ('completed', 'failed'):
+            return  # another worker owns the job now and records its own run
+        audio_file = transcription.audio_file
+        audio_seconds = float(transcription.duration) * 60
+        engine_seconds = timer.seconds('engine')
+        queue_ms = 0
+        if transcription.started_at and transcription.created_at:
+            queue_ms = max(round((transcription.started_at - transcription.created_at).total_seconds() * 1000), 0)
+
+        try:
+            TranscriptionTiming.objects.update_or_create(
+                transcription_id=transcription.id,
+                defaults={
+                    'status': transcription.status,
+                    'language': transcription.language,
+                    'format': audio_file.format,
+                    'file_size': audio_file.size,
+                    'audio_seconds': audio_seconds,
+                    'bytes_sent': timer.bytes_sent,
+                    'queue_ms': queue_ms,
+                    'upload_ms': timer.ms('upload'),
+                    'engine_ms': timer.ms('engine'),
+                    'billing_ms': timer.ms('billing'),
+                    'total_ms': timer.total_ms(),
+                    'realtime_factor': round(engine_seconds / audio_seconds, 4) if audio_seconds else None,
+                    'attempts': max(transcription.attempts, 1),
+                },
+            )
+        except Exception as e:
+            # Telemetry must never fail the job it describes
+            logger.error(f"Failed to record timings for transcription {transcription.id}: {e}")
+
+    @staticmethod
+    def size_bucket(size):
+        for limit, label in SIZE_BUCKETS:
+            if limit is None or size < limit:
+                return label
+
+    @staticmethod
+    def percentile(values, q):
+        """q-th percentile of sorted values, interpolating between the closest ranks"""
+        if not values:
+            return None
+        rank = (len(values) - 1) * q / 100
+        low, high = math.floor(rank), math.ceil(rank)
+        return values[low] + (values[high] - values[low]) * (rank - low)
+
+    @staticmethod
+    def summarize(rows):
+        """Count and p50/p95/p99 of each metric over rows (dicts of TranscriptionTiming values)"""
+        summary = {'count': len(rows)}
+        for metric in TelemetryService.METRICS:
+            values = sorted(row[metric] for row in rows if row[metric] is not None)
+            summary[metric] = {
+                f'p{q}': TelemetryService.percentile(values, q) for q in PERCENTILES
+            }
+        return summary
+
+    @staticmethod
+    def report(days=30, status='completed'):
+        """
+        Percentiles of the jobs recorded in the last `days` days, overall
+        and grouped by language, format and file size bucket.
+        """
+        queryset = TranscriptionTiming.objects.filter(recorded_at__gte=timezone.now() - timedelta(days=days))
+        if status:
+            queryset = queryset.filter(status=status)
+        rows = list(queryset.values('language', 'format', 'file_size', *TelemetryService.METRICS))
+
+        groups = {'language': defaultdict(list), 'format': defaultdict(list), 'size': defaultdict(list)}
+        for row in rows:
+            groups['language'][row['language']].append(row)
+            groups['format'][row['format']].append(row)
+            groups['size'][TelemetryService.size_bucket(row['file_size'])].append(row)
+
+        bucket_order = [label for _, label in SIZE_BUCKETS]
+        return {
+            'overall': TelemetryService.summarize(rows),
+            'language': {key: TelemetryService.summarize(group) for key, group in sorted(groups['language'].items())},
+            'format': {key: TelemetryService.summarize(group) for key, group in sorted(groups['format'].items())},
+            'size': {
+                key: TelemetryService.summarize(groups['size'][key]) for key in bucket_order if key in groups['size']
+            },
+        }
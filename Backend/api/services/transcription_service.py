@@ -1,17 +1,30 @@
+import io
 import os
 import logging
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.db import transaction
-from django.utils import timezone
 import assemblyai as aai
-from ..models import Transcription, AudioFile
+from ..models import Transcription, TranscriptSegment, AudioFile
 from .wallet_service import WalletService
+from .storage_service import StorageService
+from .retention_service import RetentionService
+from .audio_service import AudioWindows
+from .assemblyai_client import AsyncAssemblyAIClient
+from .lease_service import LeaseService, LeaseHeartbeat, LeaseLost
+from .transcription_state import TranscriptionStateMachine, TransitionLost
+from .telemetry_service import TelemetryService
+from ..utils.telemetry import PipelineTimer
+from ..utils.metrics import observe_engine
+from ..utils.tracing import traced, current_context, resumed_span
+from ..utils.status_hub import get_hub, status_event, progress_event
 
 logger = logging.getLogger('api')
 
 
 class TranscriptionService:
     @staticmethod
+    @traced('transcription.create')
     def create_transcription(audio_file_id, language, user):
         """
         Create transcription request with cost validation.
@@ -22,6 +35,9 @@ class TranscriptionService:
         except AudioFile.DoesNotExist:
             raise ValueError("Audio file not found")
         
+        if audio_file.storage_state != 'hot':
+            raise ValueError("Audio file was removed by the storage retention policy. Please re-upload it.")
+        
         # Check if user has sufficient balance
         has_balance, estimated_cost = WalletService.check_sufficient_balance(
             user, 
@@ -38,93 +54,286 @@ class TranscriptionService:
             language=language,
             duration=audio_file.duration,
             cost=estimated_cost,
-            status='pending'
+            status='pending',
+            trace_context=current_context(),
         )
         
         return transcription
     
     @staticmethod
-    @transaction.atomic
-    def process_transcription(transcription):
+    def get_language_code(language):
+        """Map a transcription language to an AssemblyAI language code"""
+        if language == 'auto':
+            return None  # Auto-detect
+        return 'en' if language == 'english' else 'hi'
+    
+    @staticmethod
+    def start_processing(transcription, owner):
         """
-        Process transcription using AssemblyAI API.
-        Property 8: Transcription Processing
-        Property 9: Transcription Result Persistence
-        Property 10: Transcription Error Handling
+        Claim the job for `owner` (raises LeaseLost if another worker has it)
+        and return where the engine can read the audio: the local path on
+        disk storage, a presigned URL on object storage.
         """
-        try:
-            logger.info(f"Starting transcription {transcription.id} for user {transcription.user.id}")
-            
-            # Update status to processing
-            transcription.status = 'processing'
-            transcription.save()
-            
-            # Get audio file path
-            audio_path = os.path.join(
-                settings.MEDIA_ROOT, 
-                transcription.audio_file.file_path
-            )
-            
-            if not os.path.exists(audio_path):
-                logger.error(f"Audio file not found for transcription {transcription.id}: {transcription.audio_file.file_path}",
-                           extra={'user_id': str(transcription.user.id)})
-                raise FileNotFoundError("Audio file not found on disk")
-            
-            # Configure AssemblyAI
-            aai.settings.api_key = settings.ASSEMBLYAI_API_KEY
-            
-            # Map language to AssemblyAI language codes
-            if transcription.language == 'auto':
-                language_code = None  # Auto-detect
-            else:
-                language_code = 'en' if transcription.language == 'english' else 'hi'
-            
-            # Configure transcription settings
-            config = aai.TranscriptionConfig(
-                language_code=language_code,
-                punctuate=True,
-                format_text=True
+        if not LeaseService.claim(transcription, owner):
+            raise LeaseLost(f"Transcription {transcription.id} is already being processed")
+        
+        logger.info(f"Starting transcription {transcription.id} for user {transcription.user.id} "
+                    f"(attempt {transcription.attempts})")
+        TranscriptionService.publish_status(transcription)
+        
+        RetentionService.touch(transcription.audio_file)
+        
+        return StorageService.get_engine_source(transcription.audio_file.storage_path)
+    
+    @staticmethod
+    def complete_transcription(transcription, text, owner):
+        """
+        Charge the user and store the transcript. Runs under the row lock
+        and only while `owner` still holds the lease, so a job retried after
+        a worker died is charged exactly once.
+        """
+        with transaction.atomic():
+            # Only one worker's conditional UPDATE can match; the debit
+            # commits (or rolls back) together with it
+            TranscriptionService.finish_leased(
+                transcription, 'completed', owner,
+                text=text,
+                lease_owner=None,
+                lease_expires_at=None,
             )
             
-            transcriber = aai.Transcriber(config=config)
-            transcript = transcriber.transcribe(audio_path)
-            
-            # Check if transcription was successful
-            if transcript.status == aai.TranscriptStatus.error:
-                raise Exception(f"Transcription failed: {transcript.error}")
-            
             # Deduct cost from wallet
             transaction_obj, actual_cost = WalletService.deduct_transcription_cost(
                 transcription.user,
                 float(transcription.duration)
             )
-            
-            # Update transcription with result
-            transcription.text = transcript.text
+            transcription.charge = transaction_obj
             transcription.cost = actual_cost
-            transcription.status = 'completed'
-            transcription.completed_at = timezone.now()
-            transcription.save()
-            
-            logger.info(f"Transcription {transcription.id} completed successfully")
-            
-            return transcription
-            
-        except FileNotFoundError as e:
-            logger.error(f"Audio file not found for transcription {transcription.id}: {transcription.audio_file.file_path}",
+            transcription.save(update_fields=['charge', 'cost'])
+        TranscriptionService.publish_status(transcription)
+        
+        logger.info(f"Transcription {transcription.id} completed successfully")
+        return transcription
+    
+    @staticmethod
+    def fail_transcription(transcription, error, owner):
+        """Record the error, unless the lease has passed to another worker meanwhile"""
+        if isinstance(error, FileNotFoundError):
+            logger.error(f"Audio file not found for transcription {transcription.id}: {transcription.audio_file.storage_path}",
                         extra={'user_id': str(transcription.user.id)})
-            transcription.status = 'failed'
             transcription.error_message = "Audio file not found. Please re-upload your file."
-            transcription.save()
-            raise
-            
-        except Exception as e:
+        else:
             logger.exception(f"Unexpected error in transcription {transcription.id}",
                            extra={'user_id': str(transcription.user.id)})
-            transcription.status = 'failed'
             transcription.error_message = "An unexpected error occurred. Our team has been notified."
-            transcription.save()
-            raise
+        
+        try:
+            TranscriptionService.finish_leased(
+                transcription, 'failed', owner,
+                error_message=transcription.error_message,
+                lease_owner=None,
+                lease_expires_at=None,
+            )
+        except LeaseLost:
+            logger.warning(f"Not failing transcription {transcription.id}: lease lost")
+            return
+        TranscriptionService.publish_status(transcription)
+    
+    @staticmethod
+    def finish_leased(transcription, target, owner, **fields):
+        """Move a job out of processing while `owner` holds its lease; LeaseLost otherwise"""
+        try:
+            return TranscriptionStateMachine.transition(
+                transcription, 'processing', target, expect={'lease_owner': owner}, **fields
+            )
+        except TransitionLost:
+            raise LeaseLost(f"Lease on transcription {transcription.id} lost")
+    
+    @staticmethod
+    def resume_at(transcription):
+        """Seconds of audio already transcribed: windows saved as segments are skipped"""
+        return transcription.segments.order_by('-position').values_list('end', flat=True).first() or 0.0
+    
+    @staticmethod
+    def next_window(transcription, audio_source, audio, start):
+        """
+        What to send the engine for the window starting at `start`, and where
+        that window ends. Audio up to TRANSCRIPTION_WINDOW_SECONDS long is
+        sent whole (the stored file itself); longer audio is cut (through
+        `audio`, an AudioWindows) so each part of the transcript lands as soon
+        as it is ready.
+        """
+        total = float(transcription.duration) * 60
+        end = min(start + settings.TRANSCRIPTION_WINDOW_SECONDS, total)
+        if start == 0 and end >= total:
+            return audio_source, total
+        search = min(settings.TRANSCRIPTION_WINDOW_SEARCH_SECONDS, (end - start) / 2) if end < total else 0
+        return audio.read(start, end, search)
+    
+    @staticmethod
+    def upload_source(transcriber, source, timer):
+        """Send a window's audio to the engine (unless it can fetch it itself); returns its URL"""
+        if isinstance(source, str) and source.startswith(('http://', 'https://')):
+            return source
+        if isinstance(source, bytes):
+            timer.bytes_sent += len(source)
+            return transcriber.upload_file(io.BytesIO(source))
+        timer.bytes_sent += os.path.getsize(source)
+        return transcriber.upload_file(source)
+    
+    @staticmethod
+    def append_segment(transcription, start, end, text):
+        """Save the next piece of the transcript and tell waiting clients"""
+        position = transcription.segments.count()
+        segment = TranscriptSegment.objects.create(
+            transcription=transcription,
+            position=position,
+            start=start,
+            end=end,
+            text=text or '',  # the engine returns no text for a silent window
+        )
+        
+        total = float(transcription.duration) * 60
+        percent = round(min(end / total, 1) * 100, 1) if total else 100.0
+        get_hub().publish(transcription.id, progress_event(transcription.id, 'segment', percent))
+        return segment
+    
+    @staticmethod
+    def get_partial_result(transcription):
+        """Transcript saved so far and the percentage of the audio it covers"""
+        if transcription.status == 'completed':
+            return transcription.text, 100.0
+        
+        segments = list(transcription.segments.values_list('text', 'end'))
+        text = ' '.join(segment_text for segment_text, _ in segments if segment_text)
+        total = float(transcription.duration) * 60
+        if not segments or not total:
+            return text, 0.0
+        return text, round(min(segments[-1][1] / total, 1) * 100, 1)
+    
+    @staticmethod
+    def segments_text(transcription):
+        return ' '.join(t for t in transcription.segments.values_list('text', flat=True) if t)
+    
+    @staticmethod
+    def publish_status(transcription):
+        """Push the new status to clients waiting in this process (SSE and long-poll)"""
+        get_hub().publish(
+            transcription.id,
+            status_event(transcription.id, transcription.status, transcription.error_message),
+        )
+    
+    @staticmethod
+    def process_transcription(transcription, owner=None):
+        """
+        Process transcription using AssemblyAI API.
+        Not wrapped in one transaction: each segment has to be visible to
+        readers as soon as it is saved. The job's lease is renewed while the
+        engine works; if another worker has (or takes over) the job, this
+        returns its current state without writing anything.
+        Property 8: Transcription Processing
+        Property 9: Transcription Result Persistence
+        Property 10: Transcription Error Handling
+        """
+        with resumed_span('transcription.process', transcription.trace_context, {'transcription.id': str(transcription.id)}):
+            owner = owner or LeaseService.new_owner()
+            timer = PipelineTimer()
+            try:
+                audio_source = TranscriptionService.start_processing(transcription, owner)
+            
+                # Configure AssemblyAI
+                aai.settings.api_key = settings.ASSEMBLYAI_API_KEY
+            
+                # Configure transcription settings
+                config = aai.TranscriptionConfig(
+                    language_code=TranscriptionService.get_language_code(transcription.language),
+                    punctuate=True,
+                    format_text=True
+                )
+            
+                transcriber = aai.Transcriber(config=config)
+                total = float(transcription.duration) * 60
+                with LeaseHeartbeat(transcription.id, owner) as lease, AudioWindows(transcription.audio_file) as audio:
+                    start = TranscriptionService.resume_at(transcription)
+                    while start < total:
+                        source, end = TranscriptionService.next_window(transcription, audio_source, audio, start)
+                        with timer.phase('upload'):
+                            audio_url = TranscriptionService.upload_source(transcriber, source, timer)
+                        with timer.phase('engine'), observe_engine('assemblyai'):
+                            transcript = transcriber.transcribe(audio_url)
+                        
+                            # Check if transcription was successful
+                            if transcript.status == aai.TranscriptStatus.error:
+                                raise Exception(f"Transcription failed: {transcript.error}")
+                    
+                        lease.check()
+                        TranscriptionService.append_segment(transcription, start, end, transcript.text)
+                        start = end
+            
+                    with timer.phase('billing'):
+                        TranscriptionService.complete_transcription(
+                            transcription, TranscriptionService.segments_text(transcription), owner
+                        )
+                TelemetryService.record(transcription, timer)
+                return transcription
+        
+            except LeaseLost as e:
+                logger.warning(str(e))
+                transcription.refresh_from_db()
+                return transcription
+            except Exception as e:
+                TranscriptionService.fail_transcription(transcription, e, owner)
+                TelemetryService.record(transcription, timer)
+                raise
+    
+    @staticmethod
+    async def aprocess_transcription(transcription, engine=None, owner=None):
+        """
+        Native async variant of process_transcription for the ASGI path.
+        The engine is awaited through a non-blocking HTTP client while the
+        database steps run in threads, so one worker can have many
+        transcriptions in flight.
+        """
+        engine = engine or AsyncAssemblyAIClient()
+        with resumed_span('transcription.process', transcription.trace_context, {'transcription.id': str(transcription.id)}):
+            owner = owner or LeaseService.new_owner()
+            timer = PipelineTimer()
+            try:
+                audio_source = await sync_to_async(TranscriptionService.start_processing)(transcription, owner)
+                start = await sync_to_async(TranscriptionService.resume_at)(transcription)
+                total = float(transcription.duration) * 60
+                async with LeaseHeartbeat(transcription.id, owner) as lease:
+                    with AudioWindows(transcription.audio_file) as audio:
+                        while start < total:
+                            source, end = await sync_to_async(TranscriptionService.next_window)(
+                                transcription, audio_source, audio, start
+                            )
+                            text = await engine.transcribe(
+                                source,
+                                TranscriptionService.get_language_code(transcription.language),
+                                on_progress=lambda stage: get_hub().publish(
+                                    transcription.id, progress_event(transcription.id, stage)
+                                ),
+                                timer=timer,
+                                duration=end - start,
+                            )
+                            lease.check()
+                            await sync_to_async(TranscriptionService.append_segment)(transcription, start, end, text)
+                            start = end
+                
+                    text = await sync_to_async(TranscriptionService.segments_text)(transcription)
+                    with timer.phase('billing'):
+                        await sync_to_async(TranscriptionService.complete_transcription)(transcription, text, owner)
+                await sync_to_async(TelemetryService.record)(transcription, timer)
+                return transcription
+            except LeaseLost as e:
+                logger.warning(str(e))
+                await transcription.arefresh_from_db()
+                return transcription
+            except Exception as e:
+                await sync_to_async(TranscriptionService.fail_transcription)(transcription, e, owner)
+                await sync_to_async(TelemetryService.record)(transcription, timer)
+                raise
     
     @staticmethod
     def get_transcription_history(user, filters=None):
@@ -132,7 +341,7 @@ class TranscriptionService:
         Get user's transcription history with optional filters.
         Property 21: Usage History Filtering
         """
-        queryset = Transcription.objects.filter(user=user)
+        queryset = Transcription.objects.filter(user=user, deleted_at__isnull=True)
         
         if filters:
             if 'language' in filters:
@@ -0,0 +1,79 @@
+from django.db.models.expressions import Combinable
+from django.utils import timezone
+from ..models import Transcription
+
+
+class InvalidTransition(Exception):
+    """The requested status change is not allowed by the state machine"""
+
+
+class TransitionLost(Exception):
+    """The row was not in the expected state: another worker moved it first"""
+
+
+class TranscriptionStateMachine:
+    """
+    Status changes of a transcription, each done as one conditional
+    UPDATE ... WHERE status = <expected> that writes only the columns it
+    changes. A transition that is not allowed raises InvalidTransition
+    before touching the database; one that finds the row in another state
+    raises TransitionLost and writes nothing, so a finished job is never
+    overwritten.
+
+        pending -> processing -> completed
+                       |     \\-> failed
+                       \\-> pending  (requeued after a crash, or handed back)
+    """
+
+    TRANSITIONS = {
+        'pending': {'processing'},
+        'processing': {'completed', 'failed', 'pending'},
+        'completed': set(),
+        'failed': set(),
+    }
+
+    # Column stamped when a transition lands in the state
+    TIMESTAMPS = {
+        'processing': 'started_at',
+        'completed': 'completed_at',
+        'failed': 'failed_at',
+    }
+
+    @staticmethod
+    def changes(source, target, fields):
+        if target not in TranscriptionStateMachine.TRANSITIONS.get(source, ()):
+            raise InvalidTransition(f"Cannot move a transcription from {source} to {target}")
+
+        now = timezone.now()
+        values = {'status': target, 'status_changed_at': now, **fields}
+        if target in TranscriptionStateMachine.TIMESTAMPS:
+            values[TranscriptionStateMachine.TIMESTAMPS[target]] = now
+        return values
+
+    @staticmethod
+    def transition(transcription, source, target, expect=None, **fields):
+        """
+        Move one transcription from `source` to `target`, also setting
+        `fields`. `expect` adds conditions (e.g. the lease owner). The
+        instance is updated to match the row.
+        """
+        values = TranscriptionStateMachine.changes(source, target, fields)
+        updated = Transcription.objects.filter(
+            id=transcription.id, status=source, **(expect or {})
+        ).update(**values)
+        if not updated:
+            raise TransitionLost(f"Transcription {transcription.id} is no longer {source}")
+
+        expressions = [name for name, value in values.items() if isinstance(value, Combinable)]
+        for name, value in values.items():
+            if name not in expressions:
+                setattr(transcription, name, value)
+        if expressions:
+            transcription.refresh_from_db(fields=expressions)
+        return transcription
+
+    @staticmethod
+    def transition_many(queryset, source, target, **fields):
+        """Move every row of `queryset` still in `source`; returns how many moved"""
+        values = TranscriptionStateMachine.changes(source, target, fields)
+        return queryset.filter(status=source).update(**values)
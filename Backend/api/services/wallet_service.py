@@ -1,12 +1,27 @@
 from django.db import transaction
-from decimal import Decimal
+from decimal import Decimal, ROUND_UP
 from ..models import Wallet, Transaction
 from django.conf import settings
 from ..utils.decorators import retry_on_deadlock
+from ..utils.metrics import WALLET_LOCK_WAIT
+from ..utils.tracing import traced
 import math
+import time
+import logging
+
+logger = logging.getLogger('api')
 
 
 class WalletService:
+    @staticmethod
+    @traced('wallet.lock')
+    def lock_wallet(user):
+        """Lock the user's wallet row for the rest of the transaction, timing the wait"""
+        start = time.perf_counter()
+        wallet = Wallet.objects.select_for_update().get(user=user)
+        WALLET_LOCK_WAIT.observe(time.perf_counter() - start)
+        return wallet
+    
     @staticmethod
     def check_sufficient_balance(user, duration_minutes):
         """
@@ -47,6 +62,7 @@ class WalletService:
         return max(cost, Decimal('0.00'))
     
     @staticmethod
+    @traced('wallet.deduct_transcription_cost')
     @retry_on_deadlock(max_retries=3)
     @transaction.atomic
     def deduct_transcription_cost(user, duration_minutes):
@@ -55,60 +71,35 @@ class WalletService:
         Property 13: Demo Minutes Priority in Billing
         Property 16: Transaction Record Creation
         """
-        print(f"\n[WALLET] deduct_transcription_cost() called")
-        print(f"[WALLET] User ID: {user.id}")
-        print(f"[WALLET] Duration: {duration_minutes} minutes")
-        
-        print(f"[WALLET] Acquiring wallet lock (select_for_update)...")
-        wallet = Wallet.objects.select_for_update().get(user=user)
-        print(f"[WALLET] ✓ Wallet lock acquired")
+        wallet = WalletService.lock_wallet(user)
         
         duration = Decimal(str(duration_minutes))
         duration_rounded = Decimal(math.ceil(float(duration)))
-        print(f"[WALLET] Duration rounded: {duration_rounded} minutes")
         
         balance_before = wallet.balance
         demo_before = wallet.demo_minutes_remaining
-        print(f"[WALLET] Balance before: ₹{balance_before}")
-        print(f"[WALLET] Demo minutes before: {demo_before}")
         
         # Track the billed minutes (rounded up)
         billed_minutes = duration_rounded
         
         # Deduct from demo minutes first
-        print(f"[WALLET] Deducting from demo minutes...")
         if wallet.demo_minutes_remaining > 0:
             demo_used = min(wallet.demo_minutes_remaining, duration_rounded)
-            print(f"[WALLET] Demo used: {demo_used} minutes")
             wallet.demo_minutes_remaining -= demo_used
             duration_rounded -= demo_used
-            print(f"[WALLET] Demo remaining: {wallet.demo_minutes_remaining}")
-            print(f"[WALLET] Duration remaining: {duration_rounded} minutes")
         
         # Deduct remaining from wallet balance
-        print(f"[WALLET] Deducting from wallet balance...")
         cost = Decimal('0.00')
         if duration_rounded > 0:
             cost = duration_rounded * Decimal(str(settings.COST_PER_MINUTE))
-            print(f"[WALLET] Cost to deduct: ₹{cost}")
             wallet.balance -= cost
             wallet.total_spent += cost
-            print(f"[WALLET] Balance after: ₹{wallet.balance}")
-            print(f"[WALLET] Total spent: ₹{wallet.total_spent}")
-        else:
-            print(f"[WALLET] No balance deduction needed (covered by demo)")
         
         # Track billed minutes (rounded up) instead of actual duration
         wallet.total_minutes_used += billed_minutes
-        print(f"[WALLET] Billed minutes: {billed_minutes}")
-        print(f"[WALLET] Total minutes used: {wallet.total_minutes_used}")
-        
-        print(f"[WALLET] Saving wallet to database...")
         wallet.save()
-        print(f"[WALLET] ✓ Wallet saved")
         
         # Create transaction record
-        print(f"[WALLET] Creating transaction record...")
         transaction_obj = Transaction.objects.create(
             wallet=wallet,
             type='debit',
@@ -117,23 +108,81 @@ class WalletService:
             balance_after=wallet.balance,
             description=f'Transcription cost for {duration_minutes:.2f} minutes (Billed: {billed_minutes} min, Demo: {demo_before:.2f} -> {wallet.demo_minutes_remaining:.2f})'
         )
-        print(f"[WALLET] ✓ Transaction created with ID: {transaction_obj.id}")
-        print(f"[WALLET] Transaction type: {transaction_obj.type}")
-        print(f"[WALLET] Transaction amount: ₹{transaction_obj.amount}")
-        print(f"[WALLET] ✓ deduct_transcription_cost() completed\n")
+        logger.debug(
+            f"Charged {cost} for {billed_minutes} min (balance {balance_before} -> {wallet.balance}, "
+            f"demo {demo_before} -> {wallet.demo_minutes_remaining})",
+            extra={'user_id': str(user.id), 'transaction_id': str(transaction_obj.id),
+                   'sample_rate': settings.LOG_DEBUG_SAMPLE_RATE},
+        )
+        
+        return transaction_obj, cost
+    
+    @staticmethod
+    @traced('wallet.deduct_streaming_cost')
+    @retry_on_deadlock(max_retries=3)
+    @transaction.atomic
+    def deduct_streaming_cost(user, duration_minutes, transaction_obj=None, description=''):
+        """
+        Charge an increment of live-streamed audio. Unlike batch transcriptions
+        the duration is not rounded up to whole minutes. Demo minutes are used
+        first, then wallet balance. Pass the session's transaction to fold
+        the increment into it instead of recording a new one.
+        Raises ValueError if the wallet cannot cover the increment.
+        """
+        wallet = WalletService.lock_wallet(user)
+        
+        duration = Decimal(str(duration_minutes))
+        demo_used = min(wallet.demo_minutes_remaining, duration)
+        cost = ((duration - demo_used) * Decimal(str(settings.COST_PER_MINUTE))).quantize(
+            Decimal('0.01'), rounding=ROUND_UP
+        )
+        if cost > wallet.balance:
+            raise ValueError('Insufficient balance')
+        
+        balance_before = wallet.balance
+        wallet.demo_minutes_remaining -= demo_used
+        wallet.balance -= cost
+        wallet.total_spent += cost
+        wallet.total_minutes_used += duration
+        wallet.save()
+        
+        if transaction_obj is None:
+            transaction_obj = Transaction.objects.create(
+                wallet=wallet,
+                type='debit',
+                amount=cost,
+                balance_before=balance_before,
+                balance_after=wallet.balance,
+                description=description
+            )
+        else:
+            transaction_obj.amount += cost
+            transaction_obj.balance_after = wallet.balance
+            transaction_obj.description = description
+            transaction_obj.save(update_fields=['amount', 'balance_after', 'description'])
         
         return transaction_obj, cost
     
     @staticmethod
+    @traced('wallet.process_recharge')
     @retry_on_deadlock(max_retries=3)
     @transaction.atomic
     def process_recharge(user, amount, payment_id, razorpay_order_id):
         """
         Credit wallet after successful payment.
+        Idempotent per payment_id: verify_payment and the webhook inbox may both
+        report the same payment, and only the first credit is applied.
         Property 18: Payment Webhook Processing
         Property 16: Transaction Record Creation
         """
-        wallet = Wallet.objects.select_for_update().get(user=user)
+        wallet = WalletService.lock_wallet(user)
+        
+        existing = Transaction.objects.filter(
+            wallet=wallet, type='recharge', payment_id=payment_id
+        ).first()
+        if existing:
+            return existing
+        
         balance_before = wallet.balance
         
         amount_decimal = Decimal(str(amount))
@@ -0,0 +1,33 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from .models import User, AudioFile
+from .services.blob_service import BlobService
+from .utils.cookie_auth import invalidate_cached_user
+from .utils import query_count
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Keep cached auth users in sync with deactivation, edits and deletes"""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def release_user_audio_blobs(sender, instance, **kwargs):
+    """
+    Drop the blob references of a deleted user's audio before it cascades;
+    unreferenced blobs are removed by BlobService.collect_garbage. Audio
+    deleted on its own releases its reference where it is deleted, which
+    keeps bulk deletes of AudioFile a single query.
+    """
+    BlobService.release_all(
+        AudioFile.objects.select_for_update().filter(user=instance).values_list('blob_id', flat=True)
+    )
+
+
+@receiver(connection_created)
+def count_connection_queries(sender, connection, **kwargs):
+    """Every connection reports its queries to QueryCountMiddleware"""
+    query_count.install(connection)
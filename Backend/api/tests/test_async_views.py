@@ -0,0 +1,139 @@
+import time
+import asyncio
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
+import httpx
+from asgiref.sync import sync_to_async
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from api.models import User, Wallet, Transcription
+from api.services.assemblyai_client import AsyncAssemblyAIClient
+from api.services.audio_service import AudioService
+from api.services.auth_service import AuthService
+from api.services.transcription_service import TranscriptionService
+from api.tests.test_storage import make_wav
+
+ENGINE_LATENCY = 0.3
+
+
+def fake_engine(latency=0, status='completed', max_wait=None):
+    """AssemblyAI client backed by an in-process transport that answers after `latency` seconds"""
+    async def handler(request):
+        if request.url.path == '/v2/upload':
+            await request.aread()
+            return httpx.Response(200, json={'upload_url': 'https://cdn.example/audio'})
+        if request.method == 'POST':
+            return httpx.Response(200, json={'id': 't1', 'status': 'queued'})
+        await asyncio.sleep(latency)
+        return httpx.Response(200, json={'id': 't1', 'status': status, 'text': 'hello world', 'error': 'bad audio'})
+    
+    return AsyncAssemblyAIClient(api_key='test', poll_interval=0, transport=httpx.MockTransport(handler), max_wait=max_wait)
+
+
+@override_settings(RATELIMIT_ENABLE=False)
+class AsyncViewsTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        Wallet.objects.create(user=self.user, demo_minutes_remaining=Decimal('10.00'))
+        self.async_client.cookies['access_token'] = AuthService.generate_tokens(self.user)['access']
+    
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+    
+    def store_audio(self):
+        return AudioService.store_audio_file(
+            SimpleUploadedFile('clip.wav', make_wav(seconds=3), content_type='audio/wav'), self.user
+        )
+    
+    async def test_requires_authentication(self):
+        self.async_client.cookies.clear()
+        response = await self.async_client.get(reverse('async-transcription-detail', args=['00000000-0000-0000-0000-000000000000']))
+        self.assertEqual(response.status_code, 401)
+    
+    async def test_upload(self):
+        upload = SimpleUploadedFile('clip.wav', make_wav(seconds=3), content_type='audio/wav')
+        response = await self.async_client.post(reverse('async-audio-upload'), {'file': upload})
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['audio_file']['duration'], 0.05)
+    
+    async def test_create_transcription_and_fetch_status(self):
+        """Test the async path runs the engine and the status/download endpoints read the result"""
+        audio_file = await sync_to_async(self.store_audio)()
+        
+        with mock.patch('api.services.transcription_service.AsyncAssemblyAIClient', return_value=fake_engine()):
+            response = await self.async_client.post(
+                reverse('async-transcription-create'),
+                {'audio_file_id': str(audio_file.id), 'language': 'english'},
+                content_type='application/json',
+                headers={'Idempotency-Key': 'tx-1'},
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['status'], 'completed')
+        
+        # A retry replays the stored response instead of transcribing again
+        retry = await self.async_client.post(
+            reverse('async-transcription-create'),
+            {'audio_file_id': str(audio_file.id), 'language': 'english'},
+            content_type='application/json',
+            headers={'Idempotency-Key': 'tx-1'},
+        )
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(await Transcription.objects.acount(), 1)
+        
+        transcription_id = response.json()['id']
+        detail = await self.async_client.get(reverse('async-transcription-detail', args=[transcription_id]))
+        self.assertEqual(detail.json()['text'], 'hello world')
+        download = await self.async_client.get(reverse('async-transcription-download', args=[transcription_id]))
+        self.assertIn(b'hello world', download.content)
+    
+    async def test_engine_error_marks_transcription_failed(self):
+        audio_file = await sync_to_async(self.store_audio)()
+        
+        with mock.patch('api.services.transcription_service.AsyncAssemblyAIClient', return_value=fake_engine(status='error')):
+            response = await self.async_client.post(
+                reverse('async-transcription-create'),
+                {'audio_file_id': str(audio_file.id), 'language': 'english'},
+                content_type='application/json',
+            )
+        
+        self.assertEqual(response.json()['status'], 'failed')
+    
+    @override_settings(ASSEMBLYAI_MAX_WAIT_PER_AUDIO_SECOND=0)
+    async def test_stuck_transcript_times_out(self):
+        """Test polling gives up at the deadline instead of waiting forever"""
+        engine = fake_engine(status='processing', max_wait=0.05)
+        
+        with self.assertRaises(TimeoutError):
+            await engine.transcribe(b'audio', duration=60)
+    
+    async def test_concurrent_transcriptions_overlap(self):
+        """Benchmark: one event loop waits on several engine calls at the same time"""
+        audio_file = await sync_to_async(self.store_audio)()
+        transcriptions = [
+            await sync_to_async(TranscriptionService.create_transcription)(audio_file.id, 'english', self.user)
+            for _ in range(4)
+        ]
+        
+        started = time.monotonic()
+        await asyncio.gather(*[
+            TranscriptionService.aprocess_transcription(t, engine=fake_engine(ENGINE_LATENCY))
+            for t in transcriptions
+        ])
+        elapsed = time.monotonic() - started
+        
+        # Sequential waits would take 4 x ENGINE_LATENCY
+        self.assertLess(elapsed, ENGINE_LATENCY * 2)
+        self.assertEqual(await Transcription.objects.filter(status='completed').acount(), 4)
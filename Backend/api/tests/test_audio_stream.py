@@ -0,0 +1,146 @@
+import shutil
+import tempfile
+from datetime import timedelta
+import boto3
+import requests
+from moto import mock_aws
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.models import User, AudioFile
+from api.services.audio_service import AudioService
+from api.tests.test_storage import S3_STORAGES, make_wav
+from api.utils.streaming import RangeNotSatisfiable, parse_range
+
+
+class ParseRangeTestCase(SimpleTestCase):
+    def test_ranges(self):
+        """Test single byte ranges are resolved against the file size"""
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=500-5000', 1000), (500, 999))
+    
+    def test_ignored_ranges(self):
+        """Test headers the server may ignore fall back to the whole file"""
+        self.assertIsNone(parse_range(None, 1000))
+        self.assertIsNone(parse_range('bytes=0-1,5-9', 1000))
+        self.assertIsNone(parse_range('items=0-1', 1000))
+    
+    def test_unsatisfiable(self):
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range('bytes=1000-', 1000)
+
+
+class StreamTestMixin:
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def stream(self, audio_file, **headers):
+        return self.client.get(reverse('audiofile-stream', args=[audio_file.id]), headers=headers)
+
+
+class LocalStreamTestCase(StreamTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.content = make_wav(seconds=1)
+        self.audio_file = AudioService.store_audio_file(
+            SimpleUploadedFile('clip.wav', self.content, content_type='audio/wav'), self.user
+        )
+    
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+    
+    def test_full_file(self):
+        response = self.stream(self.audio_file)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(response['Content-Type'].startswith('audio/'))
+    
+    def test_range_request(self):
+        """Test seeking returns only the requested bytes"""
+        response = self.stream(self.audio_file, Range='bytes=100-199')
+        
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:200])
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '100')
+    
+    def test_unsatisfiable_range(self):
+        response = self.stream(self.audio_file, Range=f'bytes={len(self.content)}-')
+        
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+    
+    @override_settings(AUDIO_STREAM_OFFLOAD='nginx', AUDIO_STREAM_ACCEL_PREFIX='/protected-media/')
+    def test_nginx_offload(self):
+        """Test the worker hands the file to nginx instead of sending it"""
+        response = self.stream(self.audio_file, Range='bytes=100-199')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.audio_file.storage_path}')
+        self.assertEqual(response.content, b'')
+    
+    @override_settings(AUDIO_STREAM_OFFLOAD='nginx')
+    def test_playback_counts_as_access(self):
+        """Test offloaded playback still moves the audio to the back of the eviction queue"""
+        stale = timezone.now() - timedelta(days=30)
+        AudioFile.objects.filter(pk=self.audio_file.pk).update(last_accessed_at=stale)
+        
+        self.stream(self.audio_file)
+        
+        self.audio_file.refresh_from_db()
+        self.assertGreater(self.audio_file.last_accessed_at, stale)
+    
+    @override_settings(AUDIO_STREAM_OFFLOAD='sendfile')
+    def test_sendfile_offload(self):
+        response = self.stream(self.audio_file)
+        
+        self.assertTrue(response['X-Sendfile'].endswith(self.audio_file.storage_path))
+        self.assertEqual(response.content, b'')
+    
+    def test_other_users_audio(self):
+        other = User.objects.create(email='other@example.com', name='Other', provider='google', provider_id='other')
+        self.client.force_authenticate(other)
+        
+        self.assertEqual(self.stream(self.audio_file).status_code, 404)
+    
+    def test_evicted_audio(self):
+        AudioFile.objects.filter(pk=self.audio_file.pk).update(storage_state='evicted')
+        
+        self.assertEqual(self.stream(self.audio_file).status_code, 410)
+
+
+@mock_aws
+@override_settings(STORAGES=S3_STORAGES)
+class ObjectStorageStreamTestCase(StreamTestMixin, TestCase):
+    def test_redirects_to_presigned_url(self):
+        """Test playback on object storage is a redirect; storage serves the ranges"""
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='audio-test')
+        content = make_wav(seconds=1)
+        audio_file = AudioService.store_audio_file(
+            SimpleUploadedFile('clip.wav', content, content_type='audio/wav'), self.user
+        )
+        
+        response = self.stream(audio_file)
+        
+        self.assertEqual(response.status_code, 302)
+        ranged = requests.get(response['Location'], headers={'Range': 'bytes=0-9'})
+        self.assertEqual(ranged.status_code, 206)
+        self.assertEqual(ranged.content, content[:10])
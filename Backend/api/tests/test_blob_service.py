@@ -0,0 +1,128 @@
+import shutil
+import tempfile
+from decimal import Decimal
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from api.models import User, AudioBlob, AudioFile
+from api.services.audio_service import AudioService
+from api.services.blob_service import BlobService, COLLECTING
+from api.services.deletion_service import DeletionService
+from api.services.retention_service import RetentionService
+from api.tests.test_storage import make_wav
+
+
+class BlobServiceTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.alice = User.objects.create(
+            email='alice@example.com', name='Alice', provider='google', provider_id='alice'
+        )
+        self.bob = User.objects.create(
+            email='bob@example.com', name='Bob', provider='google', provider_id='bob'
+        )
+    
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+    
+    def upload(self, user, seconds=3):
+        return AudioService.store_audio_file(
+            SimpleUploadedFile('clip.wav', make_wav(seconds=seconds), content_type='audio/wav'), user
+        )
+    
+    def drop(self, audio_file):
+        """Delete the row and its reference but leave the blob for collection"""
+        AudioFile.objects.filter(pk=audio_file.pk).delete()
+        BlobService.release(audio_file.blob_id)
+    
+    def test_identical_uploads_share_one_blob(self):
+        """Test the same content is stored once for every uploader"""
+        first = self.upload(self.alice)
+        second = self.upload(self.bob)
+        third = self.upload(self.alice)
+        
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(first.blob_id, third.blob_id)
+        self.assertEqual(AudioBlob.objects.get().ref_count, 3)
+        self.assertEqual(first.duration, Decimal('0.05'))
+        self.assertEqual(first.file_path, '')
+        self.assertEqual(first.storage_path, AudioBlob.objects.get().file_path)
+    
+    def test_different_content_gets_own_blob(self):
+        """Test different audio is stored separately"""
+        first = self.upload(self.alice, seconds=3)
+        second = self.upload(self.alice, seconds=4)
+        
+        self.assertNotEqual(first.blob_id, second.blob_id)
+        self.assertEqual(AudioBlob.objects.count(), 2)
+    
+    def test_blob_deleted_with_last_reference(self):
+        """Test the shared file survives until its last audio file is deleted"""
+        first = self.upload(self.alice)
+        second = self.upload(self.bob)
+        path = first.storage_path
+        
+        AudioService.delete_audio_file(first)
+        self.assertTrue(default_storage.exists(path))
+        self.assertEqual(AudioBlob.objects.get().ref_count, 1)
+        
+        AudioService.delete_audio_file(AudioFile.objects.get(pk=second.pk))
+        self.assertFalse(default_storage.exists(path))
+        self.assertFalse(AudioBlob.objects.exists())
+    
+    def test_delete_after_eviction_releases_nothing_twice(self):
+        """Test deleting a stale instance of evicted audio keeps the shared blob"""
+        stale = self.upload(self.alice)
+        shared = self.upload(self.bob)
+        path = shared.storage_path
+        
+        RetentionService.evict(AudioFile.objects.get(pk=stale.pk))
+        AudioService.delete_audio_file(stale)
+        
+        self.assertEqual(AudioBlob.objects.get().ref_count, 1)
+        self.assertTrue(default_storage.exists(path))
+        
+        # Bulk deletes read the reference from the locked rows too
+        stale = self.upload(self.alice)
+        RetentionService.evict(AudioFile.objects.get(pk=stale.pk))
+        DeletionService.request_audio_deletion(self.alice, [stale.id])
+        DeletionService.purge()
+        self.assertEqual(AudioBlob.objects.get().ref_count, 1)
+    
+    def test_upload_revives_unreferenced_blob(self):
+        """Test an upload racing ahead of collection reuses the blob"""
+        first = self.upload(self.alice)
+        self.drop(first)
+        self.assertEqual(AudioBlob.objects.get().ref_count, 0)
+        
+        second = self.upload(self.bob)
+        self.assertEqual(BlobService.collect(second.blob_id), 0)
+        self.assertTrue(default_storage.exists(second.storage_path))
+    
+    def test_upload_after_claim_stores_new_copy(self):
+        """Test a blob claimed for collection is never handed to a new upload"""
+        first = self.upload(self.alice)
+        self.drop(first)
+        old_blob = BlobService.claim_unreferenced([first.blob_id])[0]
+        self.assertEqual(old_blob.ref_count, COLLECTING)
+        
+        second = self.upload(self.bob)
+        self.assertNotEqual(second.blob_id, old_blob.id)
+        self.assertNotEqual(second.storage_path, old_blob.file_path)
+        
+        self.assertEqual(BlobService.collect_garbage(), old_blob.size)
+        self.assertTrue(default_storage.exists(second.storage_path))
+        self.assertEqual(AudioBlob.objects.get().pk, second.blob_id)
+    
+    def test_cascade_delete_releases_references(self):
+        """Test deleting a user drops their references for garbage collection"""
+        self.upload(self.alice)
+        shared = self.upload(self.bob)
+        
+        self.alice.delete()
+        self.assertEqual(AudioBlob.objects.get().ref_count, 1)
+        self.assertEqual(BlobService.collect_garbage(), 0)
+        self.assertTrue(default_storage.exists(shared.storage_path))
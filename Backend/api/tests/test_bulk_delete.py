@@ -0,0 +1,125 @@
+import uuid
+import shutil
+import tempfile
+from decimal import Decimal
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.models import User, AudioBlob, AudioFile, Transcription, DeletionRequest, StorageUsage
+from api.services.audio_service import AudioService
+from api.services.deletion_service import DeletionService
+from api.tests.test_storage import make_wav
+
+
+@override_settings(RATELIMIT_ENABLE=False)
+class BulkDeleteTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.audio_files = [
+            AudioService.store_audio_file(
+                SimpleUploadedFile(f'clip{i}.wav', make_wav(seconds=i + 1), content_type='audio/wav'), self.user
+            )
+            for i in range(3)
+        ]
+        self.transcriptions = [
+            Transcription.objects.create(
+                user=self.user, audio_file=audio_file, language='english', text='hello',
+                duration=audio_file.duration, cost=Decimal('0.00'), status='completed'
+            )
+            for audio_file in self.audio_files
+        ]
+    
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+    
+    def bulk_delete(self, name, items):
+        return self.client.post(reverse(name), {'ids': [str(item.id) for item in items]}, format='json')
+    
+    def test_audio_hidden_at_once_and_purged_later(self):
+        """Test soft-deleted audio disappears immediately and the purger removes it"""
+        paths = [audio_file.storage_path for audio_file in self.audio_files[:2]]
+        
+        response = self.bulk_delete('audiofile-bulk-delete', self.audio_files[:2])
+        
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['requested_count'], 2)
+        self.assertEqual(self.client.get(reverse('audiofile-list')).json()['count'], 1)
+        self.assertEqual(self.client.get(reverse('transcription-list')).json()['count'], 1)
+        self.assertTrue(all(default_storage.exists(path) for path in paths))
+        
+        self.assertEqual(DeletionService.purge(), 4)  # two audio files and their transcripts
+        
+        self.assertFalse(any(default_storage.exists(path) for path in paths))
+        self.assertEqual(AudioFile.objects.count(), 1)
+        self.assertEqual(Transcription.objects.count(), 1)
+        self.assertEqual(AudioBlob.objects.count(), 1)
+        self.assertEqual(
+            StorageUsage.objects.get(key=str(self.user.id)).bytes_used, self.audio_files[2].size
+        )
+        
+        progress = self.client.get(reverse('deletionrequest-detail', args=[response.json()['id']])).json()
+        self.assertEqual(progress['status'], 'completed')
+        self.assertEqual(progress['deleted_count'], 2)
+    
+    def test_purge_releases_blob_references_in_bulk(self):
+        """Test a purged batch drops each blob's references with one update, not one per row"""
+        shared = [
+            AudioService.store_audio_file(
+                SimpleUploadedFile('same.wav', make_wav(seconds=5), content_type='audio/wav'), self.user
+            )
+            for _ in range(3)
+        ]
+        DeletionService.request_audio_deletion(self.user, [audio_file.id for audio_file in shared])
+        
+        with CaptureQueriesContext(connection) as queries:
+            DeletionService.purge()
+        
+        releases = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "audio_blobs"') and '- ' in q['sql']]
+        self.assertEqual(len(releases), 1)
+        self.assertFalse(AudioBlob.objects.filter(pk=shared[0].blob_id).exists())
+        self.assertEqual(AudioBlob.objects.count(), 3)
+    
+    def test_purge_in_batches_reports_progress(self):
+        deletion = DeletionService.request_transcription_deletion(self.user, [t.id for t in self.transcriptions])
+        
+        DeletionService.purge(batch_size=2)
+        deletion.refresh_from_db()
+        self.assertEqual((deletion.status, deletion.deleted_count), ('pending', 2))
+        
+        DeletionService.purge(batch_size=2)
+        deletion.refresh_from_db()
+        self.assertEqual((deletion.status, deletion.deleted_count), ('completed', 3))
+        self.assertEqual(AudioFile.objects.count(), 3)
+    
+    def test_other_users_items_are_ignored(self):
+        other = User.objects.create(email='other@example.com', name='Other', provider='google', provider_id='other')
+        self.client.force_authenticate(other)
+        
+        response = self.bulk_delete('transcription-bulk-delete', self.transcriptions)
+        
+        self.assertEqual(response.json()['requested_count'], 0)
+        self.assertEqual(response.json()['status'], 'completed')
+        self.assertFalse(Transcription.objects.filter(deleted_at__isnull=False).exists())
+    
+    def test_rejects_empty_and_oversized_requests(self):
+        too_many = {'ids': [str(uuid.uuid4()) for _ in range(settings.BULK_DELETE_MAX_ITEMS + 1)]}
+        
+        self.assertEqual(self.bulk_delete('audiofile-bulk-delete', []).status_code, 400)
+        self.assertEqual(self.client.post(reverse('audiofile-bulk-delete'), too_many, format='json').status_code, 400)
+        self.assertFalse(DeletionRequest.objects.exists())
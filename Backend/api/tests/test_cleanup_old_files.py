@@ -0,0 +1,98 @@
+import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from api.management.commands.cleanup_old_files import Command
+from api.models import User, AudioFile, Transcription, StorageUsage
+from api.services.retention_service import RetentionService
+
+
+class CleanupOldFilesTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=os.path.join(self.tmp_dir, 'media'))
+        self.override.enable()
+        self.checkpoint = os.path.join(self.tmp_dir, 'checkpoint.json')
+        
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        old = timezone.now() - timedelta(days=40)
+        for i in range(5):
+            self.create_audio_file(f'old_{i}.mp3', old - timedelta(minutes=i))
+        self.recent = self.create_audio_file('recent.mp3', timezone.now())
+    
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.tmp_dir)
+    
+    def create_audio_file(self, filename, uploaded_at):
+        path = default_storage.save(f'audio_files/{self.user.id}/{filename}', ContentFile(b'x' * 10))
+        audio_file = AudioFile.objects.create(
+            user=self.user, filename=filename, file_path=path,
+            duration=Decimal('1.00'), size=10, format='mp3'
+        )
+        AudioFile.objects.filter(id=audio_file.id).update(uploaded_at=uploaded_at)
+        Transcription.objects.create(
+            user=self.user, audio_file=audio_file, language='english',
+            duration=Decimal('1.00'), cost=Decimal('0.00')
+        )
+        return audio_file
+    
+    def run_cleanup(self, *args):
+        call_command('cleanup_old_files', '--batch-size=2', f'--checkpoint={self.checkpoint}', *args, stdout=io.StringIO())
+    
+    def test_deletes_old_files_in_batches(self):
+        """Test old files, rows and transcriptions are removed and recent ones kept"""
+        self.run_cleanup()
+        
+        self.assertEqual(list(AudioFile.objects.values_list('id', flat=True)), [self.recent.id])
+        self.assertEqual(Transcription.objects.count(), 1)
+        self.assertEqual(len(os.listdir(os.path.join(settings.MEDIA_ROOT, 'audio_files', str(self.user.id)))), 1)
+        self.assertFalse(os.path.exists(self.checkpoint))
+    
+    def test_time_budget_resumes_from_checkpoint(self):
+        """Test a run cut short by its time budget resumes where it stopped"""
+        self.run_cleanup('--time-budget=0')
+        
+        self.assertEqual(AudioFile.objects.count(), 4)
+        self.assertTrue(os.path.exists(self.checkpoint))
+        
+        self.run_cleanup()
+        
+        self.assertEqual(AudioFile.objects.count(), 1)
+        self.assertFalse(os.path.exists(self.checkpoint))
+    
+    def test_dry_run_deletes_nothing(self):
+        """Test dry run leaves files and rows in place"""
+        self.run_cleanup('--dry-run')
+        self.assertEqual(AudioFile.objects.count(), 6)
+
+    
+    def test_eviction_after_batch_read_releases_quota_once(self):
+        """Test audio evicted after its batch was read does not return its quota again"""
+        for audio_file in AudioFile.objects.all():
+            RetentionService.reserve(self.user, audio_file.size)
+        command = Command(stdout=io.StringIO())
+        batch = command.next_batch(timezone.now() - timedelta(days=30), None, 10)
+        
+        # Evicted by another worker in between
+        AudioFile.objects.filter(id=batch[0]['id']).update(storage_state='evicted', evicted_at=timezone.now())
+        RetentionService.release(self.user.id, batch[0]['size'])
+        
+        with ThreadPoolExecutor() as pool:
+            command.delete_batch(pool, batch)
+        
+        self.assertEqual(StorageUsage.objects.get(key=str(self.user.id)).bytes_used, self.recent.size)
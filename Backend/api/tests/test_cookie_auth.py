@@ -0,0 +1,73 @@
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from decimal import Decimal
+from rest_framework.test import APIClient
+from api.models import User, Wallet
+from api.services.auth_service import AuthService
+from api.utils.cookie_auth import user_cache_key
+
+
+@override_settings(AUTH_USER_CACHE_TIMEOUT=60)
+class CookieJWTAuthenticationTestCase(TestCase):
+    # Requests a typical SPA page load makes after login
+    SPA_SESSION = ['current-user', 'wallet-details', 'transaction-list', 'transcription-list']
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        Wallet.objects.create(user=self.user, demo_minutes_remaining=Decimal('10.00'))
+        self.client = APIClient()
+        self.client.cookies['access_token'] = AuthService.generate_tokens(self.user)['access']
+    
+    def run_session(self):
+        """Replay the SPA session and return the number of queries it ran"""
+        with CaptureQueriesContext(connection) as ctx:
+            for name in self.SPA_SESSION:
+                response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+    
+    def test_cached_session_runs_fewer_queries(self):
+        """Benchmark: warm cache saves the users SELECT on every request"""
+        with override_settings(AUTH_USER_CACHE_TIMEOUT=0):
+            uncached = self.run_session()
+        
+        self.run_session()  # warm the cache
+        cached = self.run_session()
+        
+        self.assertEqual(uncached - cached, len(self.SPA_SESSION))
+    
+    def test_deactivation_invalidates_cache(self):
+        """Test deactivated user is rejected even while cached"""
+        self.client.get(reverse('current-user'))
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.id)))
+        
+        self.user.is_active = False
+        self.user.save()
+        
+        response = self.client.get(reverse('current-user'))
+        self.assertEqual(response.status_code, 401)
+    
+    def test_logout_invalidates_cache(self):
+        """Test logout drops the cached user"""
+        self.client.get(reverse('current-user'))
+        self.client.post(reverse('logout'))
+        
+        self.assertIsNone(cache.get(user_cache_key(self.user.id)))
+    
+    def test_benchmark_command_reports_saved_queries(self):
+        """Test the benchmark replays sessions with the cache off and on"""
+        out = StringIO()
+        call_command('benchmark_auth_cache', email=self.user.email, sessions=2, stdout=out)
+        
+        self.assertIn(f'saves {len(self.SPA_SESSION)}.0 queries per session', out.getvalue())
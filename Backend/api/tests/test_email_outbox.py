@@ -0,0 +1,117 @@
+from datetime import timedelta
+from unittest import mock
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.models import ContactMessage, EmailOutbox
+from api.services.email_service import EmailService
+
+
+CONTACT = {
+    'name': 'Jane Doe',
+    'email': 'jane@example.com',
+    'subject': 'general',
+    'message': 'Hello, I have a question about pricing.',
+}
+
+
+@override_settings(
+    RATELIMIT_ENABLE=False,
+    EMAIL_HOST='smtp.example.com',
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    ADMIN_EMAIL='admin@example.com',
+    EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+)
+class EmailOutboxTestCase(TestCase):
+    def test_contact_form_queues_email_instead_of_sending(self):
+        response = APIClient().post(reverse('contact-form'), CONTACT, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.to, ['admin@example.com'])
+        self.assertIn('Jane Doe', email.body)
+        self.assertIn('Jane Doe', email.html_body)
+
+    def test_email_is_not_queued_when_message_is_not_saved(self):
+        with mock.patch.object(ContactMessage, 'save', side_effect=RuntimeError('database down')):
+            response = APIClient().post(reverse('contact-form'), CONTACT, format='json')
+
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_broken_notification_keeps_the_message(self):
+        with mock.patch.object(EmailService, 'queue', side_effect=RuntimeError('template broken')):
+            response = APIClient().post(reverse('contact-form'), CONTACT, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(ContactMessage.objects.exists())
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_html_template_is_optional(self):
+        def text_only(name):
+            if name.endswith('.html'):
+                raise TemplateDoesNotExist(name)
+            return get_template(name)
+
+        with mock.patch('api.services.email_service.get_template', side_effect=text_only):
+            email = EmailService.queue('contact_admin_notification', {'contact': None}, 'Hello', ['a@example.com'])
+
+        self.assertEqual(email.html_body, '')
+        self.assertTrue(email.body)
+
+    def test_batch_is_sent_over_one_connection(self):
+        for i in range(3):
+            EmailService.queue('contact_admin_notification', {'contact': None}, f'Email {i}', ['a@example.com'])
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.open') as opened:
+            call_command('send_emails', stdout=mock.Mock())
+
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual([m.subject for m in mail.outbox], ['Email 0', 'Email 1', 'Email 2'])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertEqual(EmailOutbox.objects.filter(status='sent').count(), 3)
+
+    def test_failed_send_backs_off_then_gives_up(self):
+        email = EmailService.queue('contact_admin_notification', {'contact': None}, 'Hello', ['a@example.com'])
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('refused')):
+            self.assertEqual(EmailService.send_pending(), 1)
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ('pending', 1))
+            self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=20))
+
+            # Not due yet
+            self.assertEqual(EmailService.send_pending(), 0)
+
+            EmailOutbox.objects.filter(id=email.id).update(next_attempt_at=timezone.now())
+            EmailService.send_pending()
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', 2))
+        self.assertEqual(email.error_message, 'refused')
+
+    def test_emails_are_sent_outside_the_claim_transaction(self):
+        """Test no outbox row stays locked while the mail server is talked to"""
+        EmailService.queue('contact_admin_notification', {'contact': None}, 'Hello', ['a@example.com'])
+        baseline = len(connection.atomic_blocks)
+        depth = []
+        concurrent = []
+
+        def send_messages(messages):
+            depth.append(len(connection.atomic_blocks))
+            # The batch is leased, so another sender skips it meanwhile
+            concurrent.append(EmailService.send_pending())
+            return len(messages)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=send_messages):
+            self.assertEqual(EmailService.send_pending(), 1)
+
+        self.assertEqual((depth, concurrent), ([baseline], [0]))
+        self.assertEqual(EmailOutbox.objects.get().status, 'sent')
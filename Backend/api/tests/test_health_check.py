@@ -1,14 +1,22 @@
-from django.test import TestCase
+from unittest import mock
+from django.db import connection
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
+from api.models import User
+from api.services.auth_service import AuthService
+from api.services.health_service import HealthService
+from api.utils.cookie_auth import invalidate_cached_user
 
 
 class HealthCheckTestCase(TestCase):
     def setUp(self):
         self.client = APIClient()
+        HealthService.reset()
     
     def test_health_check_endpoint(self):
         """Test health check endpoint returns 200"""
+        HealthService.refresh()
         url = reverse('health-check')
         response = self.client.get(url)
         
@@ -16,3 +24,74 @@ class HealthCheckTestCase(TestCase):
         self.assertIn('status', response.json())
         self.assertIn('services', response.json())
         self.assertIn('database', response.json()['services'])
+    
+    def test_cold_start_probes_in_background(self):
+        """Test a worker's first check reports 'starting' instead of waiting on every dependency"""
+        with mock.patch('api.services.health_service.threading.Thread') as thread, \
+                mock.patch.object(HealthService, 'probe_database') as probe:
+            response = self.client.get(reverse('health-ready'))
+        
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['status'], 'starting')
+        probe.assert_not_called()
+        thread.assert_called_once_with(target=HealthService._refresh_in_background, daemon=True)
+    
+    @override_settings(RAZORPAY_KEY_ID='rzp_test_key', RAZORPAY_KEY_SECRET='secret', HEALTH_PROBE_TIMEOUT=2)
+    def test_razorpay_probe_uses_probe_timeout(self):
+        with mock.patch('api.services.health_service.httpx.get') as get:
+            self.assertEqual(HealthService.probe_razorpay(), 'reachable')
+        
+        self.assertEqual(get.call_args.kwargs['timeout'], 2)
+    
+    def test_readiness_is_served_from_snapshot(self):
+        """Repeated probes within the TTL do not touch the database"""
+        HealthService.refresh()
+        
+        with mock.patch.object(HealthService, 'probe_database') as probe:
+            response = self.client.get(reverse('health-ready'))
+        
+        probe.assert_not_called()
+        self.assertEqual(response.json()['services']['database'], 'connected')
+        self.assertNotIn('latency_ms', str(response.json()))
+    
+    @override_settings(HEALTH_SNAPSHOT_TTL=0)
+    def test_stale_snapshot_is_refreshed_in_background(self):
+        HealthService.refresh()
+        
+        with mock.patch('api.services.health_service.threading.Thread') as thread:
+            HealthService.snapshot()
+            HealthService.snapshot()  # a refresh is already running
+        
+        thread.assert_called_once_with(target=HealthService._refresh_in_background, daemon=True)
+    
+    def test_database_failure_is_unhealthy_other_failures_degrade(self):
+        with mock.patch.object(HealthService, 'probe_cache', side_effect=ConnectionError('cache down')):
+            self.assertEqual(HealthService.deep()['status'], 'degraded')
+        
+        with mock.patch.object(connection, 'cursor', side_effect=Exception('db down')):
+            HealthService.refresh()
+        response = self.client.get(reverse('health-check'))
+        
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['services']['database'], 'error')
+    
+    def test_liveness_checks_nothing(self):
+        with mock.patch.object(HealthService, 'snapshot') as snapshot:
+            response = self.client.get(reverse('health-live'))
+        
+        self.assertEqual(response.status_code, 200)
+        snapshot.assert_not_called()
+    
+    def test_deep_check_is_staff_only_and_reports_latency(self):
+        user = User.objects.create(email='ops@example.com', name='Ops', provider='google', provider_id='ops')
+        self.client.cookies['access_token'] = AuthService.generate_tokens(user)['access']
+        self.assertEqual(self.client.get(reverse('health-deep')).status_code, 403)
+        
+        User.objects.filter(id=user.id).update(is_staff=True)
+        invalidate_cached_user(user.id)
+        response = self.client.get(reverse('health-deep'))
+        
+        self.assertEqual(response.status_code, 200)
+        services = response.json()['services']
+        self.assertEqual(set(services), {'database', 'cache', 'storage', 'assemblyai', 'razorpay'})
+        self.assertIsInstance(services['database']['latency_ms'], float)
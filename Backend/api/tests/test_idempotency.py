@@ -0,0 +1,86 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.models import User, Wallet, Transaction, IdempotencyKey
+
+
+@mock.patch('api.views.PaymentService.verify_payment_signature', return_value=True)
+class IdempotencyKeyTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        self.wallet = Wallet.objects.create(user=self.user, balance=Decimal('0.00'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.payment = {
+            'order_id': 'order_test123',
+            'payment_id': 'pay_test123',
+            'signature': 'sig',
+            'amount': 100,
+        }
+    
+    def verify_payment(self, key='key-1'):
+        return self.client.post(
+            reverse('wallet-verify-payment'), self.payment, format='json',
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+    
+    def test_retry_replays_first_response(self, _):
+        """Test a retried request returns the stored response without rerunning"""
+        first = self.verify_payment()
+        with mock.patch('api.views.WalletService.process_recharge') as recharge:
+            second = self.verify_payment()
+        
+        recharge.assert_not_called()
+        self.assertEqual(second.status_code, first.status_code)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Transaction.objects.count(), 1)
+    
+    def test_key_reused_on_other_endpoint(self, _):
+        """Test a key cannot be replayed against a different endpoint"""
+        self.verify_payment()
+        response = self.client.post(reverse('wallet-create-order'), {}, format='json', HTTP_IDEMPOTENCY_KEY='key-1')
+        
+        self.assertEqual(response.status_code, 422)
+    
+    def test_key_reused_with_other_body(self, _):
+        """Test a key cannot replay the first response for different parameters"""
+        self.verify_payment()
+        self.payment['payment_id'] = 'pay_other'
+        
+        response = self.verify_payment()
+        
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Transaction.objects.count(), 1)
+    
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0)
+    def test_concurrent_duplicate_is_rejected(self, _):
+        """Test a duplicate arriving while the first is in progress gets 409"""
+        now = timezone.now()
+        IdempotencyKey.objects.create(
+            user=self.user, key='key-1', scope=f"POST {reverse('wallet-verify-payment')}",
+            locked_until=now + timedelta(minutes=5), expires_at=now + timedelta(days=1),
+        )
+        
+        self.assertEqual(self.verify_payment().status_code, 409)
+        self.assertEqual(Transaction.objects.count(), 0)
+    
+    def test_abandoned_lock_is_taken_over(self, _):
+        """Test a lock left by a dead worker does not block retries forever"""
+        now = timezone.now()
+        IdempotencyKey.objects.create(
+            user=self.user, key='key-1', scope=f"POST {reverse('wallet-verify-payment')}",
+            locked_until=now - timedelta(seconds=1), expires_at=now + timedelta(days=1),
+        )
+        
+        self.assertEqual(self.verify_payment().status_code, 200)
+        self.assertEqual(IdempotencyKey.objects.get(key='key-1').status, 'completed')
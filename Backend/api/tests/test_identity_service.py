@@ -0,0 +1,150 @@
+import json
+import hmac
+import time
+import hashlib
+import jwt
+from unittest import mock
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.models import User
+from api.services.identity_service import IdentityService, IdentityTokenError, JWKSCache
+
+CLIENT_ID = 'test-client-id.apps.googleusercontent.com'
+PROVIDERS = {
+    'google': {'APP': {'client_id': CLIENT_ID, 'secret': 'google-secret', 'key': ''}},
+    'facebook': {'APP': {'client_id': 'fb-app-id', 'secret': 'fb-secret', 'key': ''}},
+}
+
+
+def generate_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({'kid': kid, 'alg': 'RS256', 'use': 'sig'})
+    return private_key, jwk
+
+
+@override_settings(SOCIALACCOUNT_PROVIDERS=PROVIDERS)
+class IdentityServiceTestCase(TestCase):
+    def setUp(self):
+        self.private_key, jwk = generate_key('key-1')
+        self.published = [jwk]
+        self.fetch_count = 0
+        self.key_set = JWKSCache('https://example.invalid/jwks', min_refresh_interval=0, fetch=self.fetch)
+        IdentityService._key_sets['google'] = self.key_set
+    
+    def tearDown(self):
+        IdentityService._key_sets.clear()
+    
+    def fetch(self):
+        self.fetch_count += 1
+        return {'keys': list(self.published)}, None
+    
+    def make_token(self, private_key=None, kid='key-1', **claims):
+        now = int(time.time())
+        payload = {
+            'iss': 'https://accounts.google.com',
+            'aud': CLIENT_ID,
+            'sub': 'google-sub-1',
+            'email': 'test@example.com',
+            'email_verified': True,
+            'name': 'Test User',
+            'iat': now,
+            'exp': now + 300,
+        }
+        payload.update(claims)
+        return jwt.encode(payload, private_key or self.private_key, algorithm='RS256', headers={'kid': kid})
+    
+    def test_verify_valid_token(self):
+        """Test claims are returned and keys are fetched once"""
+        claims = IdentityService.verify_id_token('google', self.make_token())
+        IdentityService.verify_id_token('google', self.make_token())
+        
+        self.assertEqual(claims['sub'], 'google-sub-1')
+        self.assertEqual(self.fetch_count, 1)
+    
+    def test_rejects_wrong_audience(self):
+        """Test token issued for another client is rejected"""
+        with self.assertRaises(IdentityTokenError):
+            IdentityService.verify_id_token('google', self.make_token(aud='other-client'))
+    
+    def test_rejects_forged_signature(self):
+        """Test token signed by an unpublished key is rejected"""
+        forged_key, _ = generate_key('key-1')
+        with self.assertRaises(IdentityTokenError):
+            IdentityService.verify_id_token('google', self.make_token(private_key=forged_key))
+    
+    def test_key_rotation_triggers_refresh(self):
+        """Test a new key id forces a refresh of the key set"""
+        IdentityService.verify_id_token('google', self.make_token())
+        
+        rotated_key, jwk = generate_key('key-2')
+        self.published = [jwk]
+        claims = IdentityService.verify_id_token('google', self.make_token(private_key=rotated_key, kid='key-2'))
+        
+        self.assertEqual(claims['email'], 'test@example.com')
+        self.assertEqual(self.fetch_count, 2)
+    
+    def test_stale_keys_refresh_in_background(self):
+        """Test an expired key set keeps serving while it is refreshed"""
+        self.key_set.ttl = 0
+        IdentityService.verify_id_token('google', self.make_token())
+        IdentityService.verify_id_token('google', self.make_token())
+        
+        for _ in range(50):
+            if self.fetch_count >= 2:
+                break
+            time.sleep(0.01)
+        self.assertGreaterEqual(self.fetch_count, 2)
+    
+    def test_google_login_uses_token_claims(self):
+        """Test login ignores client-sent identity when an ID token is given"""
+        response = APIClient().post(reverse('google-login'), {
+            'id_token': self.make_token(),
+            'email': 'attacker@example.com',
+            'provider_id': 'spoofed',
+        }, format='json')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['email'], 'test@example.com')
+        self.assertTrue(User.objects.filter(provider_id='google-sub-1').exists())
+    
+    def test_google_login_requires_token(self):
+        """Test login without provider proof is refused by default"""
+        response = APIClient().post(reverse('google-login'), {
+            'email': 'test@example.com',
+            'name': 'Test User',
+            'provider_id': 'google-sub-1',
+        }, format='json')
+        
+        self.assertEqual(response.status_code, 401)
+    
+    @override_settings(VERIFY_IDENTITY_TOKENS=False, DEBUG=True)
+    def test_unverified_login_is_a_dev_opt_out(self):
+        """Test client-sent identity is only accepted with verification off in DEBUG"""
+        data = {'email': 'test@example.com', 'name': 'Test User', 'provider_id': 'google-sub-1'}
+        self.assertEqual(APIClient().post(reverse('google-login'), data, format='json').status_code, 200)
+        
+        with self.settings(DEBUG=False):
+            self.assertEqual(APIClient().post(reverse('google-login'), data, format='json').status_code, 401)
+    
+    def test_facebook_login_verifies_access_token(self):
+        """Test a Facebook access token is checked with one Graph call signed by the app secret"""
+        profile = mock.Mock(ok=True)
+        profile.json.return_value = {'id': 'fb-1', 'name': 'Test User', 'email': 'test@example.com'}
+        with mock.patch('api.services.identity_service.requests.get', return_value=profile) as graph:
+            response = APIClient().post(reverse('facebook-login'), {'access_token': 'fb-token'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(graph.call_count, 1)
+        self.assertEqual(
+            graph.call_args.kwargs['params']['appsecret_proof'],
+            hmac.new(b'fb-secret', b'fb-token', hashlib.sha256).hexdigest(),
+        )
+        self.assertTrue(User.objects.filter(provider='facebook', provider_id='fb-1').exists())
+        
+        # Facebook rejects a token issued to another app: its proof does not match
+        rejected = mock.Mock(ok=False)
+        with mock.patch('api.services.identity_service.requests.get', return_value=rejected):
+            response = APIClient().post(reverse('facebook-login'), {'access_token': 'fb-token'}, format='json')
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,163 @@
+import json
+import asyncio
+from decimal import Decimal
+from unittest import mock
+from django.test import TestCase, override_settings
+from api.live import LIVE_PATH, live_transcription, sessions
+from api.models import User, Wallet, LiveSession
+from api.services.auth_service import AuthService
+from api.services.streaming_engines import FakeStreamingStream
+
+SAMPLE_RATE = 8000
+ONE_SECOND = b'\x00\x00' * SAMPLE_RATE
+
+
+class SocketClient:
+    """Drives the ASGI WebSocket app the way a server would"""
+
+    def __init__(self, token=None, query=f'language=english&sample_rate={SAMPLE_RATE}'):
+        self.inbox = asyncio.Queue()
+        self.outbox = asyncio.Queue()
+        headers = [(b'cookie', f'access_token={token}'.encode())] if token else []
+        scope = {'type': 'websocket', 'path': LIVE_PATH, 'query_string': query.encode(), 'headers': headers}
+        self.inbox.put_nowait({'type': 'websocket.connect'})
+        self.task = asyncio.ensure_future(live_transcription(scope, self.inbox.get, self.outbox.put))
+
+    def send_audio(self, chunk):
+        self.inbox.put_nowait({'type': 'websocket.receive', 'bytes': chunk})
+
+    def stop(self):
+        self.inbox.put_nowait({'type': 'websocket.receive', 'text': json.dumps({'type': 'stop'})})
+
+    async def messages(self):
+        """Everything sent up to the close; returns (json messages, close code)"""
+        received = []
+        while True:
+            message = await asyncio.wait_for(self.outbox.get(), 5)
+            if message['type'] == 'websocket.close':
+                await self.task
+                return received, message['code']
+            if message['type'] == 'websocket.send':
+                received.append(json.loads(message['text']))
+
+
+@override_settings(
+    LIVE_TRANSCRIPTION_ENGINE='fake',
+    LIVE_BILLING_INTERVAL=2,
+    LIVE_MAX_BUFFERED_FRAMES=2,
+)
+class LiveTranscriptionTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        self.wallet = Wallet.objects.create(user=self.user, demo_minutes_remaining=Decimal('10.00'))
+        self.token = AuthService.generate_tokens(self.user)['access']
+
+    async def test_requires_authentication(self):
+        messages, code = await SocketClient().messages()
+
+        self.assertEqual(code, 4401)
+        self.assertEqual(messages[0]['type'], 'error')
+
+    async def test_streams_partial_and_final_segments(self):
+        client = SocketClient(self.token)
+        for _ in range(5):
+            client.send_audio(ONE_SECOND)
+        client.stop()
+
+        messages, code = await client.messages()
+
+        self.assertEqual(code, 1000)
+        self.assertEqual(messages[0]['type'], 'session')
+        self.assertIn({'type': 'partial', 'text': 'word1 word2'}, messages)
+        finals = [m for m in messages if m['type'] == 'final']
+        self.assertEqual([f['text'] for f in finals], ['word1 word2 word3', 'word4 word5'])
+        self.assertEqual(finals[1]['start'], 3.0)
+        completed = messages[-1]
+        self.assertEqual(completed['text'], 'word1 word2 word3 word4 word5')
+        self.assertEqual(completed['seconds'], 5)
+
+        session = await LiveSession.objects.aget(id=completed['id'])
+        self.assertEqual(session.status, 'completed')
+        self.assertEqual(session.text, completed['text'])
+
+    async def test_bills_per_streamed_second(self):
+        """Charges land in increments as audio arrives and fold into one transaction"""
+        await Wallet.objects.filter(id=self.wallet.id).aupdate(demo_minutes_remaining=0, balance=Decimal('5.00'))
+        client = SocketClient(self.token)
+        for _ in range(90):
+            client.send_audio(ONE_SECOND)
+        client.stop()
+
+        messages, code = await client.messages()
+
+        self.assertEqual(code, 1000)
+        self.assertEqual(messages[-1]['cost'], 1.5)
+        wallet = await Wallet.objects.aget(id=self.wallet.id)
+        self.assertEqual(wallet.balance, Decimal('3.50'))
+        self.assertEqual(wallet.total_minutes_used, Decimal('1.50'))
+        self.assertEqual(await wallet.transactions.acount(), 1)
+
+    async def test_closes_when_balance_runs_out(self):
+        await Wallet.objects.filter(id=self.wallet.id).aupdate(demo_minutes_remaining=Decimal('0.05'))
+        client = SocketClient(self.token)
+        for _ in range(10):
+            client.send_audio(ONE_SECOND)
+
+        messages, code = await client.messages()
+
+        self.assertEqual(code, 4402)
+        self.assertEqual(messages[-1], {'type': 'error', 'error': 'Insufficient balance'})
+        session = await LiveSession.objects.aget(user=self.user)
+        self.assertEqual(session.status, 'failed')
+        self.assertEqual(session.seconds_billed, 2)
+
+    async def test_rejects_oversized_frames(self):
+        client = SocketClient(self.token)
+        with override_settings(LIVE_MAX_FRAME_BYTES=len(ONE_SECOND) - 1):
+            client.send_audio(ONE_SECOND)
+            _, code = await client.messages()
+
+        self.assertEqual(code, 1009)
+
+    async def test_rejects_invalid_parameters(self):
+        messages, code = await SocketClient(self.token, query='sample_rate=100').messages()
+
+        self.assertEqual(code, 4400)
+        self.assertIn('sample_rate', messages[-1]['error'])
+
+    async def test_caps_concurrent_sessions(self):
+        with override_settings(LIVE_MAX_SESSIONS=0):
+            messages, code = await SocketClient(self.token).messages()
+
+        self.assertEqual(code, 1013)
+        self.assertEqual(sessions.active, 0)
+
+    async def test_backpressure_stops_reading_while_engine_is_busy(self):
+        """Frames stay with the transport instead of queueing in memory when the engine stalls"""
+        gate = asyncio.Event()
+        send = FakeStreamingStream.send
+
+        async def slow_send(stream, chunk):
+            await gate.wait()
+            await send(stream, chunk)
+
+        with mock.patch.object(FakeStreamingStream, 'send', slow_send):
+            client = SocketClient(self.token)
+            for _ in range(10):
+                client.send_audio(ONE_SECOND)
+            await asyncio.sleep(0.1)
+
+            # One frame at the engine, LIVE_MAX_BUFFERED_FRAMES queued and one
+            # held by the blocked reader; the rest stay unread
+            self.assertEqual(client.inbox.qsize(), 10 - 1 - 2 - 1)
+
+            gate.set()
+            client.stop()
+            _, code = await client.messages()
+
+        self.assertEqual(code, 1000)
@@ -0,0 +1,96 @@
+import io
+import os
+import glob
+import json
+import shutil
+import logging
+import tempfile
+import unittest
+import multiprocessing
+from contextlib import redirect_stdout
+from decimal import Decimal
+from django.test import SimpleTestCase, TestCase
+from api.models import User, Wallet
+from api.services.wallet_service import WalletService
+from api.utils.tracing import tracer
+from AudioText import log_handlers
+from AudioText.log_handlers import JsonFormatter, ProcessSafeRotatingFileHandler, QueuedHandler, SampleFilter
+
+
+def record(level=logging.INFO, msg='hello %s', args=('world',), **extra):
+    entry = logging.LogRecord('api', level, __file__, 1, msg, args, None)
+    entry.__dict__.update(extra)
+    return entry
+
+
+def write_lines(path, worker, count):
+    handler = ProcessSafeRotatingFileHandler(path, maxBytes=2000, backupCount=50)
+    for i in range(count):
+        handler.emit(record(msg='%s-%s ' + 'x' * 40, args=(worker, i)))
+    handler.close()
+
+
+class LogHandlersTestCase(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_json_lines_carry_extra_fields_and_trace_ids(self):
+        with tracer.start_as_current_span('request') as span:
+            line = JsonFormatter().format(record(user_id='u1'))
+
+        entry = json.loads(line)
+        self.assertEqual((entry['message'], entry['level'], entry['user_id']), ('hello world', 'INFO', 'u1'))
+        if span.get_span_context().is_valid:
+            self.assertEqual(entry['trace_id'], format(span.get_span_context().trace_id, '032x'))
+
+    def test_sampling_only_thins_marked_low_level_records(self):
+        sampler = SampleFilter()
+
+        self.assertTrue(sampler.filter(record()))
+        self.assertFalse(sampler.filter(record(logging.DEBUG, sample_rate=0)))
+        self.assertTrue(sampler.filter(record(logging.WARNING, sample_rate=0)))
+
+    def test_queued_records_are_written_by_the_listener(self):
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        target.name = 'test-target'
+        logging._handlers['test-target'] = target
+        self.addCleanup(logging._handlers.pop, 'test-target', None)
+        handler = QueuedHandler(handlers=['test-target'])
+        self.addCleanup(handler.stop)
+
+        handler.handle(record())
+        handler.flush()
+
+        self.assertEqual(stream.getvalue(), 'hello world\n')
+
+    @unittest.skipIf(log_handlers.fcntl is None, 'needs fcntl')
+    def test_processes_share_a_rotating_file_without_losing_lines(self):
+        path = os.path.join(self.directory, 'app.log')
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=write_lines, args=(path, worker, 200)) for worker in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        lines = []
+        for name in glob.glob(f'{path}*'):
+            if not name.endswith('.lock'):
+                with open(name) as f:
+                    lines += f.read().splitlines()
+        self.assertGreater(len(glob.glob(f'{path}.*')), 2)  # it did rotate
+        self.assertEqual(sorted(lines), sorted(f'{w}-{i} ' + 'x' * 40 for w in range(3) for i in range(200)))
+
+
+class WalletLoggingTestCase(TestCase):
+    def test_charging_prints_nothing(self):
+        user = User.objects.create(email='test@example.com', name='Test User', provider='google', provider_id='test123')
+        Wallet.objects.create(user=user, demo_minutes_remaining=Decimal('1.00'), balance=Decimal('10.00'))
+
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            WalletService.deduct_transcription_cost(user, 2.5)
+
+        self.assertEqual(stdout.getvalue(), '')
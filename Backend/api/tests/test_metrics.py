@@ -0,0 +1,92 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from decimal import Decimal
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from api.models import User, Wallet, AudioFile, Transcription
+from api.services.wallet_service import WalletService
+from api.utils.metrics import render_metrics
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@override_settings(RATELIMIT_ENABLE=False, METRICS_ENABLED=True, METRICS_TOKEN='scrape-secret')
+class MetricsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        Wallet.objects.create(user=self.user, demo_minutes_remaining=Decimal('10.00'))
+
+    def test_request_latency_is_recorded_per_view(self):
+        def count():
+            return sample('audiotext_http_request_duration_seconds_count', view='health-live', method='GET', status='200')
+        before = count()
+
+        self.client.get(reverse('health-live'))
+
+        self.assertEqual(count(), before + 1)
+
+    async def test_async_requests_are_recorded(self):
+        labels = {'view': 'async-transcription-detail', 'method': 'GET', 'status': '401'}
+        before = sample('audiotext_http_request_duration_seconds_count', **labels)
+
+        await self.async_client.get(f'/api/async/transcriptions/{self.user.id}/')
+
+        self.assertEqual(sample('audiotext_http_request_duration_seconds_count', **labels), before + 1)
+
+    def scrape(self):
+        return self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+
+    def test_endpoint_exposes_queue_depth_and_wallet_lock_wait(self):
+        audio_file = AudioFile.objects.create(
+            user=self.user, filename='a.wav', file_path='audio/a.wav', duration=1, size=10, format='wav'
+        )
+        Transcription.objects.create(
+            user=self.user, audio_file=audio_file, language='english', duration=1, cost=0
+        )
+        WalletService.deduct_transcription_cost(self.user, 1)
+
+        response = self.scrape()
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('audiotext_transcription_queue_depth{status="pending"} 1.0', body)
+        self.assertIn('audiotext_wallet_lock_wait_seconds_count', body)
+
+    def test_token_is_required(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.scrape().status_code, 200)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_not_served_without_token_outside_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    def test_multiprocess_samples_are_summed(self):
+        """Each worker writes its own files; a scrape adds them up"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        worker = (
+            "from prometheus_client import Counter; "
+            "Counter('audiotext_upload_bytes', '', ['path']).labels('server').inc(100)"
+        )
+        env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': directory}
+        for _ in range(2):
+            subprocess.run([sys.executable, '-c', worker], env=env, check=True)
+
+        with mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': directory}):
+            body, _ = render_metrics()
+
+        self.assertIn(b'audiotext_upload_bytes_total{path="server"} 200.0', body)
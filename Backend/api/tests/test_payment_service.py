@@ -0,0 +1,103 @@
+import hmac
+import hashlib
+import json
+from decimal import Decimal
+from unittest import mock
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.models import User, Wallet, Transaction, PaymentWebhookEvent
+from api.services.payment_service import PaymentService
+from api.services.wallet_service import WalletService
+
+
+@override_settings(RAZORPAY_KEY_ID='rzp_test_key', RAZORPAY_KEY_SECRET='test_secret')
+class PaymentWebhookTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        self.wallet = Wallet.objects.create(user=self.user, balance=Decimal('0.00'))
+        self.client = APIClient()
+    
+    def captured_event(self, payment_id='pay_test123'):
+        return {
+            'event': 'payment.captured',
+            'payload': {'payment': {'entity': {
+                'id': payment_id,
+                'order_id': 'order_test123',
+                'amount': 50000,
+                'notes': {'user_id': str(self.user.id)},
+            }}},
+        }
+    
+    def post_webhook(self, data, event_id):
+        body = json.dumps(data)
+        signature = hmac.new(b'test_secret', body.encode(), hashlib.sha256).hexdigest()
+        return self.client.post(
+            reverse('razorpay-webhook'), body, content_type='application/json',
+            HTTP_X_RAZORPAY_SIGNATURE=signature, HTTP_X_RAZORPAY_EVENT_ID=event_id,
+        )
+    
+    def test_client_is_shared(self):
+        """Test every PaymentService reuses one pooled client"""
+        self.assertIs(PaymentService().client, PaymentService().client)
+    
+    def test_webhook_is_queued_and_deduplicated(self):
+        """Test redelivered events land in the inbox once"""
+        self.assertEqual(self.post_webhook(self.captured_event(), 'evt_1').status_code, 200)
+        self.assertEqual(self.post_webhook(self.captured_event(), 'evt_1').status_code, 200)
+        self.assertEqual(self.post_webhook(self.captured_event(), 'evt_2').status_code, 200)
+        
+        self.assertEqual(PaymentWebhookEvent.objects.count(), 1)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('0.00'))
+    
+    def test_batch_credits_wallet_once(self):
+        """Test processing the inbox credits a payment already verified only once"""
+        WalletService.process_recharge(self.user, 500, 'pay_test123', 'order_test123')
+        self.post_webhook(self.captured_event(), 'evt_1')
+        self.post_webhook(self.captured_event('pay_test456'), 'evt_2')
+        
+        processed = PaymentService().process_webhook_events()
+        
+        self.assertEqual(processed, 2)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('1000.00'))
+        self.assertEqual(Transaction.objects.filter(type='recharge').count(), 2)
+        self.assertFalse(PaymentWebhookEvent.objects.filter(status='pending').exists())
+    
+    def test_events_are_credited_outside_the_batch_transaction(self):
+        """Test only one event's wallet is locked at a time and the order is resolved before locking"""
+        event = self.captured_event()
+        del event['payload']['payment']['entity']['notes']
+        self.post_webhook(event, 'evt_1')
+        self.post_webhook(self.captured_event('pay_test456'), 'evt_2')
+        service = PaymentService()
+        service.client = mock.Mock()
+        depth = {}
+        baseline = len(connection.atomic_blocks)
+        
+        def fetch_order(order_id):
+            depth['order'] = len(connection.atomic_blocks)
+            return {'notes': {'user_id': str(self.user.id)}}
+        
+        def lock_wallet(user, lock=WalletService.lock_wallet):
+            depth.setdefault('wallet', []).append(len(connection.atomic_blocks))
+            return lock(user)
+        
+        service.client.order.fetch.side_effect = fetch_order
+        with mock.patch.object(WalletService, 'lock_wallet', side_effect=lock_wallet):
+            # A recharge on its own, for reference
+            with transaction.atomic():
+                WalletService.process_recharge(self.user, 100, 'pay_direct', None)
+            self.assertEqual(service.process_webhook_events(), 2)
+        
+        self.assertEqual(depth['order'], baseline)
+        self.assertEqual(depth['wallet'][1:], depth['wallet'][:1] * 2)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('1100.00'))
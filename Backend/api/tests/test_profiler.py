@@ -0,0 +1,74 @@
+import pstats
+import tempfile
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from api.models import User, ProfileReport
+from api.services.profiler_service import ProfilerService, RequestProfile
+
+
+@override_settings(RATELIMIT_ENABLE=False, PROFILER_SAMPLE_RATE=0)
+class ProfilerTestCase(TestCase):
+    def test_signed_header_profiles_the_request(self):
+        token = ProfilerService.issue_token()
+
+        response = self.client.get(reverse('health-check'), headers={'X-Profile-Token': token})
+
+        report = ProfileReport.objects.get(id=response['X-Profile-Id'])
+        self.assertEqual((report.trigger, report.view_name), ('header', 'health-check'))
+        self.assertIn('health_check', report.stats)
+
+    def test_unsigned_requests_are_not_profiled(self):
+        response = self.client.get(reverse('health-check'), headers={'X-Profile-Token': 'forged'})
+
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(ProfileReport.objects.exists())
+        self.assertFalse(ProfilerService.verify_token(ProfilerService.issue_token(max_age=-1)))
+
+    @override_settings(PROFILER_SAMPLE_RATE=1.0, PROFILER_MAX_REPORTS=2)
+    def test_sampled_reports_are_rotated(self):
+        for _ in range(3):
+            last = self.client.get(reverse('health-check'))
+
+        self.assertEqual(ProfileReport.objects.count(), 2)
+        self.assertTrue(ProfileReport.objects.filter(id=last['X-Profile-Id'], trigger='sampled').exists())
+
+    @override_settings(PROFILER_SAMPLE_RATE=1.0)
+    async def test_async_requests_are_profiled(self):
+        response = await self.async_client.get('/api/async/transcriptions/00000000-0000-0000-0000-000000000000/')
+
+        report = await ProfileReport.objects.aget(id=response['X-Profile-Id'])
+        self.assertEqual(report.view_name, 'async-transcription-detail')
+
+    @override_settings(PROFILER_SAMPLE_RATE=1.0)
+    async def test_async_profile_covers_sync_views(self):
+        """Test under ASGI the sync view, run in an executor thread, is in the report"""
+        response = await self.async_client.get(reverse('health-check'))
+
+        report = await ProfileReport.objects.aget(id=response['X-Profile-Id'])
+        self.assertIn('rest_framework/views.py', report.stats)
+
+    def test_failed_start_frees_the_profiler(self):
+        token = ProfilerService.issue_token()
+        with mock.patch.object(RequestProfile, 'start', side_effect=ValueError('Another profiler is active')):
+            failed = self.client.get(reverse('health-check'), headers={'X-Profile-Token': token})
+
+        retried = self.client.get(reverse('health-check'), headers={'X-Profile-Token': token})
+
+        self.assertEqual(failed.status_code, 200)
+        self.assertNotIn('X-Profile-Id', failed)
+        self.assertIn('X-Profile-Id', retried)
+
+    def test_staff_download_profile_from_admin(self):
+        token = ProfilerService.issue_token()
+        report_id = self.client.get(reverse('health-check'), headers={'X-Profile-Token': token})['X-Profile-Id']
+        self.client.force_login(User.objects.create_superuser('admin@example.com', 'Admin', 'secret'))
+
+        detail = self.client.get(reverse('admin:api_profilereport_change', args=[report_id]))
+        download = self.client.get(reverse('admin:api_profilereport_download', args=[report_id]))
+
+        self.assertContains(detail, 'Download .prof')
+        with tempfile.NamedTemporaryFile(suffix='.prof') as f:
+            f.write(download.content)
+            f.flush()
+            self.assertGreater(pstats.Stats(f.name).total_calls, 0)
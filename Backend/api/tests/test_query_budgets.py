@@ -0,0 +1,90 @@
+import uuid
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.models import User, Wallet, Transaction, AudioFile, Transcription
+from api.services.auth_service import AuthService
+
+# Most SQL queries each endpoint may run. A list must not grow with its
+# rows: every budget is checked with one row and with several.
+QUERY_BUDGETS = {
+    'wallet-list': 3,
+    'wallet-details': 2,
+    'transaction-list': 3,
+    'audiofile-list': 3,
+    'transcription-list': 3,
+    'transcription-export-csv': 2,
+}
+
+
+@override_settings(RATELIMIT_ENABLE=False, AUTH_USER_CACHE_TIMEOUT=0, QUERY_COUNT_HEADERS=True)
+class QueryBudgetTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        self.wallet = Wallet.objects.create(user=self.user, balance=Decimal('100.00'))
+        self.client = APIClient()
+        self.client.cookies['access_token'] = AuthService.generate_tokens(self.user)['access']
+
+    def add_rows(self, count):
+        for i in range(count):
+            Transaction.objects.create(
+                wallet=self.wallet, type='debit', amount=Decimal('1.00'),
+                balance_before=Decimal('100.00'), balance_after=Decimal('99.00')
+            )
+            audio_file = AudioFile.objects.create(
+                user=self.user, filename=f'clip{i}.wav', file_path=f'audio/{uuid.uuid4()}.wav',
+                duration=Decimal('1.00'), size=1000, format='wav'
+            )
+            Transcription.objects.create(
+                user=self.user, audio_file=audio_file, language='english', text='hello world',
+                duration=Decimal('1.00'), cost=Decimal('1.00'), status='completed'
+            )
+
+    def queries(self, name):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200, name)
+        return [query['sql'] for query in captured]
+
+    def assert_within_budget(self, name):
+        queries = self.queries(name)
+        self.assertLessEqual(
+            len(queries), QUERY_BUDGETS[name],
+            f"{name} ran {len(queries)} queries, budget is {QUERY_BUDGETS[name]}:\n" + '\n'.join(queries)
+        )
+        return len(queries)
+
+    def test_endpoints_stay_within_budget_as_rows_grow(self):
+        self.add_rows(1)
+        single = {name: self.assert_within_budget(name) for name in QUERY_BUDGETS}
+
+        self.add_rows(5)
+        for name in QUERY_BUDGETS:
+            self.assertEqual(self.assert_within_budget(name), single[name], f"{name} runs a query per row")
+
+    def test_query_count_is_reported_in_headers(self):
+        self.add_rows(2)
+
+        response = self.client.get(reverse('transcription-list'))
+
+        self.assertEqual(response['X-DB-Query-Count'], str(len(self.queries('transcription-list'))))
+        self.assertIn('X-DB-Query-Time-Ms', response)
+
+    @override_settings(QUERY_COUNT_HEADERS=False)
+    def test_headers_are_off_by_default_in_production(self):
+        self.assertNotIn('X-DB-Query-Count', self.client.get(reverse('wallet-list')))
+
+    async def test_async_views_are_counted(self):
+        self.async_client.cookies['access_token'] = self.client.cookies['access_token'].value
+        response = await self.async_client.get(reverse('async-transcription-detail', args=[self.user.id]))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertGreaterEqual(int(response['X-DB-Query-Count']), 2)
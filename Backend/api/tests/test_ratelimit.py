@@ -0,0 +1,66 @@
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.models import User, RateLimitCounter
+from api.services.auth_service import AuthService
+from api.utils import ratelimit
+from api.utils.ratelimit import DatabaseRateLimitBackend, parse_rate
+
+
+class RateLimitTestCase(TestCase):
+    def setUp(self):
+        self.backend = DatabaseRateLimitBackend()
+    
+    def test_parse_rate(self):
+        """Test rate strings convert to (limit, seconds)"""
+        self.assertEqual(parse_rate('10/h'), (10, 3600))
+        self.assertEqual(parse_rate('100/5m'), (100, 300))
+    
+    def test_limit_enforced_within_window(self):
+        """Test calls beyond the limit are rejected"""
+        with mock.patch('api.utils.ratelimit.time.time', return_value=3600 * 100):
+            results = [self.backend.hit('test:key', 3, 3600)[0] for _ in range(5)]
+        
+        self.assertEqual(results, [True, True, True, False, False])
+        self.assertEqual(RateLimitCounter.objects.get(key='test:key').count, 3)
+    
+    def test_previous_window_is_weighted(self):
+        """Test the sliding window carries over part of the previous window"""
+        with mock.patch('api.utils.ratelimit.time.time', return_value=3600 * 100):
+            for _ in range(4):
+                self.backend.hit('test:key', 4, 3600)
+        
+        # Halfway through the next window half of the previous 4 still count
+        with mock.patch('api.utils.ratelimit.time.time', return_value=3600 * 101 + 1800):
+            results = [self.backend.hit('test:key', 4, 3600)[0] for _ in range(3)]
+        
+        self.assertEqual(results, [True, True, False])
+    
+    def test_view_returns_429_when_limited(self):
+        """Test contact form is throttled after its hourly limit"""
+        client = APIClient()
+        with mock.patch.object(ratelimit.get_backend(), 'hit', return_value=(False, 120)):
+            response = client.post(reverse('contact-form'), {}, format='json')
+        
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '120')
+    
+    async def test_async_and_sync_paths_share_a_limit(self):
+        """Test the ASGI endpoints count against the same limits as their sync views"""
+        user = await User.objects.acreate(email='test@example.com', name='Test User', provider='google', provider_id='test123')
+        client = APIClient()
+        client.force_authenticate(user)
+        self.async_client.cookies['access_token'] = AuthService.generate_tokens(user)['access']
+        
+        for sync_url, async_url in [
+            (reverse('audiofile-list'), reverse('async-audio-upload')),
+            (reverse('transcription-list'), reverse('async-transcription-create')),
+        ]:
+            with mock.patch.object(ratelimit.get_backend(), 'hit', return_value=(False, 60)) as hit:
+                await sync_to_async(client.post)(sync_url, {}, format='json')
+                await self.async_client.post(async_url, {}, content_type='application/json')
+            
+            sync_key, async_key = (call.args[0] for call in hit.call_args_list)
+            self.assertEqual(sync_key, async_key)
@@ -0,0 +1,122 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from api.models import User, AudioFile, Transcription, StorageUsage
+from api.services.audio_service import AudioService
+from api.services.retention_service import RetentionService
+
+
+class RetentionServiceTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            STORAGE_QUOTA_PER_USER=100,
+            STORAGE_QUOTA_GLOBAL=None,
+            STORAGE_EVICT_ON_QUOTA=True,
+        )
+        self.override.enable()
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+    
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+    
+    def add_audio(self, size, accessed_days_ago, status='completed'):
+        RetentionService.reserve(self.user, size)
+        path = default_storage.save(f'audio_files/{self.user.id}/clip.mp3', ContentFile(b'x' * size))
+        audio_file = AudioFile.objects.create(
+            user=self.user, filename='clip.mp3', file_path=path, duration=Decimal('1.00'),
+            size=size, format='mp3', last_accessed_at=timezone.now() - timedelta(days=accessed_days_ago)
+        )
+        Transcription.objects.create(
+            user=self.user, audio_file=audio_file, language='english', text='hello',
+            duration=Decimal('1.00'), cost=Decimal('0.00'), status=status
+        )
+        return audio_file
+    
+    def usage(self, key=None):
+        return StorageUsage.objects.get(key=key or str(self.user.id)).bytes_used
+    
+    def test_counters_track_reservations(self):
+        """Test user and global counters grow with uploads"""
+        self.add_audio(30, 1)
+        self.add_audio(20, 1)
+        
+        self.assertEqual(self.usage(), 50)
+        self.assertEqual(self.usage(StorageUsage.GLOBAL_KEY), 50)
+    
+    def test_quota_evicts_least_recently_used(self):
+        """Test the oldest-accessed completed audio is evicted to make room"""
+        oldest = self.add_audio(40, 10)
+        newer = self.add_audio(40, 1)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            RetentionService.reserve(self.user, 40)
+        
+        oldest.refresh_from_db()
+        newer.refresh_from_db()
+        self.assertEqual(oldest.storage_state, 'evicted')
+        self.assertFalse(default_storage.exists(oldest.file_path))
+        self.assertEqual(oldest.transcriptions.get().text, 'hello')
+        self.assertEqual(newer.storage_state, 'hot')
+        self.assertEqual(self.usage(), 80)
+    
+    def test_in_flight_audio_is_never_evicted(self):
+        """Test audio still being transcribed blocks the upload instead"""
+        self.add_audio(80, 10, status='processing')
+        
+        with self.assertRaises(ValueError):
+            RetentionService.reserve(self.user, 40)
+        self.assertEqual(self.usage(), 80)
+    
+    def test_audio_queued_after_selection_is_not_evicted(self):
+        """Test a transcription created after the eviction scan keeps its audio"""
+        audio_file = self.add_audio(40, 10)
+        selected = RetentionService.evictable_audio().get()
+        Transcription.objects.create(
+            user=self.user, audio_file=audio_file, language='english',
+            duration=Decimal('1.00'), cost=Decimal('0.00'), status='pending'
+        )
+        
+        self.assertFalse(RetentionService.evict(selected))
+        self.assertTrue(default_storage.exists(audio_file.file_path))
+        self.assertEqual(self.usage(), 40)
+    
+    def test_delete_racing_eviction_releases_quota_once(self):
+        """Test deleting a stale hot instance of evicted audio leaves the counters alone"""
+        self.add_audio(30, 1)
+        stale = self.add_audio(40, 10)
+        RetentionService.evict(AudioFile.objects.get(pk=stale.pk))
+        
+        AudioService.delete_audio_file(stale)
+        
+        self.assertEqual(self.usage(), 30)
+    
+    @override_settings(STORAGE_EVICT_ON_QUOTA=False)
+    def test_quota_rejects_without_eviction(self):
+        """Test uploads over quota are rejected when eviction is off"""
+        self.add_audio(80, 10)
+        
+        with self.assertRaises(ValueError):
+            RetentionService.reserve(self.user, 40)
+        self.assertEqual(AudioFile.objects.filter(storage_state='hot').count(), 1)
+    
+    def test_recount_fixes_drift(self):
+        """Test counters can be rebuilt from hot rows"""
+        self.add_audio(30, 1)
+        StorageUsage.objects.filter(key=str(self.user.id)).update(bytes_used=999)
+        
+        RetentionService.recount()
+        
+        self.assertEqual(self.usage(), 30)
@@ -0,0 +1,137 @@
+import json
+import asyncio
+import shutil
+import tempfile
+from decimal import Decimal
+from asgiref.sync import sync_to_async
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from api.models import User, Wallet, Transcription
+from api.services.audio_service import AudioService
+from api.services.auth_service import AuthService
+from api.services.lease_service import LeaseService
+from api.services.transcription_service import TranscriptionService
+from api.utils.status_hub import TranscriptionStatusHub, status_event
+from api.tests.test_storage import make_wav
+
+
+def parse_events(chunks):
+    """Decode an SSE body into its data payloads, skipping keep-alive comments"""
+    body = ''.join(chunk.decode() if isinstance(chunk, bytes) else chunk for chunk in chunks)
+    return [
+        json.loads(line[len('data: '):])
+        for line in body.splitlines()
+        if line.startswith('data: ')
+    ]
+
+
+@override_settings(
+    RATELIMIT_ENABLE=False,
+    TRANSCRIPTION_EVENTS_POLL_INTERVAL=0.01,
+    TRANSCRIPTION_EVENTS_HEARTBEAT=0.05,
+    TRANSCRIPTION_LONG_POLL_TIMEOUT=0.2,
+)
+class StatusPushTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        Wallet.objects.create(user=self.user, demo_minutes_remaining=Decimal('10.00'))
+        audio_file = AudioService.store_audio_file(
+            SimpleUploadedFile('clip.wav', make_wav(seconds=3), content_type='audio/wav'), self.user
+        )
+        self.transcription = TranscriptionService.create_transcription(audio_file.id, 'english', self.user)
+        self.async_client.cookies['access_token'] = AuthService.generate_tokens(self.user)['access']
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+
+    def current(self):
+        return status_event(self.transcription.id, self.transcription.status)
+
+    async def test_hub_fans_out_published_events(self):
+        hub = TranscriptionStatusHub()
+        first = hub.subscribe(self.transcription.id, self.current())
+        second = hub.subscribe(self.transcription.id, self.current())
+
+        hub.publish(self.transcription.id, status_event(self.transcription.id, 'processing'))
+
+        for queue in (first, second):
+            event = await asyncio.wait_for(queue.get(), 1)
+            self.assertEqual(event['status'], 'processing')
+
+        hub.unsubscribe(self.transcription.id, first)
+        hub.unsubscribe(self.transcription.id, second)
+
+    async def test_hub_polls_changes_made_elsewhere(self):
+        """A status written by another process reaches waiters through the shared poller"""
+        hub = TranscriptionStatusHub()
+        queue = hub.subscribe(self.transcription.id, self.current())
+
+        await Transcription.objects.filter(id=self.transcription.id).aupdate(status='failed', error_message='boom')
+
+        event = await asyncio.wait_for(queue.get(), 1)
+        self.assertEqual(event['status'], 'failed')
+        self.assertEqual(event['error_message'], 'boom')
+        hub.unsubscribe(self.transcription.id, queue)
+
+    async def test_event_stream_closes_on_terminal_status(self):
+        await sync_to_async(LeaseService.claim)(self.transcription, 'worker')
+        response = await self.async_client.get(
+            reverse('async-transcription-events', args=[self.transcription.id])
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        chunks = [await anext(stream)]
+
+        await sync_to_async(TranscriptionService.complete_transcription)(self.transcription, 'hello world', 'worker')
+        chunks += [chunk async for chunk in stream]
+
+        events = parse_events(chunks)
+        self.assertEqual([e['status'] for e in events], ['processing', 'completed'])
+
+    async def test_event_stream_for_finished_transcription(self):
+        await Transcription.objects.filter(id=self.transcription.id).aupdate(status='completed')
+
+        response = await self.async_client.get(
+            reverse('async-transcription-events', args=[self.transcription.id])
+        )
+        events = parse_events([chunk async for chunk in response.streaming_content])
+
+        self.assertEqual([e['status'] for e in events], ['completed'])
+
+    async def test_long_poll_answers_on_change(self):
+        url = reverse('async-transcription-wait', args=[self.transcription.id])
+
+        # An out-of-date client gets the current status straight away
+        stale = await self.async_client.get(url, {'status': 'completed'})
+        self.assertEqual(stale.json()['status'], 'pending')
+
+        await sync_to_async(LeaseService.claim)(self.transcription, 'worker')
+
+        async def finish_soon():
+            await asyncio.sleep(0.05)
+            await sync_to_async(TranscriptionService.fail_transcription)(
+                self.transcription, ValueError('bad audio'), 'worker'
+            )
+
+        waiter = asyncio.ensure_future(finish_soon())
+        response = await self.async_client.get(url, {'status': 'processing'})
+        await waiter
+
+        self.assertEqual(response.json()['status'], 'failed')
+
+    async def test_long_poll_times_out_with_unchanged_status(self):
+        response = await self.async_client.get(
+            reverse('async-transcription-wait', args=[self.transcription.id]), {'status': 'pending'}
+        )
+        self.assertEqual(response.json()['status'], 'pending')
@@ -0,0 +1,161 @@
+import io
+import shutil
+import tempfile
+import wave
+import boto3
+import requests
+from decimal import Decimal
+from unittest import mock
+from moto import mock_aws
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.models import User, Wallet, AudioBlob, AudioFile, StorageUsage
+from api.services.audio_service import AudioService
+from api.services.storage_service import StorageService
+
+S3_STORAGES = {
+    'default': {
+        'BACKEND': 'storages.backends.s3.S3Storage',
+        'OPTIONS': {
+            'bucket_name': 'audio-test',
+            'region_name': 'us-east-1',
+            'access_key': 'test',
+            'secret_key': 'test',
+            'default_acl': None,
+            'file_overwrite': False,
+        },
+    },
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+def make_wav(seconds=3, rate=8000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b'\x00\x00' * rate * seconds)
+    return buffer.getvalue()
+
+
+class StorageTestMixin:
+    def setUp(self):
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        Wallet.objects.create(user=self.user, demo_minutes_remaining=Decimal('10.00'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class LocalStorageTestCase(StorageTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+    
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+    
+    def test_store_audio_file(self):
+        """Test an upload is measured from the file object and saved"""
+        upload = SimpleUploadedFile('clip.wav', make_wav(seconds=3), content_type='audio/wav')
+        audio_file = AudioService.store_audio_file(upload, self.user)
+        
+        self.assertEqual(audio_file.duration, Decimal('0.05'))
+        self.assertTrue(default_storage.exists(audio_file.storage_path))
+        self.assertTrue(StorageService.is_local())
+    
+    def test_failed_insert_returns_reservation(self):
+        """Test quota and the blob are given back when the record cannot be saved"""
+        upload = SimpleUploadedFile('clip.wav', make_wav(seconds=3), content_type='audio/wav')
+        
+        with mock.patch.object(AudioFile.objects, 'create', side_effect=DatabaseError('insert failed')):
+            with self.assertRaises(DatabaseError):
+                AudioService.store_audio_file(upload, self.user)
+        
+        self.assertFalse(StorageUsage.objects.filter(bytes_used__gt=0).exists())
+        self.assertFalse(AudioBlob.objects.exists())
+        prefixes = default_storage.listdir('audio_blobs')[0]
+        self.assertFalse(any(default_storage.listdir(f'audio_blobs/{prefix}')[1] for prefix in prefixes))
+    
+    def test_presigned_upload_requires_object_storage(self):
+        """Test direct uploads are refused on local disk storage"""
+        response = self.client.post(reverse('audiofile-upload-url'), {'filename': 'clip.wav', 'size': 100}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+@mock_aws
+@override_settings(STORAGES=S3_STORAGES)
+class ObjectStorageTestCase(StorageTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='audio-test')
+    
+    def upload(self, content, filename='clip.wav'):
+        response = self.client.post(
+            reverse('audiofile-upload-url'), {'filename': filename, 'size': len(content)}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        session = response.json()
+        put = requests.put(session['upload']['url'], data=content, headers=session['upload']['headers'])
+        self.assertEqual(put.status_code, 200)
+        return session['upload_token']
+    
+    def test_presigned_upload_and_finalize(self):
+        """Test a client can PUT straight to storage and the API only records metadata"""
+        upload_token = self.upload(make_wav(seconds=3))
+        
+        response = self.client.post(reverse('audiofile-finalize-upload'), {'upload_token': upload_token}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['audio_file']['duration'], 0.05)
+        
+        # Finalizing twice does not create a second record
+        self.client.post(reverse('audiofile-finalize-upload'), {'upload_token': upload_token}, format='json')
+        self.assertEqual(AudioFile.objects.count(), 1)
+        
+        audio_file = AudioFile.objects.get()
+        self.assertFalse(StorageService.is_local())
+        self.assertTrue(StorageService.get_engine_source(audio_file.storage_path).startswith('https://'))
+    
+    def test_concurrent_finalize_reserves_once(self):
+        """Test a finalize that misses a concurrent one's row neither reserves nor adopts again"""
+        upload_token = self.upload(make_wav(seconds=3))
+        first = AudioService.finalize_upload(upload_token, self.user)
+        
+        # As if both finalizes checked for the row before either inserted it
+        with mock.patch.object(AudioFile.objects, 'filter', return_value=AudioFile.objects.none()):
+            second = AudioService.finalize_upload(upload_token, self.user)
+        
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(StorageUsage.objects.get(key=str(self.user.id)).bytes_used, first.size)
+        self.assertEqual(AudioBlob.objects.get().ref_count, 1)
+        self.assertTrue(default_storage.exists(first.storage_path))
+    
+    def test_finalize_rejects_invalid_audio(self):
+        """Test an unreadable upload is removed from storage"""
+        upload_token = self.upload(b'not audio')
+        
+        response = self.client.post(reverse('audiofile-finalize-upload'), {'upload_token': upload_token}, format='json')
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(AudioFile.objects.count(), 0)
+    
+    def test_finalize_rejects_foreign_token(self):
+        """Test another user's upload token cannot be finalized"""
+        upload_token = self.upload(make_wav())
+        other = User.objects.create(email='other@example.com', name='Other', provider='google', provider_id='other')
+        self.client.force_authenticate(other)
+        
+        response = self.client.post(reverse('audiofile-finalize-upload'), {'upload_token': upload_token}, format='json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,105 @@
+import json
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from rest_framework.test import APIClient
+from api.models import User, Wallet, Transcription
+from api.services.audio_service import AudioService
+from api.services.auth_service import AuthService
+from api.services.transcription_service import TranscriptionService
+from api.tests.test_storage import make_wav
+from api.tests.test_transcription_leases import fake_transcriber
+from api.utils.tracing import FileSpanExporter, configure_tracing, tracer
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+
+exporter = InMemorySpanExporter()
+
+
+def install_exporter():
+    """The tracer provider can only be set once per process"""
+    if not isinstance(trace.get_tracer_provider(), TracerProvider):
+        configure_tracing(exporter)
+
+
+@override_settings(RATELIMIT_ENABLE=False)
+class TracingTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        install_exporter()
+
+    def setUp(self):
+        exporter.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        Wallet.objects.create(user=self.user, demo_minutes_remaining=Decimal('10.00'))
+        self.audio_file = AudioService.store_audio_file(
+            SimpleUploadedFile('clip.wav', make_wav(seconds=3), content_type='audio/wav'), self.user
+        )
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+
+    def spans(self):
+        return {span.name: span for span in exporter.get_finished_spans()}
+
+    def test_request_continues_callers_trace_through_billing(self):
+        client = APIClient()
+        client.cookies['access_token'] = AuthService.generate_tokens(self.user)['access']
+        transcriber = fake_transcriber()
+        transcriber.upload_file.return_value = 'https://cdn.example/audio'
+
+        with mock.patch('api.services.transcription_service.aai.Transcriber', return_value=transcriber):
+            response = client.post(
+                reverse('transcription-list'),
+                {'audio_file_id': str(self.audio_file.id), 'language': 'english'},
+                format='json',
+                headers={'traceparent': f'00-{TRACE_ID}-00f067aa0ba902b7-01'},
+            )
+
+        self.assertEqual(response.status_code, 201)
+        spans = self.spans()
+        self.assertEqual(spans['POST transcription-list'].attributes['http.response.status_code'], 201)
+        for name in ('transcription.process', 'transcription.upload', 'transcription.engine',
+                     'transcription.billing', 'wallet.lock'):
+            self.assertEqual(format(spans[name].context.trace_id, '032x'), TRACE_ID, name)
+        self.assertEqual(spans['wallet.lock'].parent.span_id, spans['wallet.deduct_transcription_cost'].context.span_id)
+
+    def test_worker_joins_the_trace_that_queued_the_job(self):
+        with tracer.start_as_current_span('queue request') as request_span:
+            transcription = TranscriptionService.create_transcription(self.audio_file.id, 'english', self.user)
+        self.assertIn('traceparent', Transcription.objects.get(id=transcription.id).trace_context)
+
+        with mock.patch('api.services.transcription_service.aai.Transcriber', return_value=fake_transcriber()), \
+                mock.patch('signal.signal'):
+            call_command('process_transcriptions', '--once', stdout=mock.Mock())
+
+        process = self.spans()['transcription.process']
+        self.assertEqual(process.context.trace_id, request_span.get_span_context().trace_id)
+        self.assertEqual(process.attributes['transcription.id'], str(transcription.id))
+
+    def test_file_exporter_writes_one_span_per_line(self):
+        path = f'{self.media_root}/traces.jsonl'
+        FileSpanExporter(path).export(exporter.get_finished_spans())
+
+        with open(path) as f:
+            names = [json.loads(line)['name'] for line in f]
+        self.assertIn('audio.store', names)
+        self.assertIn('audio.extract_duration', names)
@@ -0,0 +1,117 @@
+import io
+import shutil
+import wave
+import tempfile
+from decimal import Decimal
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from pydub import AudioSegment
+from pydub.generators import Sine
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.checks import check_ffmpeg
+from api.models import User, Wallet, Transcription, TranscriptionTiming
+from api.services.audio_service import AudioService, AudioWindows
+from api.services.auth_service import AuthService
+from api.services.transcription_service import TranscriptionService
+from api.tests.test_async_views import fake_engine
+from api.tests.test_storage import make_wav
+
+
+@override_settings(RATELIMIT_ENABLE=False, TRANSCRIPTION_WINDOW_SECONDS=5, TRANSCRIPTION_WINDOW_SEARCH_SECONDS=0)
+class TranscriptSegmentTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        Wallet.objects.create(user=self.user, demo_minutes_remaining=Decimal('10.00'))
+        audio_file = AudioService.store_audio_file(
+            SimpleUploadedFile('long.wav', make_wav(seconds=12), content_type='audio/wav'), self.user
+        )
+        self.transcription = TranscriptionService.create_transcription(audio_file.id, 'english', self.user)
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_resume_skips_saved_segments(self):
+        self.assertEqual(TranscriptionService.resume_at(self.transcription), 0.0)
+
+        TranscriptionService.append_segment(self.transcription, 0.0, 5.0, 'first part')
+
+        self.assertEqual(TranscriptionService.resume_at(self.transcription), 5.0)
+
+    def test_silent_window_is_saved_without_text(self):
+        """Test a window the engine returns no text for still becomes a segment"""
+        TranscriptionService.append_segment(self.transcription, 0.0, 5.0, None)
+
+        self.assertEqual(self.transcription.segments.get().text, '')
+
+    def test_missing_ffmpeg_is_reported(self):
+        with mock.patch('api.checks.shutil.which', return_value=None):
+            self.assertEqual([warning.id for warning in check_ffmpeg(None)], ['api.W001'])
+
+    @override_settings(TRANSCRIPTION_WINDOW_SEARCH_SECONDS=2)
+    def test_windows_are_cut_at_silence_and_downsampled(self):
+        # Speech (a tone) everywhere except a pause at 4.0-4.3 s
+        tone = Sine(440).to_audio_segment(duration=12000).set_frame_rate(44100).set_channels(2)
+        audio = tone[:4000] + AudioSegment.silent(300, frame_rate=44100).set_channels(2) + tone[4300:]
+        path = f'{self.media_root}/speech.wav'
+        audio.export(path, format='wav')
+
+        with AudioWindows(self.transcription.audio_file) as windows:
+            windows.path = path
+            data, end = TranscriptionService.next_window(self.transcription, None, windows, 0.0)
+
+        self.assertTrue(4.0 <= end <= 4.3)
+        with wave.open(io.BytesIO(data)) as window:
+            self.assertEqual((window.getnchannels(), window.getframerate()), (1, 16000))
+            self.assertAlmostEqual(window.getnframes() / 16000, end, places=1)
+
+    def test_detail_returns_transcript_so_far(self):
+        self.transcription.status = 'processing'
+        self.transcription.save()
+        TranscriptionService.append_segment(self.transcription, 0.0, 5.0, 'first part')
+        TranscriptionService.append_segment(self.transcription, 5.0, 10.0, 'second part')
+
+        client = APIClient()
+        client.cookies['access_token'] = AuthService.generate_tokens(self.user)['access']
+        response = client.get(reverse('transcription-detail', args=[self.transcription.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['text'], 'first part second part')
+        self.assertEqual(response.json()['progress'], 83.3)
+
+    async def test_long_audio_is_saved_window_by_window(self):
+        engine = fake_engine()
+
+        # As on object storage: the file is downloaded once for all windows
+        with mock.patch.object(engine, 'upload', wraps=engine.upload) as upload, \
+                mock.patch('api.services.audio_service.StorageService.is_local', return_value=False), \
+                mock.patch.object(default_storage, 'open', wraps=default_storage.open) as opened:
+            await TranscriptionService.aprocess_transcription(self.transcription, engine=engine)
+
+        self.assertEqual(opened.call_count, 1)
+
+        # Each window is decoded and sent as mono 16 kHz WAV bytes, all counted
+        self.assertEqual(upload.call_count, 3)
+        sent = [call.args[1] for call in upload.call_args_list]
+        self.assertTrue(all(isinstance(data, bytes) for data in sent))
+        timing = await TranscriptionTiming.objects.aget(transcription_id=self.transcription.id)
+        self.assertEqual(timing.bytes_sent, sum(len(data) for data in sent))
+
+        segments = await sync_to_async(list)(self.transcription.segments.values_list('position', 'start', 'end'))
+        self.assertEqual(segments, [(0, 0.0, 5.0), (1, 5.0, 10.0), (2, 10.0, 12.0)])
+
+        transcription = await Transcription.objects.aget(id=self.transcription.id)
+        self.assertEqual(transcription.status, 'completed')
+        self.assertEqual(transcription.text, 'hello world hello world hello world')
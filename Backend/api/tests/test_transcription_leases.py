@@ -0,0 +1,129 @@
+import shutil
+import signal
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from api.models import User, Wallet, Transaction, Transcription
+from api.services.audio_service import AudioService
+from api.services.lease_service import LeaseService, LeaseLost
+from api.services.transcription_service import TranscriptionService
+from api.management.commands.process_transcriptions import Command as WorkerCommand
+from api.tests.test_storage import make_wav
+
+
+def fake_transcriber(text='hello world'):
+    transcriber = mock.Mock()
+    transcriber.transcribe.return_value = mock.Mock(status='completed', text=text)
+    return transcriber
+
+
+@override_settings(TRANSCRIPTION_MAX_ATTEMPTS=2)
+class TranscriptionLeaseTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        self.wallet = Wallet.objects.create(
+            user=self.user, demo_minutes_remaining=Decimal('0.00'), balance=Decimal('10.00')
+        )
+        self.audio_file = AudioService.store_audio_file(
+            SimpleUploadedFile('clip.wav', make_wav(seconds=3), content_type='audio/wav'), self.user
+        )
+        self.transcription = TranscriptionService.create_transcription(self.audio_file.id, 'english', self.user)
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+
+    def expire_lease(self):
+        Transcription.objects.filter(id=self.transcription.id).update(
+            lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+    def test_claim_is_exclusive(self):
+        other = Transcription.objects.get(id=self.transcription.id)
+
+        self.assertTrue(LeaseService.claim(self.transcription, 'worker-a'))
+        self.assertFalse(LeaseService.claim(other, 'worker-b'))
+        self.assertEqual(self.transcription.attempts, 1)
+        self.assertTrue(LeaseService.heartbeat(self.transcription.id, 'worker-a'))
+        self.assertFalse(LeaseService.heartbeat(self.transcription.id, 'worker-b'))
+
+    def test_reaper_requeues_until_attempts_run_out(self):
+        LeaseService.claim(self.transcription, 'worker-a')
+        self.assertEqual(LeaseService.reap(), (0, 0))  # lease still live
+
+        self.expire_lease()
+        self.assertEqual(LeaseService.reap(), (1, 0))
+        self.transcription.refresh_from_db()
+        self.assertEqual(self.transcription.status, 'pending')
+        self.assertIsNone(self.transcription.lease_owner)
+
+        LeaseService.claim(self.transcription, 'worker-b')
+        self.expire_lease()
+        self.assertEqual(LeaseService.reap(), (0, 1))
+        self.transcription.refresh_from_db()
+        self.assertEqual(self.transcription.status, 'failed')
+
+    def test_rows_stuck_without_a_lease_are_requeued(self):
+        Transcription.objects.filter(id=self.transcription.id).update(status='processing')
+
+        self.assertEqual(LeaseService.reap(), (1, 0))
+
+    def test_retried_job_is_charged_once(self):
+        """A worker that lost its lease cannot complete (or charge) the job again"""
+        LeaseService.claim(self.transcription, 'worker-a')
+        self.expire_lease()
+        LeaseService.reap()
+
+        retry = Transcription.objects.get(id=self.transcription.id)
+        with mock.patch('api.services.transcription_service.aai.Transcriber', return_value=fake_transcriber()):
+            TranscriptionService.process_transcription(retry, 'worker-b')
+        self.assertEqual(retry.status, 'completed')
+
+        with self.assertRaises(LeaseLost):
+            TranscriptionService.complete_transcription(self.transcription, 'late result', 'worker-a')
+
+        self.assertEqual(Transaction.objects.filter(wallet=self.wallet, type='debit').count(), 1)
+        retry.refresh_from_db()
+        self.assertEqual(retry.text, 'hello world')
+        self.assertIsNotNone(retry.charge_id)
+
+    def test_worker_processes_queue(self):
+        with mock.patch('api.services.transcription_service.aai.Transcriber', return_value=fake_transcriber()), \
+                mock.patch('signal.signal'):
+            call_command('process_transcriptions', '--once', stdout=mock.Mock())
+
+        self.transcription.refresh_from_db()
+        self.assertEqual(self.transcription.status, 'completed')
+        self.assertEqual(self.transcription.attempts, 1)
+
+    def test_second_signal_hands_job_back(self):
+        """Graceful shutdown: the first signal drains, the second gives the job back to the queue"""
+        worker = WorkerCommand(stdout=mock.Mock())
+
+        def interrupted(source):
+            worker.request_stop(signal.SIGTERM, None)
+            worker.request_stop(signal.SIGTERM, None)
+
+        transcriber = fake_transcriber()
+        transcriber.transcribe.side_effect = interrupted
+        with mock.patch('api.services.transcription_service.aai.Transcriber', return_value=transcriber), \
+                mock.patch('signal.signal'):
+            worker.handle(once=True, interval=0)
+
+        self.transcription.refresh_from_db()
+        self.assertEqual(self.transcription.status, 'pending')
+        self.assertEqual(self.transcription.attempts, 0)
+        self.assertIsNone(self.transcription.lease_owner)
@@ -0,0 +1,79 @@
+import shutil
+import tempfile
+from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from api.models import User, Wallet, Transcription
+from api.services.audio_service import AudioService
+from api.services.lease_service import LeaseService, LeaseLost
+from api.services.transcription_service import TranscriptionService
+from api.services.transcription_state import TranscriptionStateMachine, InvalidTransition, TransitionLost
+from api.tests.test_storage import make_wav
+
+
+class TranscriptionStateMachineTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        Wallet.objects.create(user=self.user, demo_minutes_remaining=Decimal('10.00'))
+        audio_file = AudioService.store_audio_file(
+            SimpleUploadedFile('clip.wav', make_wav(seconds=3), content_type='audio/wav'), self.user
+        )
+        self.transcription = TranscriptionService.create_transcription(audio_file.id, 'english', self.user)
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_transitions_stamp_their_time(self):
+        LeaseService.claim(self.transcription, 'worker')
+        TranscriptionService.complete_transcription(self.transcription, 'hello world', 'worker')
+
+        row = Transcription.objects.get(id=self.transcription.id)
+        self.assertEqual(row.status, 'completed')
+        self.assertIsNotNone(row.started_at)
+        self.assertIsNotNone(row.completed_at)
+        self.assertEqual(row.status_changed_at, row.completed_at)
+        self.assertIsNone(row.failed_at)
+
+    def test_invalid_transition_fails_before_writing(self):
+        with self.assertNumQueries(0), self.assertRaises(InvalidTransition):
+            TranscriptionStateMachine.transition(self.transcription, 'pending', 'completed')
+
+    def test_finished_job_is_never_overwritten(self):
+        LeaseService.claim(self.transcription, 'worker')
+        TranscriptionService.complete_transcription(self.transcription, 'hello world', 'worker')
+
+        stale = Transcription.objects.get(id=self.transcription.id)
+        stale.status = 'processing'
+        with self.assertRaises(TransitionLost):
+            TranscriptionStateMachine.transition(stale, 'processing', 'failed', error_message='late error')
+
+        # The failure path gives up quietly once the job is finished
+        TranscriptionService.fail_transcription(stale, ValueError('late error'), 'worker')
+        with self.assertRaises(LeaseLost):
+            TranscriptionService.complete_transcription(stale, 'again', 'worker')
+
+        row = Transcription.objects.get(id=self.transcription.id)
+        self.assertEqual(row.status, 'completed')
+        self.assertEqual(row.text, 'hello world')
+        self.assertIsNone(row.error_message)
+
+    def test_status_updates_write_only_changed_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            LeaseService.claim(self.transcription, 'worker')
+
+        update = next(q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE'))
+        assignments, condition = update.split(' WHERE ')
+        self.assertIn('"status"', condition)  # UPDATE ... WHERE status = 'pending'
+        self.assertNotIn('"text"', assignments)
+        self.assertNotIn('"cost"', assignments)
@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from api.models import User, Wallet, TranscriptionTiming
+from api.services.audio_service import AudioService
+from api.services.telemetry_service import TelemetryService, MB
+from api.services.transcription_service import TranscriptionService
+from api.tests.test_async_views import fake_engine
+from api.tests.test_storage import make_wav
+from api.tests.test_transcription_leases import fake_transcriber
+
+
+class TranscriptionTelemetryTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.user = User.objects.create(
+            email='test@example.com',
+            name='Test User',
+            provider='google',
+            provider_id='test123'
+        )
+        Wallet.objects.create(user=self.user, demo_minutes_remaining=Decimal('10.00'))
+        self.audio_file = AudioService.store_audio_file(
+            SimpleUploadedFile('clip.wav', make_wav(seconds=3), content_type='audio/wav'), self.user
+        )
+        self.transcription = TranscriptionService.create_transcription(self.audio_file.id, 'english', self.user)
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_completed_job_records_timings(self):
+        transcriber = fake_transcriber()
+        transcriber.upload_file.return_value = 'https://cdn.example/audio'
+        with mock.patch('api.services.transcription_service.aai.Transcriber', return_value=transcriber):
+            TranscriptionService.process_transcription(self.transcription)
+
+        transcriber.transcribe.assert_called_once_with('https://cdn.example/audio')
+        timing = TranscriptionTiming.objects.get(transcription_id=self.transcription.id)
+        self.assertEqual(timing.status, 'completed')
+        self.assertEqual((timing.language, timing.format), ('english', 'wav'))
+        self.assertEqual(timing.bytes_sent, self.audio_file.size)
+        self.assertEqual(timing.audio_seconds, 3.0)
+        self.assertIsNotNone(timing.realtime_factor)
+        self.assertGreaterEqual(timing.total_ms, timing.engine_ms)
+
+    def test_failed_job_records_timings(self):
+        transcriber = fake_transcriber()
+        transcriber.transcribe.side_effect = RuntimeError('engine down')
+        with mock.patch('api.services.transcription_service.aai.Transcriber', return_value=transcriber):
+            with self.assertRaises(RuntimeError):
+                TranscriptionService.process_transcription(self.transcription)
+
+        self.assertEqual(TranscriptionTiming.objects.get(transcription_id=self.transcription.id).status, 'failed')
+
+    async def test_async_job_counts_uploaded_bytes(self):
+        await TranscriptionService.aprocess_transcription(self.transcription, engine=fake_engine())
+
+        timing = await TranscriptionTiming.objects.aget(transcription_id=self.transcription.id)
+        self.assertEqual(timing.bytes_sent, self.audio_file.size)
+        self.assertEqual(timing.status, 'completed')
+
+    def test_report_percentiles_by_group(self):
+        for i, (language, size) in enumerate([('english', 100), ('english', 2 * MB), ('hindi', 60 * MB)]):
+            TranscriptionTiming.objects.create(
+                transcription_id=f'00000000-0000-0000-0000-00000000000{i}',
+                status='completed', language=language, format='mp3', file_size=size,
+                audio_seconds=60, total_ms=(i + 1) * 1000, engine_ms=500, realtime_factor=0.1,
+            )
+
+        report = TelemetryService.report()
+
+        self.assertEqual(report['overall']['count'], 3)
+        self.assertEqual(report['overall']['total_ms'], {'p50': 2000, 'p95': 2900.0, 'p99': 2980.0})
+        self.assertEqual(report['language']['english']['total_ms']['p50'], 1500)
+        self.assertEqual(list(report['size']), ['< 1 MB', '1-10 MB', '50 MB+'])
+
+        admin = User.objects.create_superuser('admin@example.com', 'Admin', 'secret')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:api_transcriptiontiming_report'), {'days': 7})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '50 MB+')
@@ -1,12 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import views, async_views
 
 router = DefaultRouter()
 router.register(r'wallet', views.WalletViewSet, basename='wallet')
 router.register(r'transactions', views.TransactionViewSet, basename='transaction')
 router.register(r'audio', views.AudioFileViewSet, basename='audiofile')
 router.register(r'transcriptions', views.TranscriptionViewSet, basename='transcription')
+router.register(r'deletions', views.DeletionRequestViewSet, basename='deletionrequest')
 
 urlpatterns = [
     # Auth endpoints
@@ -21,10 +22,21 @@ urlpatterns = [
     
     # Health check
     path('health/', views.health_check, name='health-check'),
+    path('health/ready/', views.health_check, name='health-ready'),
+    path('health/live/', views.health_live, name='health-live'),
+    path('health/deep/', views.health_deep, name='health-deep'),
     
     # Webhook
     path('payment/webhook/', views.razorpay_webhook, name='razorpay-webhook'),
     
+    # Native async endpoints (run under ASGI, e.g. uvicorn AudioText.asgi:application)
+    path('async/audio/', async_views.upload_audio, name='async-audio-upload'),
+    path('async/transcriptions/', async_views.create_transcription, name='async-transcription-create'),
+    path('async/transcriptions/<uuid:pk>/', async_views.transcription_detail, name='async-transcription-detail'),
+    path('async/transcriptions/<uuid:pk>/download/', async_views.download_transcription, name='async-transcription-download'),
+    path('async/transcriptions/<uuid:pk>/events/', async_views.transcription_events, name='async-transcription-events'),
+    path('async/transcriptions/<uuid:pk>/wait/', async_views.wait_transcription, name='async-transcription-wait'),
+    
     # Router URLs
     path('', include(router.urls)),
 ]
@@ -1,3 +1,4 @@
 from .decorators import retry_on_deadlock
+from .cookie_auth import invalidate_cached_user
 
-__all__ = ['retry_on_deadlock']
+__all__ = ['retry_on_deadlock', 'invalidate_cached_user']
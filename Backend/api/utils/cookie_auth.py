@@ -1,14 +1,40 @@
 from django.conf import settings
+from django.core.cache import cache
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .metrics import record_cache
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def user_cache_key(user_id):
+    """Cache key holding the resolved user for a token's user id"""
+    return f'auth_user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    """
+    Drop the cached user so the next request re-reads it from the database.
+    Called on logout and whenever a user row is saved or deleted.
+    """
+    cache.delete(user_cache_key(user_id))
 
 
 class CookieJWTAuthentication(JWTAuthentication):
     """
     Custom JWT authentication that reads tokens from httpOnly cookies
     Falls back to Authorization header if cookie is not present
+    
+    Read-only requests resolve the user from a short-TTL cache instead of
+    running a SELECT on every call. Writes always hit the database and
+    refresh the cached copy.
     """
+    use_user_cache = False
+    
     def authenticate(self, request):
+        self.use_user_cache = request.method in SAFE_METHODS
+        
         # Try to get token from cookie first
         cookie_name = getattr(settings, 'JWT_AUTH_COOKIE', 'access_token')
         raw_token = request.COOKIES.get(cookie_name)
@@ -22,6 +48,24 @@ class CookieJWTAuthentication(JWTAuthentication):
             return self.get_user(validated_token), validated_token
         except InvalidToken:
             return None
+    
+    def get_user(self, validated_token):
+        timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 0)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if not timeout or user_id is None:
+            return super().get_user(validated_token)
+        
+        key = user_cache_key(user_id)
+        if self.use_user_cache:
+            user = cache.get(key)
+            record_cache('auth_user', user is not None)
+            if user is not None:
+                return user
+        
+        # Inactive users raise here and are never cached
+        user = super().get_user(validated_token)
+        cache.set(key, user, timeout)
+        return user
 
 
 def set_auth_cookies(response, tokens):
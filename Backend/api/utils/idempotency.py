@@ -0,0 +1,173 @@
+import json
+import random
+import time
+import hashlib
+import logging
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger('api')
+
+HEADER = 'Idempotency-Key'
+CULL_PROBABILITY = 0.01
+POLL_INTERVAL = 0.1
+
+
+def request_fingerprint(request):
+    """
+    SHA-256 of what the request asks for: its JSON body (key order ignored)
+    or raw body, or for multipart uploads the form fields and the content
+    of each file, read in chunks instead of buffering the whole body.
+    """
+    digest = hashlib.sha256()
+    if (request.content_type or '').startswith('multipart/'):
+        for name in sorted(request.POST):
+            for value in request.POST.getlist(name):
+                digest.update(f'{name}={value}\n'.encode())
+        for name in sorted(request.FILES):
+            for upload in request.FILES.getlist(name):
+                digest.update(f'{name}:{upload.name}:{upload.size}\n'.encode())
+                for chunk in upload.chunks():
+                    digest.update(chunk)
+                upload.seek(0)
+    else:
+        body = request.body
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True).encode()
+        except ValueError:
+            pass
+        digest.update(body)
+    return digest.hexdigest()
+
+
+def claim_key(user, key, scope, request_hash):
+    """
+    Try to take the in-progress lock for a key.
+    Returns (record, claimed); record is None if the key vanished meanwhile.
+    """
+    from ..models import IdempotencyKey
+
+    now = timezone.now()
+    lock = {
+        'scope': scope,
+        'request_hash': request_hash,
+        'status': 'in_progress',
+        'response_status': None,
+        'response_body': None,
+        'locked_until': now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT),
+        'expires_at': now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+    }
+
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(user=user, key=key, **lock), True
+    except IntegrityError:
+        pass
+
+    # Expired keys and locks abandoned by a dead worker can be taken over
+    taken = IdempotencyKey.objects.filter(user=user, key=key).filter(
+        Q(expires_at__lte=now) | Q(status='in_progress', locked_until__lte=now)
+    ).update(**lock)
+
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    return record, bool(taken and record)
+
+
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+def begin(request):
+    """
+    Claim the request's Idempotency-Key before the view runs.
+
+    Returns (record, early). With a record, run the view and hand its result
+    to finish(); with early, answer with its (body, status, headers) instead.
+    Both are None when the request carries no key.
+    """
+    key = request.headers.get(HEADER)
+    if not key or not request.user.is_authenticated:
+        return None, None
+
+    if len(key) > 255:
+        return None, ({'error': f'{HEADER} must be at most 255 characters'}, status.HTTP_400_BAD_REQUEST, {})
+
+    if random.random() < CULL_PROBABILITY:
+        from ..models import IdempotencyKey
+        IdempotencyKey.objects.filter(expires_at__lt=timezone.now()).delete()
+
+    scope = f'{request.method} {request.path}'
+    request_hash = request_fingerprint(request)
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+
+    while True:
+        record, claimed = claim_key(request.user, key, scope, request_hash)
+        if claimed:
+            return record, None
+        if record is not None:
+            # Keys stored before bodies were hashed have no hash to compare
+            if record.scope != scope or (record.request_hash and record.request_hash != request_hash):
+                return None, (
+                    {'error': f'{HEADER} was already used for a different request'},
+                    status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    {},
+                )
+            if record.status == 'completed':
+                return None, (record.response_body, record.response_status, {REPLAYED_HEADER: 'true'})
+        if time.monotonic() >= deadline:
+            return None, (
+                {'error': 'A request with this Idempotency-Key is still being processed'},
+                status.HTTP_409_CONFLICT,
+                {},
+            )
+        time.sleep(POLL_INTERVAL)
+
+
+def finish(record, status_code, data):
+    """
+    Store the view's response for replay, or release the key on a server
+    error (or a response without data) so the client can retry.
+    """
+    if status_code >= 500 or data is None:
+        record.delete()
+        return
+
+    record.status = 'completed'
+    record.response_status = status_code
+    record.response_body = data
+    record.save(update_fields=['status', 'response_status', 'response_body'])
+    logger.info(f"Stored response for idempotency key {record.key} ({record.scope})")
+
+
+def idempotent(view):
+    """
+    Make a POST view safe to retry with an Idempotency-Key header.
+
+    The first request for a key holds an in-progress lock and its response
+    (anything below 500) is stored; retries replay it instead of running the
+    view again. A key reused with another endpoint or body gets a 422. Concurrent duplicates wait up to IDEMPOTENCY_WAIT_SECONDS for
+    the first result. Server errors release the key so the client can retry.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        record, early = begin(request)
+        if early is not None:
+            body, status_code, headers = early
+            return Response(body, status=status_code, headers=headers)
+        if record is None:
+            return view(request, *args, **kwargs)
+
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        finish(record, response.status_code, getattr(response, 'data', None))
+        return response
+    return wrapper
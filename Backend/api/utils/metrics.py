@@ -0,0 +1,117 @@
+import os
+import time
+from contextlib import contextmanager
+from django.db.models import Count, Min
+from django.utils import timezone
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+# Under gunicorn (or any multi-process server) set PROMETHEUS_MULTIPROC_DIR
+# to an empty directory shared by the workers: each worker then writes its
+# samples to files there and a scrape of any worker sums them all.
+
+REQUEST_LATENCY = Histogram(
+    'audiotext_http_request_duration_seconds',
+    'Time to produce a response, by view',
+    ['view', 'method', 'status'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+UPLOAD_BYTES = Counter(
+    'audiotext_upload_bytes',
+    'Audio bytes accepted, through the API (server) or straight to object storage (direct)',
+    ['path'],
+)
+UPLOAD_THROUGHPUT = Histogram(
+    'audiotext_upload_throughput_bytes_per_second',
+    'Rate at which uploaded audio is hashed and written to storage',
+    buckets=(256 * 1024, 1024 ** 2, 4 * 1024 ** 2, 16 * 1024 ** 2, 64 * 1024 ** 2, 256 * 1024 ** 2),
+)
+ENGINE_LATENCY = Histogram(
+    'audiotext_engine_duration_seconds',
+    'Time the speech engine took on one piece of audio',
+    ['engine'],
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1200),
+)
+ENGINE_ERRORS = Counter(
+    'audiotext_engine_errors',
+    'Speech engine calls that failed',
+    ['engine'],
+)
+WALLET_LOCK_WAIT = Histogram(
+    'audiotext_wallet_lock_wait_seconds',
+    'Time spent waiting for a wallet row lock',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+DB_QUERIES = Histogram(
+    'audiotext_db_queries_per_request',
+    'SQL queries run while serving a request, by view',
+    ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+CACHE_REQUESTS = Counter(
+    'audiotext_cache_requests',
+    'Cache lookups by result (hit or miss)',
+    ['cache', 'result'],
+)
+
+
+@contextmanager
+def observe_engine(engine):
+    """Time an engine call and count it as an error if it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ENGINE_ERRORS.labels(engine).inc()
+        raise
+    finally:
+        ENGINE_LATENCY.labels(engine).observe(time.perf_counter() - start)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+class QueueDepthCollector:
+    """
+    Transcriptions waiting for or held by a worker, read from the database
+    at scrape time (the same number whichever worker is scraped).
+    """
+
+    def collect(self):
+        from ..models import Transcription
+
+        depth = GaugeMetricFamily(
+            'audiotext_transcription_queue_depth', 'Transcriptions by queue status', labels=['status']
+        )
+        counts = dict(
+            Transcription.objects.filter(status__in=['pending', 'processing'], deleted_at__isnull=True)
+            .values_list('status').annotate(count=Count('id'))
+        )
+        for status in ('pending', 'processing'):
+            depth.add_metric([status], counts.get(status, 0))
+        yield depth
+
+        oldest = Transcription.objects.filter(
+            status='pending', deleted_at__isnull=True
+        ).aggregate(oldest=Min('created_at'))['oldest']
+        yield GaugeMetricFamily(
+            'audiotext_transcription_queue_oldest_seconds',
+            'Age of the oldest pending transcription',
+            value=(timezone.now() - oldest).total_seconds() if oldest else 0,
+        )
+
+
+def render_metrics():
+    """Text exposition of every metric (summed over workers in multiprocess mode); returns (body, content type)"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    queue = CollectorRegistry()
+    queue.register(QueueDepthCollector())
+    return generate_latest(registry) + generate_latest(queue), CONTENT_TYPE_LATEST
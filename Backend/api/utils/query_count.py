@@ -0,0 +1,45 @@
+import time
+from contextvars import ContextVar
+
+# Stats of the request being served; copied into sync_to_async threads, so
+# queries an async view runs through the ORM are counted too
+_current = ContextVar('query_stats', default=None)
+
+
+class QueryStats:
+    """Number and total time of the SQL queries run while it is active"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _current.reset(self._token)
+
+    @property
+    def ms(self):
+        return round(self.seconds * 1000, 1)
+
+
+def count_queries(execute, sql, params, many, context):
+    """Database execute wrapper feeding the active QueryStats, if any"""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.count += 1
+        stats.seconds += time.perf_counter() - start
+
+
+def install(connection):
+    """Add the wrapper to a connection (once; wrappers outlive reconnects)"""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
@@ -0,0 +1,168 @@
+import random
+import time
+import logging
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import wraps
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import Throttled
+
+logger = logging.getLogger('api')
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+ALL = None
+
+
+def parse_rate(rate):
+    """
+    Parse a rate string such as '10/h' or '100/5m' into (limit, period_seconds).
+    """
+    count, period = rate.split('/')
+    multiplier = int(period[:-1]) if len(period) > 1 else 1
+    return int(count), multiplier * PERIODS[period[-1]]
+
+
+def window_position(now, period):
+    """Return (window index, weight of the previous window) for a sliding window"""
+    window = int(now // period)
+    elapsed = (now % period) / period
+    return window, 1 - elapsed
+
+
+class DatabaseRateLimitBackend:
+    """
+    Sliding-window counters stored in the database.
+
+    Each key is a single row holding the current and previous fixed window
+    counts, locked with SELECT ... FOR UPDATE, so a check is O(1) and atomic
+    across every worker process sharing the database.
+    """
+    CULL_PROBABILITY = 0.01
+
+    def hit(self, key, limit, period):
+        from ..models import RateLimitCounter
+
+        now = time.time()
+        window, previous_weight = window_position(now, period)
+        expires_at = datetime.fromtimestamp((window + 2) * period, tz=dt_timezone.utc)
+
+        with transaction.atomic():
+            counter, _ = RateLimitCounter.objects.select_for_update().get_or_create(
+                key=key,
+                defaults={'window': window, 'expires_at': expires_at},
+            )
+
+            if counter.window != window:
+                counter.previous_count = counter.count if counter.window == window - 1 else 0
+                counter.count = 0
+                counter.window = window
+
+            allowed = counter.previous_count * previous_weight + counter.count < limit
+            if allowed:
+                counter.count += 1
+            counter.expires_at = expires_at
+            counter.save()
+
+        if random.random() < self.CULL_PROBABILITY:
+            RateLimitCounter.objects.filter(
+                expires_at__lt=datetime.fromtimestamp(now, tz=dt_timezone.utc)
+            ).delete()
+
+        return allowed, (window + 1) * period - now
+
+
+class RedisRateLimitBackend:
+    """
+    Sliding-window counters in Redis, checked and incremented atomically by a
+    Lua script so concurrent workers never overshoot the limit.
+    """
+    SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * tonumber(ARGV[2]) + current >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+
+    def hit(self, key, limit, period):
+        now = time.time()
+        window, previous_weight = window_position(now, period)
+        allowed = self.script(
+            keys=[f'rl:{key}:{window}', f'rl:{key}:{window - 1}'],
+            args=[limit, previous_weight, period * 2],
+        )
+        return bool(allowed), (window + 1) * period - now
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Process-wide rate limit backend: Redis when configured, else the database"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            redis_url = getattr(settings, 'RATELIMIT_REDIS_URL', '')
+            _backend = RedisRateLimitBackend(redis_url) if redis_url else DatabaseRateLimitBackend()
+        return _backend
+
+
+def get_client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def get_rate_key(request, key):
+    if key == 'ip':
+        return get_client_ip(request)
+    if key == 'user':
+        if request.user.is_authenticated:
+            return str(request.user.pk)
+        return get_client_ip(request)
+    raise ValueError(f"Unknown rate limit key: {key}")
+
+
+def enforce(request, group, key, limit, period):
+    """Count a hit for the request; raises Throttled once the limit is reached"""
+    counter_key = f'{group}:{get_rate_key(request, key)}'
+    allowed, retry_after = get_backend().hit(counter_key, limit, period)
+    if not allowed:
+        logger.warning(f"Rate limit exceeded for {counter_key}")
+        raise Throttled(wait=retry_after)
+
+
+def ratelimit(key, rate, method=ALL, group=None):
+    """
+    Limit how often a view can be called, shared across worker processes.
+    Raises Throttled (HTTP 429 with Retry-After) once the rate is exceeded.
+
+    Args:
+        key: 'user' (falls back to IP for anonymous requests) or 'ip'
+        rate: Allowed calls per period, e.g. '10/h'
+        method: HTTP method (or list of methods) to limit, ALL for every method
+        group: Counter name, to share one limit between views; defaults to the view's own
+    """
+    limit, period = parse_rate(rate)
+    methods = [method] if isinstance(method, str) else method
+
+    def decorator(func):
+        counter_group = group or f'{func.__module__}.{func.__qualname__}'
+
+        @wraps(func)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATELIMIT_ENABLE and (methods is ALL or request.method in methods):
+                enforce(request, counter_group, key, limit, period)
+            return func(request, *args, **kwargs)
+        return wrapper
+    return decorator
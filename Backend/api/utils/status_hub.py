@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+logger = logging.getLogger('api')
+
+TERMINAL_STATUSES = ('completed', 'failed')
+
+
+def status_event(transcription_id, status, error_message=None):
+    """Event pushed to clients when a transcription changes status"""
+    return {'type': 'status', 'id': str(transcription_id), 'status': status, 'error_message': error_message}
+
+
+def progress_event(transcription_id, stage, percent=None):
+    """
+    Event pushed while the engine works (uploading, queued, processing);
+    'segment' when another part of the transcript was saved, with the share
+    of the audio transcribed so far.
+    """
+    return {'type': 'progress', 'id': str(transcription_id), 'stage': stage, 'percent': percent}
+
+
+class TranscriptionStatusHub:
+    """
+    Per-process fan-out of transcription status changes to SSE streams and
+    long-poll waiters.
+
+    Changes made in this process are published directly. Changes made by
+    other processes are picked up by one poller per event loop that reads
+    the status of every watched transcription in a single query, so N
+    waiting clients cost one query per interval instead of N requests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)  # transcription id -> {(loop, queue)}
+        self._last_seen = {}  # transcription id -> last snapshot delivered
+        self._pollers = {}  # loop -> poller task
+
+    def subscribe(self, transcription_id, current=None):
+        """
+        Register a waiter on the running loop; returns its queue of events.
+        `current` is the status event the caller already sent the client, so
+        the poller only reports later changes.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        key = str(transcription_id)
+        with self._lock:
+            self._subscribers[key].add((loop, queue))
+            if current is not None:
+                self._last_seen.setdefault(key, current)
+            poller = self._pollers.get(loop)
+            if poller is None or poller.done():
+                self._pollers[loop] = loop.create_task(self._poll(loop))
+        return queue
+
+    def unsubscribe(self, transcription_id, queue):
+        key = str(transcription_id)
+        with self._lock:
+            self._subscribers[key] = {sub for sub in self._subscribers[key] if sub[1] is not queue}
+            if not self._subscribers[key]:
+                del self._subscribers[key]
+                self._last_seen.pop(key, None)
+
+    def publish(self, transcription_id, event):
+        """Deliver an event to every waiter; safe to call from any thread"""
+        key = str(transcription_id)
+        with self._lock:
+            subscribers = list(self._subscribers.get(key, ()))
+            if subscribers and event['type'] == 'status':
+                self._last_seen[key] = event
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # The subscriber's loop has closed
+                pass
+
+    def _watched(self, loop):
+        with self._lock:
+            return [key for key, subs in self._subscribers.items() if any(sub[0] is loop for sub in subs)]
+
+    async def _poll(self, loop):
+        from ..models import Transcription
+
+        interval = settings.TRANSCRIPTION_EVENTS_POLL_INTERVAL
+        while True:
+            watched = self._watched(loop)
+            if not watched:
+                with self._lock:
+                    if self._pollers.get(loop) is asyncio.current_task():
+                        del self._pollers[loop]
+                return
+
+            try:
+                rows = await sync_to_async(list)(
+                    Transcription.objects.filter(id__in=watched).values('id', 'status', 'error_message')
+                )
+            except Exception:
+                logger.exception("Transcription status poll failed")
+                rows = []
+
+            for row in rows:
+                event = status_event(row['id'], row['status'], row['error_message'])
+                with self._lock:
+                    changed = self._last_seen.get(event['id']) != event
+                if changed:
+                    self.publish(event['id'], event)
+
+            await asyncio.sleep(interval)
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    """Process-wide transcription status hub"""
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = TranscriptionStatusHub()
+        return _hub
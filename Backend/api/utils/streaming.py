@@ -0,0 +1,108 @@
+import re
+import mimetypes
+from urllib.parse import quote
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range Range header into inclusive (start, end) offsets.
+    Returns None when the whole file should be sent (no header, a syntax the
+    server may ignore, or several ranges); raises RangeNotSatisfiable when
+    the range lies outside the file.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def read_range(file, start, end):
+    try:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def serve_from_django(request, name, content_type):
+    """Range-aware streaming by the worker itself, for development without a web server"""
+    size = default_storage.size(name)
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    start, end = byte_range or (0, size - 1)
+    response = StreamingHttpResponse(
+        read_range(default_storage.open(name, 'rb'), start, end),
+        status=206 if byte_range else 200,
+        content_type=content_type,
+    )
+    response['Content-Length'] = str(end - start + 1)
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+def stream_file_response(request, name, filename):
+    """
+    Response that plays back a stored file without the worker copying it:
+    a redirect to a presigned URL on object storage, an X-Accel-Redirect or
+    X-Sendfile header for the web server on local disk. Range requests are
+    answered by whichever of them ends up sending the bytes.
+    """
+    from ..services.storage_service import StorageService
+
+    if not default_storage.exists(name):
+        raise FileNotFoundError(f"{name} not found in storage")
+
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    if not StorageService.is_local():
+        response = HttpResponseRedirect(
+            StorageService.get_download_url(name, settings.AUDIO_STREAM_URL_EXPIRY)
+        )
+    elif settings.AUDIO_STREAM_OFFLOAD == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(settings.AUDIO_STREAM_ACCEL_PREFIX.rstrip('/') + '/' + name)
+    elif settings.AUDIO_STREAM_OFFLOAD == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = default_storage.path(name)
+    else:
+        response = serve_from_django(request, name, content_type)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'private, max-age=0'
+    return response
@@ -0,0 +1,36 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from .tracing import tracer
+
+
+class PipelineTimer:
+    """
+    Wall time spent in each phase of one transcription job (upload, engine,
+    billing) and the bytes sent to the engine. Phases may repeat (one per
+    audio window); their times add up. Each phase is also a trace span
+    (transcription.<phase>).
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = defaultdict(float)
+        self.bytes_sent = 0
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            with tracer.start_as_current_span(f'transcription.{name}'):
+                yield
+        finally:
+            self.phases[name] += time.perf_counter() - start
+
+    def seconds(self, name):
+        return self.phases.get(name, 0.0)
+
+    def ms(self, name):
+        return round(self.seconds(name) * 1000)
+
+    def total_ms(self):
+        return round((time.perf_counter() - self.started) * 1000)
@@ -0,0 +1,93 @@
+import inspect
+import functools
+import threading
+from django.conf import settings
+from opentelemetry import trace, propagate
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor, SpanExporter, SpanExportResult,
+)
+
+# Spans go nowhere (the API's no-op tracer) until configure_tracing()
+# installs a provider; instrumented code pays next to nothing for them
+tracer = trace.get_tracer('api')
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends finished spans to a file, one OpenTelemetry JSON span per line"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        lines = ''.join(span.to_json(indent=None) + '\n' for span in spans)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+        return SpanExportResult.SUCCESS
+
+
+def build_exporter(name):
+    if name == 'file':
+        return FileSpanExporter(settings.TRACING_FILE)
+    if name == 'console':
+        return ConsoleSpanExporter()
+    if name == 'otlp':
+        # Optional dependency: opentelemetry-exporter-otlp-proto-http
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT or None)
+    raise ValueError(f"Unknown TRACING_EXPORTER: {name}")
+
+
+def configure_tracing(exporter=None):
+    """
+    Install the SDK tracer provider for this process, exporting to
+    `exporter` (synchronously, for tests) or to the one named by
+    TRACING_EXPORTER (in batches). Returns the provider, or None when
+    tracing is off.
+    """
+    if exporter is not None:
+        processor = SimpleSpanProcessor(exporter)
+    elif settings.TRACING_EXPORTER:
+        processor = BatchSpanProcessor(build_exporter(settings.TRACING_EXPORTER))
+    else:
+        return None
+
+    provider = TracerProvider(resource=Resource.create({'service.name': settings.TRACING_SERVICE_NAME}))
+    provider.add_span_processor(processor)
+    trace.set_tracer_provider(provider)
+    return provider
+
+
+def traced(name):
+    """Run the decorated function (sync or async) inside a span called `name`"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with tracer.start_as_current_span(name):
+                    return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with tracer.start_as_current_span(name):
+                    return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_context():
+    """W3C trace context of the active span, to store with work that is picked up later"""
+    carrier = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+def resumed_span(name, carrier, attributes=None):
+    """
+    Span for work picked up from a queue: a child of the span that queued
+    it (see current_context), or of the active span when nothing was stored.
+    """
+    context = propagate.extract(carrier) if carrier else None
+    return tracer.start_as_current_span(name, context=context, attributes=attributes)
@@ -1,30 +1,34 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.http import HttpResponse, JsonResponse
 from django.db.models import Q
-from django.db import connection
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from django_ratelimit.decorators import ratelimit
 from datetime import datetime
 import csv
 import json
+import hashlib
 
-from .models import User, Wallet, Transaction, AudioFile, Transcription, ContactMessage
+from .models import User, Wallet, Transaction, AudioFile, Transcription, ContactMessage, DeletionRequest
 from .serializers import (
     UserSerializer, WalletSerializer, TransactionSerializer,
-    AudioFileSerializer, TranscriptionSerializer, TranscriptionCreateSerializer,
-    ContactMessageSerializer
+    AudioFileSerializer, TranscriptionSerializer, TranscriptionDetailSerializer, TranscriptionCreateSerializer,
+    ContactMessageSerializer, BulkDeleteSerializer, DeletionRequestSerializer
 )
 from .services import (
     AuthService, WalletService, AudioService,
-    TranscriptionService, PaymentService
+    TranscriptionService, PaymentService, DeletionService,
+    IdentityService, IdentityTokenError, HealthService, RetentionService
 )
-from .utils.cookie_auth import set_auth_cookies, clear_auth_cookies
+from .utils.cookie_auth import set_auth_cookies, clear_auth_cookies, invalidate_cached_user
+from .utils.ratelimit import ratelimit
+from .utils.idempotency import idempotent
+from .utils.streaming import stream_file_response
+from .utils.metrics import render_metrics
 
 
 @api_view(['POST'])
@@ -32,10 +36,7 @@ from .utils.cookie_auth import set_auth_cookies, clear_auth_cookies
 def google_login(request):
     """Handle Google OAuth login"""
     try:
-        # In production, verify the Google token here
-        email = request.data.get('email')
-        name = request.data.get('name')
-        provider_id = request.data.get('provider_id')
+        email, name, provider_id = IdentityService.get_login_identity('google', request.data)
         
         if not all([email, name, provider_id]):
             return Response(
@@ -56,6 +57,11 @@ def google_login(request):
         set_auth_cookies(response, result['tokens'])
         
         return response
+    except IdentityTokenError as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
     except Exception as e:
         return Response(
             {'error': str(e)},
@@ -68,10 +74,7 @@ def google_login(request):
 def facebook_login(request):
     """Handle Facebook OAuth login"""
     try:
-        # In production, verify the Facebook token here
-        email = request.data.get('email')
-        name = request.data.get('name')
-        provider_id = request.data.get('provider_id')
+        email, name, provider_id = IdentityService.get_login_identity('facebook', request.data)
         
         if not all([email, name, provider_id]):
             return Response(
@@ -92,6 +95,11 @@ def facebook_login(request):
         set_auth_cookies(response, result['tokens'])
         
         return response
+    except IdentityTokenError as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
     except Exception as e:
         return Response(
             {'error': str(e)},
@@ -111,6 +119,7 @@ def get_current_user(request):
 @permission_classes([IsAuthenticated])
 def logout(request):
     """Logout user by clearing auth cookies"""
+    invalidate_cached_user(request.user.id)
     response = Response({'message': 'Logged out successfully'})
     clear_auth_cookies(response)
     return response
@@ -174,6 +183,7 @@ class WalletViewSet(viewsets.ReadOnlyModelViewSet):
             'statistics': stats
         })
     
+    @method_decorator(idempotent)
     @method_decorator(ratelimit(key='user', rate='10/h', method='POST'))
     @action(detail=False, methods=['post'])
     def create_order(self, request):
@@ -203,6 +213,7 @@ class WalletViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @method_decorator(idempotent)
     @action(detail=False, methods=['post'])
     def verify_payment(self, request):
         """Verify payment and credit wallet"""
@@ -263,11 +274,15 @@ class AudioFileViewSet(viewsets.ModelViewSet):
         """Optimized queryset"""
         return AudioFile.objects.filter(
             user=self.request.user
+        ).exclude(
+            storage_state='deleted'
         ).only(
-            'id', 'filename', 'duration', 'size', 'format', 'uploaded_at'
+            'id', 'user_id', 'filename', 'file_path', 'blob_id', 'duration', 'size', 'format',
+            'storage_state', 'uploaded_at'
         ).order_by('-uploaded_at')
     
-    @method_decorator(ratelimit(key='user', rate='50/h', method='POST'))
+    @method_decorator(idempotent)
+    @method_decorator(ratelimit(key='user', rate='50/h', method='POST', group='audio-upload'))
     def create(self, request):
         """Upload audio file - Rate limited to 50 per hour"""
         try:
@@ -303,6 +318,102 @@ class AudioFileViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @method_decorator(ratelimit(key='user', rate='50/h', method='POST'))
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser])
+    def upload_url(self, request):
+        """Presigned URL to upload straight to object storage - Rate limited to 50 per hour"""
+        try:
+            filename = request.data.get('filename')
+            size = request.data.get('size')
+            if not filename or size is None:
+                return Response(
+                    {'error': 'Missing required fields'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            session = AudioService.create_upload_session(filename, int(size), request.user)
+            return Response(session, status=status.HTTP_201_CREATED)
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    @method_decorator(idempotent)
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser])
+    def finalize_upload(self, request):
+        """Record a file uploaded through a presigned URL"""
+        try:
+            upload_token = request.data.get('upload_token')
+            if not upload_token:
+                return Response(
+                    {'error': 'Missing upload token'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            audio_file = AudioService.finalize_upload(upload_token, request.user)
+            serializer = self.get_serializer(audio_file)
+            
+            has_balance, estimated_cost = WalletService.check_sufficient_balance(
+                request.user,
+                float(audio_file.duration)
+            )
+            
+            return Response({
+                'audio_file': serializer.data,
+                'estimated_cost': float(estimated_cost),
+                'has_sufficient_balance': has_balance
+            }, status=status.HTTP_201_CREATED)
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    @action(detail=True, methods=['get'])
+    def stream(self, request, pk=None):
+        """
+        Play back an audio file with Range support for seeking.
+        The worker only authorizes; storage or the web server sends the bytes,
+        so playback is recorded here for the eviction queue.
+        """
+        audio_file = self.get_object()
+        if audio_file.storage_state != 'hot':
+            return Response(
+                {'error': 'This audio is no longer stored. Its transcripts are still available.'},
+                status=status.HTTP_410_GONE
+            )
+        
+        try:
+            response = stream_file_response(request, audio_file.storage_path, audio_file.filename)
+        except FileNotFoundError:
+            return Response(
+                {'error': 'Audio file not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        RetentionService.touch(audio_file)
+        return response
+    
+    @method_decorator(ratelimit(key='user', rate='30/h', method='POST'))
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser])
+    def bulk_delete(self, request):
+        """Delete many audio files at once; storage is purged in the background - Rate limited to 30 per hour"""
+        serializer = BulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        deletion = DeletionService.request_audio_deletion(request.user, serializer.validated_data['ids'])
+        return Response(DeletionRequestSerializer(deletion).data, status=status.HTTP_202_ACCEPTED)
+    
     def destroy(self, request, pk=None):
         """Delete audio file"""
         try:
@@ -320,18 +431,31 @@ class TranscriptionViewSet(viewsets.ModelViewSet):
     serializer_class = TranscriptionSerializer
     permission_classes = [IsAuthenticated]
     
+    def get_serializer_class(self):
+        """The detail view adds the transcript so far and a completion percentage"""
+        if self.action == 'retrieve':
+            return TranscriptionDetailSerializer
+        return TranscriptionSerializer
+    
     def get_queryset(self):
         """Optimized queryset with select_related to prevent N+1 queries"""
+        # Only fetch needed fields. The serializers return the transcript,
+        # which left deferred would cost one query per row; the CSV export
+        # does not include it.
+        fields = [
+            'id', 'language', 'status', 'duration',
+            'cost', 'created_at', 'completed_at', 'error_message',
+            'audio_file__id', 'audio_file__filename'
+        ]
+        if self.action != 'export_csv':
+            fields.append('text')
+        
         queryset = Transcription.objects.filter(
-            user=self.request.user
+            user=self.request.user,
+            deleted_at__isnull=True
         ).select_related(
             'audio_file'  # Join audio_file in single query
-        ).only(
-            # Only fetch needed fields
-            'id', 'language', 'status', 'duration', 
-            'cost', 'created_at', 'completed_at', 'error_message',
-            'audio_file__id', 'audio_file__filename'
-        ).order_by('-created_at')
+        ).only(*fields).order_by('-created_at')
         
         # Apply filters
         language = self.request.query_params.get('language')
@@ -350,6 +474,16 @@ class TranscriptionViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    @method_decorator(ratelimit(key='user', rate='30/h', method='POST'))
+    @action(detail=False, methods=['post'])
+    def bulk_delete(self, request):
+        """Delete many transcriptions at once; rows are purged in the background - Rate limited to 30 per hour"""
+        serializer = BulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        deletion = DeletionService.request_transcription_deletion(request.user, serializer.validated_data['ids'])
+        return Response(DeletionRequestSerializer(deletion).data, status=status.HTTP_202_ACCEPTED)
+    
     def destroy(self, request, pk=None):
         """Delete transcription"""
         try:
@@ -362,7 +496,8 @@ class TranscriptionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    @method_decorator(ratelimit(key='user', rate='20/h', method='POST'))
+    @method_decorator(idempotent)
+    @method_decorator(ratelimit(key='user', rate='20/h', method='POST', group='transcription-create'))
     def create(self, request):
         """Create transcription request and process synchronously - Rate limited to 20 per hour"""
         try:
@@ -378,7 +513,11 @@ class TranscriptionViewSet(viewsets.ModelViewSet):
             # Process transcription synchronously
             try:
                 TranscriptionService.process_transcription(transcription)
-                message = 'Transcription completed successfully.'
+                if transcription.status == 'completed':
+                    message = 'Transcription completed successfully.'
+                else:
+                    # A queue worker claimed it first
+                    message = 'Transcription is being processed.'
             except Exception as process_error:
                 # Transcription failed, but record is created
                 message = 'Transcription failed. Check status for details.'
@@ -453,10 +592,23 @@ class TranscriptionViewSet(viewsets.ModelViewSet):
             )
 
 
+class DeletionRequestViewSet(viewsets.ReadOnlyModelViewSet):
+    """Progress of bulk deletions"""
+    serializer_class = DeletionRequestSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return DeletionRequest.objects.filter(user=self.request.user)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def razorpay_webhook(request):
-    """Handle Razorpay webhook"""
+    """
+    Handle Razorpay webhook.
+    Events are stored in the webhook inbox and acknowledged immediately;
+    the process_payment_events command credits wallets in batches.
+    """
     try:
         payload = request.body.decode('utf-8')
         signature = request.headers.get('X-Razorpay-Signature')
@@ -471,13 +623,8 @@ def razorpay_webhook(request):
             )
         
         data = json.loads(payload)
-        event = data.get('event')
-        
-        if event == 'payment.captured':
-            payment = data.get('payload', {}).get('payment', {}).get('entity', {})
-            # Process payment captured event
-            # This is handled in verify_payment endpoint for now
-            pass
+        event_id = request.headers.get('X-Razorpay-Event-Id') or hashlib.sha256(request.body).hexdigest()
+        PaymentService.record_webhook_event(event_id, data)
         
         return Response({'status': 'success'})
     except Exception as e:
@@ -491,52 +638,50 @@ def razorpay_webhook(request):
 @permission_classes([AllowAny])
 def health_check(request):
     """
-    Health check endpoint for monitoring systems.
-    Returns service status and dependency checks.
+    Readiness check for load balancers and monitoring systems.
+    Answered from the last dependency snapshot (see HealthService); 503 only
+    when the service cannot work at all (database down) or has not finished
+    its first probe yet.
+    """
+    health_status = HealthService.readiness()
+    status_code = 503 if health_status['status'] in ('unhealthy', 'starting') else 200
+    return JsonResponse(health_status, status=status_code)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def health_live(request):
+    """Liveness check: the process answers requests. Touches no dependency"""
+    return JsonResponse({'status': 'alive', 'timestamp': timezone.now().isoformat()})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def health_deep(request):
+    """Probe every dependency now and report each one's latency (staff only)"""
+    health_status = HealthService.deep()
+    status_code = 503 if health_status['status'] == 'unhealthy' else 200
+    return JsonResponse(health_status, status=status_code)
+
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint. A plain Django view: no DRF negotiation,
+    and the token is the only auth; without one it is only served in DEBUG.
     """
-    health_status = {
-        'status': 'healthy',
-        'timestamp': timezone.now().isoformat(),
-        'services': {}
-    }
-    
-    # Check database connection
-    try:
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-        health_status['services']['database'] = 'connected'
-    except Exception as e:
-        health_status['status'] = 'unhealthy'
-        health_status['services']['database'] = f'error: {str(e)}'
-    
-    # Check AssemblyAI configuration
     from django.conf import settings
-    if settings.ASSEMBLYAI_API_KEY:
-        health_status['services']['assemblyai'] = 'configured'
-    else:
-        health_status['status'] = 'degraded'
-        health_status['services']['assemblyai'] = 'missing'
+    from django.http import Http404
+    import hmac
     
-    # Check Razorpay configuration
-    if settings.RAZORPAY_KEY_ID and settings.RAZORPAY_KEY_SECRET:
-        health_status['services']['razorpay'] = 'configured'
-    else:
-        health_status['status'] = 'degraded'
-        health_status['services']['razorpay'] = 'missing'
+    if not settings.METRICS_ENABLED or not (settings.METRICS_TOKEN or settings.DEBUG):
+        raise Http404()
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return HttpResponse(status=401)
     
-    # Check cache (optional - uses in-memory cache if Redis not available)
-    try:
-        from django.core.cache import cache
-        cache.set('health_check', 'ok', 10)
-        if cache.get('health_check') == 'ok':
-            health_status['services']['cache'] = 'connected'
-        else:
-            health_status['services']['cache'] = 'not connected (using fallback cache)'
-    except Exception as e:
-        health_status['services']['cache'] = f'not available (using fallback cache)'
-    
-    status_code = 200 if health_status['status'] == 'healthy' else 503
-    return JsonResponse(health_status, status=status_code)
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
 
 
 @csrf_exempt
@@ -546,9 +691,12 @@ def health_check(request):
 def contact_form(request):
     """
     Handle contact form submissions - Rate limited to 10 per hour per IP
-    Sends email notification to admin only
+    Queues an email notification to admin only; `manage.py send_emails` sends it
     """
     import logging
+    from django.conf import settings
+    from django.db import transaction
+    from .services import EmailService
     logger = logging.getLogger('api')
     
     try:
@@ -560,54 +708,32 @@ def contact_form(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Save contact message
-        contact_message = serializer.save()
-        logger.info(f"Contact form submitted - ID: {contact_message.id}, Email: {contact_message.email}")
-        
-        # Send email notification to admin (if email is configured)
-        try:
-            from django.core.mail import send_mail
-            from django.template.loader import render_to_string
-            from django.conf import settings
+        # Queue the notification in the message's transaction, so no email
+        # goes out for a message that was not stored; a notification that
+        # fails to render is rolled back to its savepoint and the message kept
+        with transaction.atomic():
+            contact_message = serializer.save()
+            logger.info(f"Contact form submitted - ID: {contact_message.id}, Email: {contact_message.email}")
             
-            # Check if email is configured
-            if hasattr(settings, 'EMAIL_HOST') and settings.EMAIL_HOST:
-                # Prepare email context
-                frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:5173')
-                admin_email = getattr(settings, 'ADMIN_EMAIL', 'admin@audioscribe.com')
-                from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@audioscribe.com')
-                
-                # Admin notification email context
-                admin_context = {
-                    'contact': contact_message,
-                    'frontend_url': frontend_url,
-                }
-                
-                # Send admin notification email
+            # Queue email notification to admin (if email is configured)
+            if getattr(settings, 'EMAIL_HOST', ''):
                 try:
-                    admin_subject = f"New Contact Form Submission - {contact_message.get_subject_display()}"
-                    admin_html_message = render_to_string('emails/contact_admin_notification.html', admin_context)
-                    admin_plain_message = render_to_string('emails/contact_admin_notification.txt', admin_context)
-                    
-                    send_mail(
-                        subject=admin_subject,
-                        message=admin_plain_message,
-                        html_message=admin_html_message,
-                        from_email=from_email,
-                        recipient_list=[admin_email],
-                        fail_silently=False,
-                    )
-                    logger.info(f"Admin notification email sent for contact ID: {contact_message.id}")
-                except Exception as admin_email_error:
-                    logger.error(f"Failed to send admin notification email: {str(admin_email_error)}")
-                
+                    with transaction.atomic():
+                        EmailService.queue(
+                            'contact_admin_notification',
+                            {
+                                'contact': contact_message,
+                                'frontend_url': getattr(settings, 'FRONTEND_URL', 'http://localhost:5173'),
+                            },
+                            subject=f"New Contact Form Submission - {contact_message.get_subject_display()}",
+                            to=[getattr(settings, 'ADMIN_EMAIL', 'admin@audioscribe.com')],
+                        )
+                    logger.info(f"Admin notification email queued for contact ID: {contact_message.id}")
+                except Exception:
+                    logger.exception(f"Failed to queue admin notification for contact ID: {contact_message.id}")
             else:
                 logger.warning("Email not configured - contact form submitted but no email sent")
         
-        except Exception as email_error:
-            # Log email error but don't fail the request
-            logger.error(f"Failed to send contact form email: {str(email_error)}")
-        
         return Response({
             'message': 'Thank you for your message. We will get back to you within 24 hours.',
             'id': str(contact_message.id)
@@ -6,7 +6,6 @@ import {
   useCallback,
   type ReactNode,
 } from "react";
-import { useGoogleLogin } from "@react-oauth/google";
 import { authApi } from "../services/api";
 import type { User, LoginResponse } from "../types";
 import toast from "react-hot-toast";
@@ -15,7 +14,7 @@ interface AuthContextType {
   user: User | null;
   isAuthenticated: boolean;
   isLoading: boolean;
-  loginWithGoogle: () => void;
+  loginWithGoogle: (credential: string) => void;
   loginWithFacebook: () => void;
   logout: () => void;
   refreshUser: () => Promise<void>;
@@ -47,27 +46,13 @@ export function AuthProvider({ children }: AuthProviderProps) {
     checkAuth();
   }, []);
 
-  const handleGoogleSuccess = useCallback(async (tokenResponse: any) => {
+  const loginWithGoogle = useCallback(async (credential: string) => {
     try {
       setIsLoading(true);
 
-      // Get user info from Google
-      const googleUserResponse = await fetch(
-        "https://www.googleapis.com/oauth2/v3/userinfo",
-        {
-          headers: {
-            Authorization: `Bearer ${tokenResponse.access_token}`,
-          },
-        }
-      );
-
-      const googleUser = await googleUserResponse.json();
-
-      // Send to our backend
+      // The credential is Google's ID token; the backend verifies it and reads the identity from it
       const response: LoginResponse = await authApi.googleLogin({
-        email: googleUser.email,
-        name: googleUser.name,
-        provider_id: googleUser.sub,
+        id_token: credential,
       });
 
       setUser(response.user);
@@ -93,11 +78,9 @@ export function AuthProvider({ children }: AuthProviderProps) {
     try {
       setIsLoading(true);
 
-      // Send to our backend
+      // The backend verifies the access token with Facebook and reads the identity from it
       const response: LoginResponse = await authApi.facebookLogin({
-        email: facebookResponse.email,
-        name: facebookResponse.name,
-        provider_id: facebookResponse.userID || facebookResponse.id,
+        access_token: facebookResponse.accessToken,
       });
 
       setUser(response.user);
@@ -120,14 +103,6 @@ export function AuthProvider({ children }: AuthProviderProps) {
     }
   }, []);
 
-  const loginWithGoogle = useGoogleLogin({
-    onSuccess: handleGoogleSuccess,
-    onError: (error) => {
-      console.error("Google login error:", error);
-      toast.error("Google login failed. Please try again.");
-    },
-  });
-
   const loginWithFacebook = useCallback(() => {
     // This will be called from the Facebook button component
     return handleFacebookSuccess;
@@ -158,7 +133,7 @@ export function AuthProvider({ children }: AuthProviderProps) {
     user,
     isAuthenticated: !!user,
     isLoading,
-    loginWithGoogle: () => loginWithGoogle(),
+    loginWithGoogle,
     loginWithFacebook,
     logout,
     refreshUser,
@@ -63,6 +63,10 @@ export default function TranscribePage() {
   const [showDropdown, setShowDropdown] = useState(false);
   const dropdownRef = useRef<HTMLDivElement>(null);
 
+  // Stops watching the transcription in progress
+  const stopWatching = useRef<(() => void) | null>(null);
+  useEffect(() => () => stopWatching.current?.(), []);
+
   // Fetch wallet data
   useEffect(() => {
     const fetchWallet = async () => {
@@ -201,39 +205,33 @@ export default function TranscribePage() {
     }
   };
 
-  // Poll for transcription status
-  const pollTranscriptionStatus = async (id: string) => {
-    const maxAttempts = 60; // 5 minutes max
-    let attempts = 0;
-
-    const poll = async () => {
-      try {
-        const result = await transcriptionApi.get(id);
+  // Wait for the server to push completion instead of polling
+  const pollTranscriptionStatus = (id: string) => {
+    stopWatching.current?.();
+    stopWatching.current = transcriptionApi.watch(id, async (update) => {
+      if (update.type !== "status") return;
 
-        if (result.status === "completed") {
+      if (update.status === "completed") {
+        try {
+          const result = await transcriptionApi.get(id);
           setTranscription(result);
           setAppState("completed");
           refreshUser();
           refreshWallet();
           toast.success("Transcription completed!");
-        } else if (result.status === "failed") {
-          setError(result.error_message || "Transcription failed");
-          setAppState("error");
-          toast.error("Transcription failed");
-        } else if (attempts < maxAttempts) {
-          attempts++;
-          setTimeout(poll, 5000);
-        } else {
-          setError("Transcription timed out. Please try again.");
+        } catch (err) {
+          setError("Failed to load transcription");
           setAppState("error");
         }
-      } catch (err) {
-        setError("Failed to check transcription status");
+      } else if (update.status === "failed") {
+        setError(update.error_message || "Transcription failed");
         setAppState("error");
+        toast.error("Transcription failed");
       }
-    };
-
-    poll();
+    }, (message) => {
+      setError(message);
+      setAppState("error");
+    });
   };
 
   // Refresh wallet
@@ -530,6 +528,14 @@ export default function TranscribePage() {
                   </button>
                 </div>
 
+                {/* Playback */}
+                <audio
+                  controls
+                  preload="metadata"
+                  src={audioApi.streamUrl(audioFile.id)}
+                  className="w-full"
+                />
+
                 {/* Language Selection */}
                 <div>
                   <label className="block text-sm font-medium text-slate-700 mb-2">
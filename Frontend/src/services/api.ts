@@ -5,8 +5,11 @@ import type {
   Transaction,
   AudioFile,
   AudioUploadResponse,
+  DirectUploadSession,
+  DeletionRequest,
   Transcription,
   TranscriptionLanguage,
+  TranscriptionStatusUpdate,
   LoginResponse,
   GoogleLoginRequest,
   FacebookLoginRequest,
@@ -17,6 +20,13 @@ import type {
 const API_BASE_URL =
   import.meta.env.VITE_API_URL || "http://localhost:8000/api";
 
+// Native async endpoints for uploads and transcriptions when served by ASGI
+const IO_PREFIX = import.meta.env.VITE_ASYNC_API === "true" ? "/async" : "";
+
+// Watching a transcription: poll/retry interval and when to give up
+const POLL_INTERVAL_MS = 5000;
+const WATCH_TIMEOUT_MS = 30 * 60 * 1000;
+
 // Create axios instance
 const api = axios.create({
   baseURL: API_BASE_URL,
@@ -137,10 +147,15 @@ export const audioApi = {
     file: File,
     onProgress?: (progress: number) => void
   ): Promise<AudioUploadResponse> => {
+    // Upload straight to object storage when the backend is configured for it
+    if (import.meta.env.VITE_DIRECT_UPLOADS === "true") {
+      return audioApi.uploadDirect(file, onProgress);
+    }
+
     const formData = new FormData();
     formData.append("file", file);
 
-    const response = await api.post("/audio/", formData, {
+    const response = await api.post(`${IO_PREFIX}/audio/`, formData, {
       headers: {
         "Content-Type": "multipart/form-data",
       },
@@ -156,6 +171,34 @@ export const audioApi = {
     return response.data;
   },
 
+  uploadDirect: async (
+    file: File,
+    onProgress?: (progress: number) => void
+  ): Promise<AudioUploadResponse> => {
+    const { data: session } = await api.post<DirectUploadSession>(
+      "/audio/upload_url/",
+      { filename: file.name, size: file.size }
+    );
+
+    // PUT to the presigned URL - no cookies, the URL carries its own signature
+    await axios.put(session.upload.url, file, {
+      headers: session.upload.headers,
+      onUploadProgress: (progressEvent) => {
+        if (progressEvent.total && onProgress) {
+          const progress = Math.round(
+            (progressEvent.loaded * 100) / progressEvent.total
+          );
+          onProgress(progress);
+        }
+      },
+    });
+
+    const response = await api.post("/audio/finalize_upload/", {
+      upload_token: session.upload_token,
+    });
+    return response.data;
+  },
+
   getAll: async (): Promise<AudioFile[]> => {
     const response = await api.get("/audio/");
     return response.data;
@@ -164,6 +207,14 @@ export const audioApi = {
   delete: async (id: string): Promise<void> => {
     await api.delete(`/audio/${id}/`);
   },
+
+  bulkDelete: async (ids: string[]): Promise<DeletionRequest> => {
+    const response = await api.post("/audio/bulk_delete/", { ids });
+    return response.data;
+  },
+
+  // Playback URL for <audio>; auth cookies are sent with the request
+  streamUrl: (id: string): string => `${API_BASE_URL}/audio/${id}/stream/`,
 };
 
 // Transcription API
@@ -172,7 +223,7 @@ export const transcriptionApi = {
     audioFileId: string,
     language: TranscriptionLanguage
   ): Promise<Transcription> => {
-    const response = await api.post("/transcriptions/", {
+    const response = await api.post(`${IO_PREFIX}/transcriptions/`, {
       audio_file_id: audioFileId,
       language,
     });
@@ -196,16 +247,136 @@ export const transcriptionApi = {
   },
 
   get: async (id: string): Promise<Transcription> => {
-    const response = await api.get(`/transcriptions/${id}/`);
+    const response = await api.get(`${IO_PREFIX}/transcriptions/${id}/`);
     return response.data;
   },
 
+  // Follow status changes until the transcription completes or fails.
+  // Under ASGI (VITE_ASYNC_API) the server pushes them over Server-Sent
+  // Events, falling back to long polling when EventSource is unavailable
+  // or the stream breaks; a WSGI server would hold a thread per stream and
+  // buffer it, so there the detail endpoint is polled instead.
+  // onError is called when watching gives up: a 4xx answer (logged out,
+  // transcription deleted) or no result within WATCH_TIMEOUT_MS.
+  // Returns a function that stops watching.
+  watch: (
+    id: string,
+    onUpdate: (update: TranscriptionStatusUpdate) => void,
+    onError: (message: string) => void
+  ): (() => void) => {
+    let stopped = false;
+    let source: EventSource | null = null;
+    let lastStatus: string | undefined;
+
+    const isTerminal = (update: TranscriptionStatusUpdate) =>
+      update.type === "status" &&
+      (update.status === "completed" || update.status === "failed");
+
+    const stop = () => {
+      stopped = true;
+      clearTimeout(deadline);
+      source?.close();
+    };
+
+    const fail = (message: string) => {
+      if (stopped) return;
+      stop();
+      onError(message);
+    };
+
+    const deadline = setTimeout(
+      () => fail("Transcription timed out. Please try again."),
+      WATCH_TIMEOUT_MS
+    );
+
+    const deliver = (update: TranscriptionStatusUpdate) => {
+      if (stopped) return;
+      if (update.type === "status") lastStatus = update.status;
+      onUpdate(update);
+      if (isTerminal(update)) stop();
+    };
+
+    // Client errors will not go away by retrying; anything else backs off
+    const retryOrFail = async (error: any) => {
+      const status = error?.response?.status;
+      if (status >= 400 && status < 500) {
+        fail(
+          status === 401
+            ? "Your session has expired. Please sign in again."
+            : "Failed to check transcription status"
+        );
+        return;
+      }
+      await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+    };
+
+    const longPoll = async () => {
+      while (!stopped) {
+        try {
+          const response = await api.get(
+            `/async/transcriptions/${id}/wait/`,
+            { params: lastStatus ? { status: lastStatus } : {} }
+          );
+          deliver(response.data);
+        } catch (error) {
+          await retryOrFail(error);
+        }
+      }
+    };
+
+    const poll = async () => {
+      while (!stopped) {
+        try {
+          const response = await api.get(`/transcriptions/${id}/`);
+          const { status, error_message } = response.data;
+          if (status !== lastStatus) {
+            deliver({ type: "status", id, status, error_message });
+          }
+          if (!stopped) {
+            await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+          }
+        } catch (error) {
+          await retryOrFail(error);
+        }
+      }
+    };
+
+    if (IO_PREFIX !== "/async") {
+      poll();
+      return stop;
+    }
+
+    if (typeof EventSource === "undefined") {
+      longPoll();
+      return stop;
+    }
+
+    source = new EventSource(
+      `${API_BASE_URL}/async/transcriptions/${id}/events/`,
+      { withCredentials: true }
+    );
+    const handle = (event: MessageEvent) => deliver(JSON.parse(event.data));
+    source.addEventListener("status", handle);
+    source.addEventListener("progress", handle);
+    source.onerror = () => {
+      source?.close();
+      if (!stopped) longPoll();
+    };
+
+    return stop;
+  },
+
   delete: async (id: string): Promise<void> => {
     await api.delete(`/transcriptions/${id}/`);
   },
 
+  bulkDelete: async (ids: string[]): Promise<DeletionRequest> => {
+    const response = await api.post("/transcriptions/bulk_delete/", { ids });
+    return response.data;
+  },
+
   download: async (id: string): Promise<Blob> => {
-    const response = await api.get(`/transcriptions/${id}/download/`, {
+    const response = await api.get(`${IO_PREFIX}/transcriptions/${id}/download/`, {
       responseType: "blob",
     });
     return response.data;
@@ -220,4 +391,12 @@ export const transcriptionApi = {
   },
 };
 
+// Bulk deletion progress
+export const deletionApi = {
+  get: async (id: string): Promise<DeletionRequest> => {
+    const response = await api.get(`/deletions/${id}/`);
+    return response.data;
+  },
+};
+
 export default api;
@@ -49,6 +49,7 @@ export interface AudioFile {
   duration: number;
   size: number;
   format: string;
+  storage_state: "hot" | "evicted" | "deleted";
   uploaded_at: string;
 }
 
@@ -58,6 +59,27 @@ export interface AudioUploadResponse {
   has_sufficient_balance: boolean;
 }
 
+export interface DirectUploadSession {
+  upload: {
+    url: string;
+    method: "PUT";
+    headers: Record<string, string>;
+  };
+  upload_token: string;
+  expires_in: number;
+}
+
+// Bulk deletion progress; items disappear at once and are purged in the background
+export interface DeletionRequest {
+  id: string;
+  kind: "audio" | "transcription";
+  status: "pending" | "completed";
+  requested_count: number;
+  deleted_count: number;
+  created_at: string;
+  completed_at: string | null;
+}
+
 // Transcription Types
 export type TranscriptionStatus =
   | "pending"
@@ -78,8 +100,21 @@ export interface Transcription {
   error_message: string | null;
   created_at: string;
   completed_at: string | null;
+  // Detail responses only: percentage of the audio transcribed so far
+  // (text holds the partial transcript while processing)
+  progress?: number;
 }
 
+// Pushed over /transcriptions/<id>/events/ (or returned by /wait/)
+export type TranscriptionStatusUpdate =
+  | {
+      type: "status";
+      id: string;
+      status: TranscriptionStatus;
+      error_message: string | null;
+    }
+  | { type: "progress"; id: string; stage: string; percent: number | null };
+
 export interface TranscriptionCreateRequest {
   audio_file_id: string;
   language: TranscriptionLanguage;
@@ -91,16 +126,13 @@ export interface LoginResponse {
   is_new_user: boolean;
 }
 
+// Logins carry proof issued by the provider; the backend reads the identity from it
 export interface GoogleLoginRequest {
-  email: string;
-  name: string;
-  provider_id: string;
+  id_token: string;
 }
 
 export interface FacebookLoginRequest {
-  email: string;
-  name: string;
-  provider_id: string;
+  access_token: string;
 }
 
 // Payment Types